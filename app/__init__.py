@@ -1,18 +1,35 @@
 # Main pipeline runner for all schedulers
 
-def run_all_schedulers():
+def run_all_schedulers(pipelined=None):
     """
-    Runs all scheduler steps in sequence.
+    Runs all scheduler steps. News fetch runs first; with pipelined (default PIPELINE_RUNNER_ENABLED)
+    validation, script and video generation then overlap through app.scheduler.pipeline_runner,
+    otherwise they run in sequence.
     Schedulers 4 (image generation) and 6 (publishing) are placeholders.
     """
+    from app.config import settings
+    from app.database.indexes import ensure_indexes
     from app.pipelines.scheduler1_fetch_news import fetch_and_store_rss_news
     from app.pipelines.scheduler2_validate_content import process_fetched_articles
     from app.pipelines.scheduler3_script_gen import process_valid_articles
     from app.pipelines.scheduler5_video_gen import process_script_generated_articles
+    from app.utils.http_transport import transport
+
+    ensure_indexes()
 
     print("Running Scheduler 1: News Fetch...")
     fetch_and_store_rss_news()
 
+    if pipelined is None:
+        pipelined = settings.PIPELINE_RUNNER_ENABLED
+    if pipelined:
+        from app.scheduler.pipeline_runner import run_pipeline
+
+        print("Running Schedulers 2, 3 and 5 as a pipeline...")
+        run_pipeline()
+        transport.log_stats()
+        return
+
     print("Running Scheduler 2: Content Validation...")
     process_fetched_articles()
 
@@ -28,5 +45,7 @@ def run_all_schedulers():
     print("Running Scheduler 6: Publishing... (Not implemented)")
     # TODO: Implement and call publishing step
 
+    transport.log_stats()
+
 if __name__ == "__main__":
     run_all_schedulers() 
\ No newline at end of file
@@ -1,44 +1,205 @@
+import asyncio
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
 import requests
-from typing import Any, Dict, Optional
+from app.ai.response_cache import ResponseCache, make_cache_key
+from app.config import settings
 from app.config.settings import GEMINI_API_KEY
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.http_transport import http_post
 from app.utils.logger import logger
+from app.utils.rate_limit import TokenBucket
+from app.utils.text_condense import estimate_tokens
 
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
 # GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent?key={}".format(GEMINI_API_KEY)
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={}".format(GEMINI_API_KEY)
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{}:generateContent?key={}".format(GEMINI_MODEL_NAME, GEMINI_API_KEY)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
 
+response_cache: Optional[ResponseCache] = None
+if settings.GEMINI_CACHE_ENABLED:
+    response_cache = ResponseCache(
+        settings.GEMINI_CACHE_PATH, settings.GEMINI_CACHE_TTL_SECONDS, settings.GEMINI_CACHE_MAX_ENTRIES
+    )
 
-def gemini_generate_content(prompt: str, model: str = "gemini-pro", max_retries: int = 3) -> Optional[Dict[str, Any]]:
+
+def retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """
+    Returns the server's retry hint in seconds: the Retry-After header (seconds or HTTP date),
+    or the RetryInfo 'retryDelay' (e.g. "17s") in a Gemini error body.
+    """
+    if response is None:
+        return None
+    header = (getattr(response, "headers", None) or {}).get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    try:
+        details = response.json().get("error", {}).get("details", [])
+    except (ValueError, AttributeError):
+        return None
+    for detail in details:
+        delay = str(detail.get("retryDelay", ""))
+        if delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                continue
+    return None
+
+
+def backoff_delay(attempt: int, hint: Optional[float] = None) -> float:
+    """
+    Exponential backoff with full jitter for the given attempt (1-based), never shorter than a server
+    hint and never longer than GEMINI_BACKOFF_MAX_SECONDS.
+    """
+    ceiling = min(settings.GEMINI_BACKOFF_MAX_SECONDS, settings.GEMINI_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+    delay = random.uniform(0, ceiling)
+    return min(max(delay, hint), settings.GEMINI_BACKOFF_MAX_SECONDS) if hint is not None else delay
+
+
+class AsyncGeminiClient:
+    """
+    asyncio Gemini client. At most max_concurrency requests are in flight across every event loop
+    and thread in the process (the sync wrapper runs each call in its own loop, and the pipeline
+    and event runners call it from several threads); the RPM and TPM token buckets are shared too.
+    Transient failures (timeouts, connection errors, 408/429/5xx) are retried with exponential
+    backoff and jitter, honouring Retry-After / retryDelay hints; other errors fail fast.
+    HTTP calls run in a worker thread so the event loop never blocks.
+    Transient failures also feed the circuit breaker; while it is open, generate raises
+    CircuitOpenError without calling the API so callers can stop their run early.
+    """
+    def __init__(self, max_concurrency: int = settings.GEMINI_MAX_CONCURRENCY,
+                 requests_per_minute: float = settings.GEMINI_RPM,
+                 tokens_per_minute: float = settings.GEMINI_TPM,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.breaker = breaker or CircuitBreaker("gemini", persist=False)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @staticmethod
+    def _post(payload: Dict[str, Any]) -> requests.Response:
+        headers = {"Content-Type": "application/json"}
+        response = http_post(GEMINI_API_URL, json=payload, headers=headers, timeout=settings.GEMINI_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response
+
+    def _post_in_slot(self, payload: Dict[str, Any]) -> requests.Response:
+        # Runs in a worker thread, so waiting for a slot never blocks an event loop
+        with self._slots:
+            return self._post(payload)
+
+    async def generate(self, prompt: str, max_retries: int = 3, generation_config: Optional[Dict[str, Any]] = None,
+                       use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Sends a prompt to Gemini and returns the response JSON, or None on failure.
+        Successful responses are cached (see app.ai.response_cache) unless use_cache is False.
+        Raises CircuitOpenError if the circuit is open before or between attempts.
+        """
+        cache = response_cache if use_cache else None
+        cache_key = make_cache_key(GEMINI_MODEL_NAME, prompt, generation_config)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Gemini response served from cache (hits={cache.hits}, misses={cache.misses})")
+                return cached
+
+        payload: Dict[str, Any] = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            payload["generationConfig"] = generation_config
+
+        for attempt in range(1, max_retries + 1):
+            hint = None
+            self.breaker.before_call()
+            try:
+                await self.request_bucket.acquire(1)
+                await self.token_bucket.acquire(estimate_tokens(prompt))
+                response = await asyncio.to_thread(self._post_in_slot, payload)
+                result = response.json()
+                self.breaker.record_success()
+                logger.info(f"Gemini API call successful (attempt {attempt})")
+                if cache is not None:
+                    cache.set(cache_key, result)
+                return result
+            except requests.HTTPError as e:
+                status = getattr(e.response, "status_code", None)
+                logger.error(f"Gemini API error (attempt {attempt}): {e}")
+                if status not in RETRYABLE_STATUS_CODES:
+                    # The service answered, so this says nothing about its health
+                    self.breaker.record_success()
+                    logger.error(f"Gemini API returned non-retryable status {status}; giving up.")
+                    return None
+                self.breaker.record_failure()
+                hint = retry_after_seconds(e.response)
+                if hint is not None and hint > settings.GEMINI_BACKOFF_MAX_SECONDS:
+                    # Waiting that long would hold the article's lease for nothing; the failure counts
+                    # towards the circuit, which stops the stages once the service stays unavailable
+                    logger.error(f"Gemini asked to retry in {hint:.0f}s, more than GEMINI_BACKOFF_MAX_SECONDS; giving up.")
+                    return None
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self.breaker.record_failure()
+                logger.error(f"Gemini API error (attempt {attempt}): {e}")
+            except (requests.RequestException, ValueError) as e:
+                self.breaker.record_failure()
+                logger.error(f"Gemini API error (attempt {attempt}): {e}; giving up.")
+                return None
+            if attempt == max_retries:
+                logger.error(f"Gemini API failed after {max_retries} attempts.")
+                break
+            delay = backoff_delay(attempt, hint)
+            logger.info(f"Retrying Gemini API call in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return None
+
+    async def generate_many(self, prompts: List[str], **kwargs) -> List[Optional[Dict[str, Any]]]:
+        """Runs generate for several prompts concurrently and returns the results in prompt order."""
+        return list(await asyncio.gather(*(self.generate(prompt, **kwargs) for prompt in prompts)))
+
+
+gemini_breaker = CircuitBreaker(
+    "gemini", settings.GEMINI_BREAKER_FAILURE_THRESHOLD, settings.GEMINI_BREAKER_RECOVERY_SECONDS
+)
+gemini_async_client = AsyncGeminiClient(breaker=gemini_breaker)
+
+
+def gemini_generate_content(prompt: str, model: str = "gemini-pro", max_retries: int = 3,
+                            generation_config: Optional[Dict[str, Any]] = None,
+                            use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """
     Sends a prompt to the Gemini API and returns the generated result.
+    Thin synchronous wrapper over AsyncGeminiClient.generate, so it shares the process-wide
+    rate limits, backoff and response cache. Must not be called from a running event loop;
+    use `await gemini_async_client.generate(...)` there instead.
     Args:
         prompt (str): The prompt to send to Gemini.
         model (str): The Gemini model to use (default: "gemini-pro").
-        max_retries (int): Number of retries for transient errors.
+        max_retries (int): Number of attempts for transient errors.
+        generation_config (dict): Optional Gemini generationConfig for the request.
+        use_cache (bool): Whether to read and write the response cache.
     Returns:
         Optional[Dict[str, Any]]: The Gemini API response, or None on failure.
     Raises:
         RuntimeError: If the API key is not set.
+        CircuitOpenError: If the Gemini circuit breaker is open.
     """
     if not GEMINI_API_KEY:
         raise RuntimeError("Gemini API key not set in settings.")
+    return asyncio.run(gemini_async_client.generate(
+        prompt, max_retries=max_retries, generation_config=generation_config, use_cache=use_cache
+    ))
 
-    url = GEMINI_API_URL
-    headers = {"Content-Type": "application/json"}
-    payload = {
-        "contents": [
-            {"parts": [{"text": prompt}]}
-        ]
-    }
 
-    for attempt in range(1, max_retries + 1):
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=15)
-            response.raise_for_status()
-            result = response.json()
-            logger.info(f"Gemini API call successful (attempt {attempt})")
-            return result
-        except requests.RequestException as e:
-            logger.error(f"Gemini API error (attempt {attempt}): {e}")
-            if attempt == max_retries:
-                logger.error(f"Gemini API failed after {max_retries} attempts.")
-    return None 
\ No newline at end of file
+def invalidate_cached_response(prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> None:
+    """Removes a cached reply that could not be used, so the next attempt asks Gemini again."""
+    if response_cache is not None:
+        response_cache.delete(make_cache_key(GEMINI_MODEL_NAME, prompt, generation_config))
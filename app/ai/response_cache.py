@@ -0,0 +1,100 @@
+"""
+Persistent, content-addressed cache for Gemini responses.
+Entries are keyed by a SHA-256 of (model, prompt, generation config) and stored in a local
+SQLite file with a TTL and a size bound enforced by least-recently-used eviction.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from app.utils.logger import logger
+
+
+def make_cache_key(model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps({"model": model, "prompt": prompt, "config": generation_config or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache. Safe to share between threads; each operation uses its own connection.
+    hits and misses count lookups made by this process.
+    """
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yields a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached response for key, or None if missing or expired."""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self.hits += 1
+                    return json.loads(row[0])
+                if row:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+        except sqlite3.Error as e:
+            logger.error(f"Gemini response cache read failed: {e}")
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Stores a response, evicting the least recently used entries beyond max_entries."""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access DESC "
+                    "LIMIT -1 OFFSET ?)", (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Gemini response cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        """Drops an entry, e.g. when its reply turned out to be unusable."""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.error(f"Gemini response cache delete failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters for this process and the current number of entries."""
+        try:
+            with self._connect() as conn:
+                size = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            size = -1
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
@@ -0,0 +1,191 @@
+"""
+Shared parsing of Gemini replies into validated pydantic models.
+Replies are requested as JSON (responseMimeType / responseSchema), and parsing tolerates the
+usual malformations before giving up: code fences, prose around the JSON, // and /* */
+comments, smart quotes, trailing commas and Python-style True/False/None literals.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from app.errors.exceptions import LLMResponseError, LLMResponseSchemaError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.S)
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+SMART_QUOTES = {"“": '"', "”": '"', "‘": "'", "’": "'"}
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+VALIDATION_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "id": {"type": "STRING"},
+        "valid": {"type": "STRING", "enum": ["YES", "NO"]},
+        "related_to_india": {"type": "STRING", "enum": ["YES", "NO"]},
+        "relevancy": {"type": "INTEGER"},
+        "reason": {"type": "STRING"},
+    },
+    "required": ["valid", "related_to_india", "relevancy", "reason"],
+}
+# Batch replies are matched back to their headlines by id, so every item must carry one
+VALIDATION_BATCH_ITEM_SCHEMA: Dict[str, Any] = {
+    **VALIDATION_RESPONSE_SCHEMA,
+    "required": ["id", *VALIDATION_RESPONSE_SCHEMA["required"]],
+}
+SCRIPT_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "sentiment": {"type": "STRING", "enum": ["happy", "sad", "neutral", "angry", "surprised"]},
+        "video_title": {"type": "STRING"},
+        "hashtags": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "caption": {"type": "STRING"},
+    },
+    "required": ["sentiment", "video_title", "hashtags", "caption"],
+}
+
+
+def json_generation_config(schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Gemini generationConfig asking for a JSON reply, optionally constrained to schema."""
+    config: Dict[str, Any] = {"responseMimeType": "application/json"}
+    if schema is not None:
+        config["responseSchema"] = schema
+    return config
+
+
+def array_schema(item_schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "ARRAY", "items": item_schema}
+
+
+def extract_response_text(result: Optional[Dict[str, Any]]) -> str:
+    """Returns the text of the first candidate. Raises LLMResponseError if there is none."""
+    try:
+        return "".join(part.get("text", "") for part in result["candidates"][0]["content"]["parts"])
+    except (KeyError, IndexError, TypeError, AttributeError):
+        raise LLMResponseError("No response from Gemini API.")
+
+
+def _balanced_json(text: str) -> Optional[str]:
+    """Returns the first balanced {...} or [...] span in text, skipping brackets inside strings."""
+    start = next((i for i, ch in enumerate(text) if ch in "{["), None)
+    if start is None:
+        return None
+    depth, in_string, escaped, quote = 0, False, False, ""
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                in_string = False
+        elif ch in "\"'":
+            in_string, quote = True, ch
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _strip_comments_and_literals(text: str) -> str:
+    """Removes // and /* */ comments and rewrites Python literals, leaving string contents untouched."""
+    out: List[str] = []
+    i, in_string = 0, False
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif text.startswith("//", i):
+            while i < len(text) and text[i] != "\n":
+                i += 1
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end == -1 else end + 2
+            continue
+        else:
+            literal = next((lit for lit in PYTHON_LITERALS if text.startswith(lit, i)
+                            and not text[i - 1:i].isalnum() and not text[i + len(lit):i + len(lit) + 1].isalnum()), None)
+            if literal:
+                out.append(PYTHON_LITERALS[literal])
+                i += len(literal)
+                continue
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def repair_json(text: str) -> str:
+    """Applies the common repairs (smart quotes, comments, literals, trailing commas)."""
+    for smart, plain in SMART_QUOTES.items():
+        text = text.replace(smart, plain)
+    text = _strip_comments_and_literals(text)
+    return TRAILING_COMMA_RE.sub(r"\1", text)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parses the JSON value in an LLM reply, trying progressively more lenient strategies.
+    Raises LLMResponseError if nothing parses.
+    """
+    text = (text or "").strip()
+    fenced = FENCE_RE.search(text)
+    candidates = [text]
+    if fenced:
+        candidates.append(fenced.group(1).strip())
+    span = _balanced_json(candidates[-1])
+    if span:
+        candidates.append(span)
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+    for candidate in candidates[::-1]:
+        try:
+            return json.loads(repair_json(candidate))
+        except ValueError:
+            pass
+    raise LLMResponseError(f"Failed to parse Gemini response as JSON: {text[:200]}")
+
+
+def parse_model(result: Optional[Dict[str, Any]], model: Type[ModelT]) -> ModelT:
+    """Parses a Gemini reply into model. Raises LLMResponseError / LLMResponseSchemaError."""
+    data = extract_json(extract_response_text(result))
+    if isinstance(data, list) and len(data) == 1:
+        data = data[0]
+    try:
+        return model(**data) if isinstance(data, dict) else model.model_validate(data)
+    except ValidationError as e:
+        raise LLMResponseSchemaError(f"Gemini response does not match {model.__name__}: {e}")
+
+
+def parse_model_list(result: Optional[Dict[str, Any]], model: Type[ModelT]) -> List[ModelT]:
+    """
+    Parses a Gemini reply holding a JSON array of model objects. Items that fail validation are
+    dropped; a reply that is not an array raises LLMResponseSchemaError.
+    """
+    data = extract_json(extract_response_text(result))
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), None)
+    if not isinstance(data, list):
+        raise LLMResponseSchemaError(f"Expected a JSON array of {model.__name__} objects.")
+    items = []
+    for item in data:
+        try:
+            items.append(model(**item))
+        except (ValidationError, TypeError):
+            continue
+    return items
@@ -1,16 +1,58 @@
 import requests
+from datetime import datetime
 from typing import List, Dict, Optional
 from app.utils.logger import logger
+from app.config import settings
 from app.config.settings import GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_CX
+from app.database.api_cache import DailyQuota, get_cached_response, store_cached_response
+from app.utils.http_transport import http_get
 
-def fetch_google_custom_search(query: str, max_results: int = 5) -> list:
+SEARCH_CACHE_NAMESPACE = "google_custom_search"
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE: Optional[ZoneInfo] = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = None
+
+
+def quota_day() -> str:
+    """Google resets Custom Search quota at midnight Pacific time; falls back to UTC without tzdata."""
+    now = datetime.now(QUOTA_TIMEZONE) if QUOTA_TIMEZONE else datetime.utcnow()
+    return now.strftime('%Y-%m-%d')
+
+
+search_quota = DailyQuota(
+    SEARCH_CACHE_NAMESPACE, settings.GOOGLE_SEARCH_DAILY_QUOTA, settings.GOOGLE_SEARCH_QUOTA_RESERVE, day_fn=quota_day
+)
+
+
+def search_cache_key(query: str, max_results: int) -> str:
+    """Cache key for a query: the query, result count and the current date bucket."""
+    return f"{quota_day()}|{max_results}|{query}"
+
+
+def fetch_google_custom_search(query: str, max_results: int = 5, use_cache: bool = True) -> list:
     """
     Fetch news headlines using Google Custom Search API.
     Returns a list of dicts with 'title', 'snippet', and 'displayLink'.
+    Identical queries within SEARCH_CACHE_TTL_SECONDS on the same day are served from cache.
+    Once the daily quota (minus GOOGLE_SEARCH_QUOTA_RESERVE) is used up, or the API answers 429,
+    no further requests are made that day and an empty list is returned.
     """
     if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX:
         raise RuntimeError("Google Custom Search API credentials not set in settings.")
 
+    cache_key = search_cache_key(query, max_results)
+    if use_cache:
+        cached = get_cached_response(SEARCH_CACHE_NAMESPACE, cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached search results for query '{query}'")
+            return cached
+    if not search_quota.try_consume():
+        logger.warning(f"Google Custom Search daily quota reached; skipping query '{query}'")
+        return []
+
     search_url = (
         f"https://www.googleapis.com/customsearch/v1"
         f"?q={query.replace(' ', '%20')}"
@@ -22,10 +64,17 @@ def fetch_google_custom_search(query: str, max_results: int = 5) -> list:
         f"&hl=en"
     )
     try:
-        response = requests.get(search_url, timeout=10)
+        response = http_get(search_url, timeout=10)
+        if response.status_code == 429:
+            search_quota.mark_exhausted()
+            logger.warning(f"Google Custom Search returned 429 for query '{query}'; pausing until quota resets.")
+            return []
         response.raise_for_status()
         results = response.json()
-        return results.get('items', [])
+        items = results.get('items', [])
+        if use_cache:
+            store_cached_response(SEARCH_CACHE_NAMESPACE, cache_key, items, settings.SEARCH_CACHE_TTL_SECONDS)
+        return items
     except requests.RequestException as e:
         print(f"!! An error occurred fetching news for query '{query}': {e}")
-        return [] 
\ No newline at end of file
+        return []
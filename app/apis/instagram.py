@@ -1,6 +1,6 @@
-import requests
 from app.config import settings
 import os
+from app.utils.http_transport import http_get, http_post
 from app.utils.logger import logger
 import time
 
@@ -16,7 +16,7 @@ def wait_for_media_ready(container_id, access_token, max_wait=180, poll_interval
     }
     waited = 0
     while waited < max_wait:
-        resp = requests.get(status_url, params=params)
+        resp = http_get(status_url, params=params)
         logger.info(f"Polling media status: {resp.status_code} {resp.text}")
         try:
             resp.raise_for_status()
@@ -52,7 +52,7 @@ def post_reel_to_instagram(video_url: str, caption: str) -> str:
         'access_token': access_token
     }
     try:
-        container_resp = requests.post(container_url, data=container_payload)
+        container_resp = http_post(container_url, data=container_payload)
         logger.info(f"Instagram container response: {container_resp.status_code} {container_resp.text}")
         container_resp.raise_for_status()
         container_data = container_resp.json()
@@ -78,7 +78,7 @@ def post_reel_to_instagram(video_url: str, caption: str) -> str:
         'access_token': access_token
     }
     try:
-        publish_resp = requests.post(publish_url, data=publish_payload)
+        publish_resp = http_post(publish_url, data=publish_payload)
         logger.info(f"Instagram publish response: {publish_resp.status_code} {publish_resp.text}")
         publish_resp.raise_for_status()
         publish_data = publish_resp.json()
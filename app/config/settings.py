@@ -28,4 +28,101 @@ if GCP_SERVICE_ACCOUNT_JSON:
         print("[DEBUG] Successfully parsed GCP_SERVICE_ACCOUNT_JSON.")
     except Exception as e:
         GCP_SERVICE_ACCOUNT_INFO = None
-        print(f"[ERROR] Failed to parse GCP_SERVICE_ACCOUNT_JSON: {e}") 
\ No newline at end of file
+        print(f"[ERROR] Failed to parse GCP_SERVICE_ACCOUNT_JSON: {e}") 
+# Scheduler 1 RSS fetch concurrency
+RSS_CONCURRENT_FETCH = os.getenv('RSS_CONCURRENT_FETCH', 'true').lower() == 'true'  # Fetch feeds/articles in parallel
+RSS_MAX_CONCURRENCY = int(os.getenv('RSS_MAX_CONCURRENCY', '16'))  # Max in-flight HTTP requests overall
+RSS_PER_HOST_CONCURRENCY = int(os.getenv('RSS_PER_HOST_CONCURRENCY', '2'))  # Max in-flight HTTP requests per host
+URL_INDEX_CAPACITY = int(os.getenv('URL_INDEX_CAPACITY', '50000'))  # Normalized links kept in the in-process dedup LRU
+
+# News ingestion batching
+INGEST_FLUSH_SIZE = int(os.getenv('INGEST_FLUSH_SIZE', '100'))  # Docs buffered before an insert_many
+INGEST_FLUSH_INTERVAL_SECONDS = float(os.getenv('INGEST_FLUSH_INTERVAL_SECONDS', '5'))  # Max age of a buffered doc
+
+# Article scraping
+ARTICLE_MAX_BYTES = int(os.getenv('ARTICLE_MAX_BYTES', str(2 * 1024 * 1024)))  # Stop downloading an article page after this many bytes
+
+# Near-duplicate story clustering
+NEAR_DUP_MAX_DISTANCE = int(os.getenv('NEAR_DUP_MAX_DISTANCE', '3'))  # Max SimHash bit distance for the same story (<= 3)
+NEAR_DUP_WINDOW_HOURS = int(os.getenv('NEAR_DUP_WINDOW_HOURS', '72'))  # Only cluster with stories fetched this recently
+NEAR_DUP_ARTICLE_CHARS = int(os.getenv('NEAR_DUP_ARTICLE_CHARS', '2000'))  # Article prefix included in the fingerprint
+
+# Google Custom Search quota and caching
+GOOGLE_SEARCH_DAILY_QUOTA = int(os.getenv('GOOGLE_SEARCH_DAILY_QUOTA', '100'))  # Queries allowed per day (Pacific time)
+GOOGLE_SEARCH_QUOTA_RESERVE = int(os.getenv('GOOGLE_SEARCH_QUOTA_RESERVE', '5'))  # Queries held back for manual use
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv('SEARCH_CACHE_TTL_SECONDS', '3600'))  # Reuse identical search results this long
+SEARCH_MAX_CONCURRENCY = int(os.getenv('SEARCH_MAX_CONCURRENCY', '5'))  # Domain queries run in parallel
+
+# Scheduler 2 validation
+VALIDATION_BATCH_SIZE = int(os.getenv('VALIDATION_BATCH_SIZE', '20'))  # Headlines per Gemini validation prompt (1 = one call per headline)
+
+# Gemini response cache
+GEMINI_CACHE_ENABLED = os.getenv('GEMINI_CACHE_ENABLED', 'true').lower() == 'true'
+GEMINI_CACHE_PATH = os.getenv('GEMINI_CACHE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache', 'gemini_responses.sqlite3'))
+GEMINI_CACHE_TTL_SECONDS = int(os.getenv('GEMINI_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))  # Cached replies older than this are refetched
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '5000'))  # Least recently used replies are evicted beyond this
+
+# Gemini client rate limiting and retries
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '4'))  # In-flight Gemini requests per process
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', '15'))  # Requests per minute allowed by our tier
+GEMINI_TPM = float(os.getenv('GEMINI_TPM', '1000000'))  # Input tokens per minute allowed by our tier
+GEMINI_REQUEST_TIMEOUT = float(os.getenv('GEMINI_REQUEST_TIMEOUT', '15'))  # Seconds per Gemini HTTP request
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv('GEMINI_BACKOFF_BASE_SECONDS', '1'))  # First retry delay before jitter
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv('GEMINI_BACKOFF_MAX_SECONDS', '60'))  # Cap on a single retry delay
+GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('GEMINI_BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive transient failures that open the Gemini circuit
+GEMINI_BREAKER_RECOVERY_SECONDS = float(os.getenv('GEMINI_BREAKER_RECOVERY_SECONDS', '120'))  # How long the circuit stays open before a probe
+
+# Shared HTTP transport
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))  # Default connect timeout in seconds
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))  # Default read timeout in seconds
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))  # Keep-alive connections per host unless overridden below
+
+# Scheduler 3 script prompt
+SCRIPT_PROMPT_TOKEN_BUDGET = int(os.getenv('SCRIPT_PROMPT_TOKEN_BUDGET', '2000'))  # Max estimated tokens for the whole script prompt
+GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', 'true').lower() == 'true'  # Ask Gemini for schema-constrained JSON replies
+
+# Event-driven stage runner
+EVENT_RUNNER_STAGES = [s.strip() for s in os.getenv('EVENT_RUNNER_STAGES', 'validate,script,video').split(',') if s.strip()]  # Stages the change-stream runner dispatches to; add publish to post reels as soon as they are rendered
+EVENT_POLL_INTERVAL_SECONDS = float(os.getenv('EVENT_POLL_INTERVAL_SECONDS', '30'))  # Poll interval when change streams are unavailable
+
+# Stage job leases
+LEASE_SECONDS = float(os.getenv('LEASE_SECONDS', '300'))  # A claimed article is reclaimable if not renewed within this
+
+# Stage retries
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '5'))  # Failed attempts before an article is moved to DEAD_LETTER
+RETRY_BACKOFF_BASE_SECONDS = float(os.getenv('RETRY_BACKOFF_BASE_SECONDS', '300'))  # Delay after the first failure, doubled per attempt
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv('RETRY_BACKOFF_MAX_SECONDS', str(6 * 3600)))  # Cap on the delay between attempts
+
+# Pipelined runner
+PIPELINE_RUNNER_ENABLED = os.getenv('PIPELINE_RUNNER_ENABLED', 'true').lower() == 'true'  # run_all_schedulers overlaps stages instead of running them one after another
+PIPELINE_WORKERS = dict(
+    (name.strip(), int(count)) for name, count in
+    (item.split('=') for item in os.getenv('PIPELINE_WORKERS', 'validate=2,script=2').split(',') if '=' in item)
+)  # Worker threads per pipelined stage; video defaults to the render pool size
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '20'))  # Bounded hand-off queue between stages; a full queue blocks the stage feeding it
+
+# Stage cursors
+STAGE_CURSOR_BATCH_SIZE = int(os.getenv('STAGE_CURSOR_BATCH_SIZE', '100'))  # Documents per cursor batch when scanning stage backlogs
+
+# Video render pool
+RENDER_POOL_SIZE = int(os.getenv('RENDER_POOL_SIZE', '0'))  # Parallel ffmpeg renders; 0 = one per RENDER_TARGET_THREADS cores
+RENDER_TARGET_THREADS = int(os.getenv('RENDER_TARGET_THREADS', '4'))  # Cores per render when RENDER_POOL_SIZE is auto; x264 gains little past a few threads at 1080x1920
+RENDER_TMP_DIR = os.getenv('RENDER_TMP_DIR') or None  # Parent of the per-render workspaces (default: system temp dir)
+VIDEO_RENDER_LIMIT = int(os.getenv('VIDEO_RENDER_LIMIT', '6'))  # Max videos rendered per Scheduler 5 / pipelined run
+
+# Background asset cache
+BACKGROUND_CACHE_ENABLED = os.getenv('BACKGROUND_CACHE_ENABLED', 'true').lower() == 'true'  # Render from pre-normalized copies of the background clips
+BACKGROUND_CACHE_DIR = os.getenv('BACKGROUND_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache', 'background_video'))  # Where normalized clips are stored
+BACKGROUND_CACHE_FPS = int(os.getenv('BACKGROUND_CACHE_FPS', '30'))  # Frame rate of the normalized clips and of slide segments
+BACKGROUND_CACHE_CRF = int(os.getenv('BACKGROUND_CACHE_CRF', '18'))  # x264 quality of the normalized clips; kept high since they are encoded again
+
+# Slide segment rendering
+SEGMENT_CACHE_DIR = os.getenv('SEGMENT_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache', 'segments'))  # Encoded slide segments, reused when a reel is re-rendered
+SEGMENT_CACHE_MAX_AGE_DAYS = float(os.getenv('SEGMENT_CACHE_MAX_AGE_DAYS', '7'))  # Segments unused for this long are removed
+
+# Caption rendering
+CAPTION_RENDERER = os.getenv('CAPTION_RENDERER', 'overlay')  # 'overlay' composites a pre-rendered caption PNG; 'subtitles' runs libass on every frame
+
+# Render profiles
+RENDER_DEFAULT_PROFILE = os.getenv('RENDER_DEFAULT_PROFILE', 'preview')  # Profile for articles without a render_profile; 'final' skips dashboard approval
+VIDEO_MAX_DURATION_SECONDS = float(os.getenv('VIDEO_MAX_DURATION_SECONDS', '90'))  # Reels are cut at this length, however long the music is
@@ -0,0 +1,100 @@
+"""
+MongoDB-backed response cache and daily quota counters for external APIs.
+Cached responses expire through a TTL index on 'expires_at'.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from pymongo import ReturnDocument
+from app.database.indexes import ensure_collection_indexes
+from app.database.mongo import get_collection
+from app.utils.logger import logger
+
+API_CACHE_COLLECTION = 'api_cache'
+API_QUOTA_COLLECTION = 'api_quota'
+
+
+def _cache_id(namespace: str, key: str) -> str:
+    return f"{namespace}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def get_cached_response(namespace: str, key: str) -> Optional[Any]:
+    """Returns the cached value for (namespace, key), or None if missing, expired or the DB is unavailable."""
+    collection = get_collection(API_CACHE_COLLECTION)
+    if collection is None:
+        return None
+    try:
+        doc = collection.find_one({"_id": _cache_id(namespace, key), "expires_at": {"$gt": datetime.utcnow()}})
+    except Exception as e:
+        logger.error(f"Error reading API cache for {namespace}: {e}")
+        return None
+    return doc["value"] if doc else None
+
+
+def store_cached_response(namespace: str, key: str, value: Any, ttl_seconds: int) -> None:
+    """Caches value for (namespace, key) for ttl_seconds."""
+    collection = get_collection(API_CACHE_COLLECTION)
+    if collection is None:
+        return
+    now = datetime.utcnow()
+    try:
+        ensure_collection_indexes(collection)
+        collection.replace_one(
+            {"_id": _cache_id(namespace, key)},
+            {"namespace": namespace, "value": value, "created_at": now, "expires_at": now + timedelta(seconds=ttl_seconds)},
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Error writing API cache for {namespace}: {e}")
+
+
+class DailyQuota:
+    """
+    Counts API calls per day in MongoDB so every process shares one budget.
+    A call is allowed while usage stays at or below limit - reserve.
+    """
+    def __init__(self, name: str, limit: int, reserve: int = 0, day_fn=None):
+        self.name = name
+        self.limit = limit
+        self.reserve = reserve
+        self._day_fn = day_fn or (lambda: datetime.utcnow().strftime('%Y-%m-%d'))
+
+    def _quota_id(self) -> str:
+        return f"{self.name}:{self._day_fn()}"
+
+    def try_consume(self) -> bool:
+        """Records one call and returns True if it fits in today's budget. Allows the call if the DB is unavailable."""
+        collection = get_collection(API_QUOTA_COLLECTION)
+        if collection is None:
+            return True
+        try:
+            doc = collection.find_one_and_update(
+                {"_id": self._quota_id()}, {"$inc": {"used": 1}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Error updating quota '{self.name}': {e}")
+            return True
+        return doc["used"] <= self.limit - self.reserve
+
+    def mark_exhausted(self) -> None:
+        """Marks today's budget as spent, e.g. after the API answered 429."""
+        collection = get_collection(API_QUOTA_COLLECTION)
+        if collection is None:
+            return
+        try:
+            collection.update_one({"_id": self._quota_id()}, {"$max": {"used": self.limit}}, upsert=True)
+        except Exception as e:
+            logger.error(f"Error marking quota '{self.name}' exhausted: {e}")
+
+    def remaining(self) -> Optional[int]:
+        """Returns the calls left today before the reserve, or None if the DB is unavailable."""
+        collection = get_collection(API_QUOTA_COLLECTION)
+        if collection is None:
+            return None
+        try:
+            doc = collection.find_one({"_id": self._quota_id()}) or {}
+        except Exception as e:
+            logger.error(f"Error reading quota '{self.name}': {e}")
+            return None
+        return max(0, self.limit - self.reserve - doc.get("used", 0))
@@ -0,0 +1,97 @@
+"""
+Batched writer for news ingestion.
+Buffers UnifiedNewsDoc inserts and writes them with unordered insert_many calls, so one
+duplicate does not block the rest of the batch and each batch costs a single round trip.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database.models import UnifiedNewsDoc
+from app.utils.logger import logger
+
+DUPLICATE_KEY_ERROR_CODES = {11000, 11001}
+
+
+class BulkNewsWriter:
+    """
+    Buffers news docs and flushes them with insert_many(ordered=False).
+    A flush happens when flush_size docs are buffered, when the oldest buffered doc is older than
+    flush_interval seconds (checked on add), and on exit when used as a context manager.
+    Duplicate-key errors are classified per document from the BulkWriteError details.
+    on_failure is called with each doc that failed for any reason other than a duplicate.
+    """
+    def __init__(self, collection: Optional[Collection], flush_size: int = settings.INGEST_FLUSH_SIZE,
+                 flush_interval: float = settings.INGEST_FLUSH_INTERVAL_SECONDS,
+                 on_failure: Optional[Callable[[UnifiedNewsDoc], None]] = None):
+        self._collection = collection
+        self._flush_size = max(1, flush_size)
+        self._flush_interval = flush_interval
+        self._on_failure = on_failure
+        self._buffer: List[UnifiedNewsDoc] = []
+        self._buffer_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"inserted": 0, "duplicates": 0, "failed": 0}
+
+    def __enter__(self) -> "BulkNewsWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+    def add(self, doc: UnifiedNewsDoc) -> None:
+        """Buffers a doc, flushing if the batch is full or too old."""
+        with self._lock:
+            if not self._buffer:
+                self._buffer_started = time.monotonic()
+            self._buffer.append(doc)
+            due = (len(self._buffer) >= self._flush_size
+                   or time.monotonic() - (self._buffer_started or 0) >= self._flush_interval)
+        if due:
+            self.flush()
+
+    def add_many(self, docs: List[UnifiedNewsDoc]) -> None:
+        for doc in docs:
+            self.add(doc)
+
+    def flush(self) -> None:
+        """Writes all buffered docs in one unordered insert_many."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._buffer_started = None
+        if not batch:
+            return
+        if self._collection is None:
+            logger.warning(f"Could not get MongoDB collection 'news'. Dropping {len(batch)} docs.")
+            return
+        payload = [{k: v for k, v in doc.dict().items() if v is not None} for doc in batch]
+        try:
+            result = self._collection.insert_many(payload, ordered=False)
+            self.stats["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            self._classify_errors(batch, e.details)
+        except Exception as e:
+            logger.error(f"Error inserting batch of {len(batch)} news docs: {e}")
+            self.stats["failed"] += len(batch)
+            for doc in batch:
+                self._report_failure(doc)
+            return
+        logger.info(f"Flushed {len(batch)} news docs to DB (totals: {self.stats}).")
+
+    def _classify_errors(self, batch: List[UnifiedNewsDoc], details: Dict) -> None:
+        self.stats["inserted"] += details.get("nInserted", 0)
+        for error in details.get("writeErrors", []):
+            doc = batch[error["index"]]
+            if error.get("code") in DUPLICATE_KEY_ERROR_CODES:
+                self.stats["duplicates"] += 1
+                logger.warning(f"Duplicate news found: '{doc.headline}' from '{doc.source}'. Skipping.")
+            else:
+                self.stats["failed"] += 1
+                logger.error(f"Error inserting news: '{doc.headline}' from '{doc.source}': {error.get('errmsg')}")
+                self._report_failure(doc)
+
+    def _report_failure(self, doc: UnifiedNewsDoc) -> None:
+        if self._on_failure is not None:
+            self._on_failure(doc)
@@ -0,0 +1,107 @@
+"""
+Pre-insert deduplication index for news articles.
+Articles are keyed by their normalized link (see app.utils.url_utils.normalize_url).
+A unique MongoDB index on 'normalized_link' is the source of truth; an in-process LRU,
+warmed from the most recent articles at startup, answers most lookups without a round trip.
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional
+from pymongo import DESCENDING
+from pymongo.collection import Collection
+from app.config import settings
+from app.database.indexes import ensure_collection_indexes
+from app.database.mongo import get_collection
+from app.utils.logger import logger
+from app.utils.url_utils import normalize_url
+
+NEWS_COLLECTION = 'news'
+NORMALIZED_LINK_FIELD = 'normalized_link'
+
+
+class SeenUrlIndex:
+    """
+    Thread-safe LRU of normalized article links backed by the news collection.
+    """
+    def __init__(self, collection: Optional[Collection], capacity: int = settings.URL_INDEX_CAPACITY):
+        self._collection = collection
+        self._capacity = max(1, capacity)
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str) -> None:
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._capacity:
+            self._lru.popitem(last=False)
+
+    def warm(self) -> int:
+        """
+        Loads the normalized links of the most recent articles into the LRU. Returns the number loaded.
+        """
+        if self._collection is None:
+            return 0
+        cursor = self._collection.find(
+            {NORMALIZED_LINK_FIELD: {"$exists": True}}, {NORMALIZED_LINK_FIELD: 1, "_id": 0}
+        ).sort("created_at", DESCENDING).limit(self._capacity)
+        links = [doc[NORMALIZED_LINK_FIELD] for doc in cursor]
+        with self._lock:
+            for link in reversed(links):
+                self._remember(link)
+        return len(links)
+
+    def _in_db(self, key: str) -> bool:
+        if self._collection is None:
+            return False
+        try:
+            return self._collection.find_one({NORMALIZED_LINK_FIELD: key}, {"_id": 1}) is not None
+        except Exception as e:
+            logger.error(f"Error checking URL index for {key}: {e}")
+            return False
+
+    def check_and_add(self, url: str) -> bool:
+        """
+        Returns True if the article URL is already known. Otherwise records it and returns False,
+        so concurrent callers seeing the same link only scrape it once.
+        """
+        key = normalize_url(url)
+        if not key:
+            return False
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return True
+        known = self._in_db(key)
+        with self._lock:
+            if key in self._lru:
+                return True
+            self._remember(key)
+        return known
+
+    def discard(self, url: str) -> None:
+        """Forgets a URL, e.g. after its insert failed for a reason other than a duplicate."""
+        with self._lock:
+            self._lru.pop(normalize_url(url), None)
+
+
+_seen_url_index: Optional[SeenUrlIndex] = None
+_seen_url_index_lock = threading.Lock()
+
+
+def get_seen_url_index() -> SeenUrlIndex:
+    """
+    Returns the process-wide SeenUrlIndex, creating the unique index and warming the LRU on first use.
+    """
+    global _seen_url_index
+    with _seen_url_index_lock:
+        if _seen_url_index is None:
+            collection = get_collection(NEWS_COLLECTION)
+            index = SeenUrlIndex(collection)
+            if collection is not None:
+                try:
+                    ensure_collection_indexes(collection)
+                    logger.info(f"Warmed URL dedup index with {index.warm()} links.")
+                except Exception as e:
+                    logger.error(f"Error preparing URL dedup index: {e}")
+            _seen_url_index = index
+        return _seen_url_index
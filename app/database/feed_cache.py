@@ -0,0 +1,46 @@
+"""
+Persistent per-feed HTTP validator cache for RSS polling.
+Stores the last ETag / Last-Modified seen for each feed URL plus a bounded list of
+entry GUIDs that were already returned, so unchanged feeds and old entries are skipped.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.database.mongo import get_collection
+from app.utils.logger import logger
+
+FEED_STATE_COLLECTION = 'rss_feed_state'
+MAX_SEEN_GUIDS = 500
+
+
+def load_feed_state(feed_url: str) -> Dict:
+    """
+    Returns the stored state for a feed: 'etag', 'last_modified' and 'seen_guids'.
+    Returns an empty dict when nothing is stored or the database is unavailable.
+    """
+    collection = get_collection(FEED_STATE_COLLECTION)
+    if collection is None:
+        return {}
+    try:
+        return collection.find_one({"_id": feed_url}) or {}
+    except Exception as e:
+        logger.error(f"Error loading RSS feed state for {feed_url}: {e}")
+        return {}
+
+
+def save_feed_state(feed_url: str, etag: Optional[str], last_modified: Optional[str], new_guids: List[str]) -> None:
+    """
+    Stores the latest validators for a feed and appends newly seen GUIDs,
+    keeping only the most recent MAX_SEEN_GUIDS.
+    """
+    collection = get_collection(FEED_STATE_COLLECTION)
+    if collection is None:
+        return
+    update: Dict = {
+        "$set": {"etag": etag, "last_modified": last_modified, "checked_at": datetime.utcnow()}
+    }
+    if new_guids:
+        update["$push"] = {"seen_guids": {"$each": new_guids, "$slice": -MAX_SEEN_GUIDS}}
+    try:
+        collection.update_one({"_id": feed_url}, update, upsert=True)
+    except Exception as e:
+        logger.error(f"Error saving RSS feed state for {feed_url}: {e}")
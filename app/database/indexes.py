@@ -0,0 +1,106 @@
+"""
+Index registry for every collection the pipeline queries.
+All indexes are declared here and created by ensure_indexes(), which the schedulers, the event
+runner and the pipelined runner call at startup. Modules that depend on an index (e.g. the unique
+normalized_link key for dedup) also call ensure_collection_indexes() before first use, so running
+a single stage on its own is still safe. create_indexes is a no-op for indexes that already exist.
+
+Usage: python -m app.database.indexes [--collection news]
+"""
+import argparse
+import threading
+from typing import Dict, List, Optional
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from app.database.mongo import get_db
+from app.utils.logger import logger
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "news": [
+        # Stage claims: equality on status, then the stage sort (Schedulers 3, 5, 6 and /top_news)
+        IndexModel([("status", ASCENDING), ("relevancy", DESCENDING), ("created_at", DESCENDING)],
+                   name="status_relevancy_created_at"),
+        # Stage claims filtered on retry backoff (app.database.retries)
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        # Expired lease lookups (app.database.leases)
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+        # URL dedup key; sparse so legacy documents without the field are allowed (app.database.dedup)
+        IndexModel([("normalized_link", ASCENDING)], unique=True, sparse=True, name="normalized_link_unique"),
+        # Near-duplicate band lookups within the time window (app.database.near_duplicates)
+        IndexModel([("simhash_bands", ASCENDING), ("created_at", DESCENDING)], name="simhash_bands_created_at"),
+        # Dedup LRU warm-up reads the newest links first
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "api_cache": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+}
+
+# Server errors that the same index will hit again on every attempt: duplicate keys in the data,
+# IndexOptionsConflict, IndexKeySpecsConflict, CannotCreateIndex, InvalidIndexSpecificationOption
+PERMANENT_INDEX_ERROR_CODES = {11000, 85, 86, 67, 197}
+
+_ensured: set = set()  # (collection full name, index name) pairs that need no further attempts
+_ensured_lock = threading.Lock()
+
+
+def ensure_collection_indexes(collection: Collection, spec: Optional[str] = None) -> List[str]:
+    """
+    Creates the registered indexes for collection (or for the registry entry spec) once per process.
+    Each index is created on its own, so one that cannot be built (e.g. the unique link key over
+    legacy duplicates) is logged and does not keep the others from being created. An index that was
+    created, or failed with a permanent error, is not attempted again in this process (run the CLI
+    to retry); one that failed with a transient error (e.g. a network timeout) is retried on the
+    next call.
+    Returns the names of the indexes that were created, or an empty list if there is nothing to do.
+    """
+    spec = spec or collection.name
+    names = []
+    with _ensured_lock:
+        for model in INDEXES.get(spec, []):
+            key = (collection.full_name, model.document["name"])
+            if key in _ensured:
+                continue
+            try:
+                names.extend(collection.create_indexes([model]))
+            except OperationFailure as e:
+                permanent = e.code in PERMANENT_INDEX_ERROR_CODES
+                logger.error(f"Error creating index '{key[1]}' on '{key[0]}'"
+                             f"{'' if permanent else '; retrying on next use'}: {e}")
+                if not permanent:
+                    continue
+            except Exception as e:
+                logger.error(f"Error creating index '{key[1]}' on '{key[0]}'; retrying on next use: {e}")
+                continue
+            _ensured.add(key)
+    return names
+
+
+def ensure_indexes(db: Optional[Database] = None, collections: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """Creates every registered index (or those of collections). Errors are logged per collection."""
+    db = db if db is not None else get_db()
+    if db is None:
+        logger.error("Could not connect to MongoDB. Indexes not ensured.")
+        return {}
+    created = {}
+    for name in collections or list(INDEXES):
+        try:
+            created[name] = ensure_collection_indexes(db[name])
+        except Exception as e:
+            logger.error(f"Error creating indexes on '{name}': {e}")
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the MongoDB indexes the pipeline relies on.")
+    parser.add_argument("--collection", action="append", choices=sorted(INDEXES),
+                        help="Only this collection (repeatable). Defaults to all.")
+    args = parser.parse_args()
+    for name, indexes in ensure_indexes(collections=args.collection).items():
+        print(f"{name}: {', '.join(indexes) or 'none created (see the errors above)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Lease-based job claiming for pipeline stages.
+A worker claims a document with one atomic find_one_and_update that records lease_owner,
+lease_expires_at and heartbeat_at, so any number of workers can run the same stage without
+processing a document twice. Long jobs extend their lease with heartbeats; a lease that is not
+renewed before it expires (e.g. the worker crashed) can be claimed by another worker.
+Stage results are written with update_leased, which only matches while the writer still holds the
+lease, so a stalled worker whose document was reclaimed never overwrites the new owner's result.
+"""
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from app.config import settings
+from app.utils.logger import logger
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+LEASE_FIELDS = ("lease_owner", "lease_expires_at", "heartbeat_at")  # Removed on release; claimed_at is kept
+
+
+def claim_filter(query: dict, now: Optional[datetime] = None) -> dict:
+    """query restricted to documents that are not leased, or whose lease has expired."""
+    now = now or datetime.utcnow()
+    # {"lease_expires_at": None} also matches documents that were never leased
+    return {"$and": [query, {"$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]}]}
+
+
+def _lease_update(owner: str, lease_seconds: float, now: datetime) -> dict:
+    return {"$set": {
+        "lease_owner": owner,
+        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+        "heartbeat_at": now,
+    }}
+
+
+def run_cutoff() -> datetime:
+    """Start-of-run timestamp truncated to MongoDB's millisecond precision, for claimed_before."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def claimed_before(cutoff: datetime) -> dict:
+    """Matches documents not claimed since cutoff, so a run never picks up a document twice."""
+    return {"$or": [{"claimed_at": None}, {"claimed_at": {"$lt": cutoff}}]}
+
+
+def claim_next(collection: Collection, query: dict, sort: Optional[Sequence[Tuple[str, int]]] = None,
+               owner: str = WORKER_ID, lease_seconds: float = settings.LEASE_SECONDS,
+               projection: Optional[dict] = None) -> Optional[dict]:
+    """
+    Atomically leases the first document matching query (in sort order) that is not leased by
+    another worker, and returns it (only the projection fields, if given), or None if there is
+    nothing to claim.
+    """
+    now = datetime.utcnow()
+    update = _lease_update(owner, lease_seconds, now)
+    update["$set"]["claimed_at"] = now
+    return collection.find_one_and_update(
+        claim_filter(query, now), update, projection=projection,
+        sort=list(sort) if sort else None, return_document=ReturnDocument.AFTER
+    )
+
+
+def claim_batch(collection: Collection, query: dict, limit: int, sort: Optional[Sequence[Tuple[str, int]]] = None,
+                owner: str = WORKER_ID, lease_seconds: float = settings.LEASE_SECONDS,
+                projection: Optional[dict] = None) -> List[dict]:
+    """Claims up to limit documents, one atomic claim each."""
+    claimed = []
+    while len(claimed) < limit:
+        doc = claim_next(collection, query, sort, owner, lease_seconds, projection)
+        if doc is None:
+            break
+        claimed.append(doc)
+    return claimed
+
+
+def claim_document(collection: Collection, doc_id, query: Optional[dict] = None, owner: str = WORKER_ID,
+                   lease_seconds: float = settings.LEASE_SECONDS, projection: Optional[dict] = None) -> Optional[dict]:
+    """Leases one specific document if it still matches query and is not leased by another worker."""
+    return claim_next(collection, {"_id": doc_id, **(query or {})}, owner=owner, lease_seconds=lease_seconds,
+                      projection=projection)
+
+
+def heartbeat(collection: Collection, doc_id, owner: str = WORKER_ID,
+              lease_seconds: float = settings.LEASE_SECONDS) -> bool:
+    """Extends a lease held by owner. Returns False if the lease was lost to another worker."""
+    now = datetime.utcnow()
+    result = collection.update_one({"_id": doc_id, "lease_owner": owner}, _lease_update(owner, lease_seconds, now))
+    return result.matched_count == 1
+
+
+def update_leased(collection: Collection, doc_id, update: dict, owner: str = WORKER_ID) -> bool:
+    """
+    Applies update to doc_id only if owner still holds its lease. Returns False, with a warning,
+    if the lease was lost to another worker and the update was skipped.
+    """
+    result = collection.update_one({"_id": doc_id, "lease_owner": owner}, update)
+    if result.matched_count == 0:
+        logger.warning(f"Lease on doc_id={doc_id} was lost to another worker; not writing this worker's result.")
+        return False
+    return True
+
+
+def release(collection: Collection, doc_id, owner: str = WORKER_ID) -> None:
+    """Drops the lease if owner still holds it."""
+    collection.update_one({"_id": doc_id, "lease_owner": owner}, {"$unset": {field: "" for field in LEASE_FIELDS}})
+
+
+@contextmanager
+def leased(collection: Collection, doc: dict, owner: str = WORKER_ID,
+           lease_seconds: float = settings.LEASE_SECONDS) -> Iterator[dict]:
+    """
+    Holds the lease on an already claimed doc for the duration of the block, renewing it from a
+    background thread every lease_seconds / 3, and releases it afterwards.
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(lease_seconds / 3):
+            try:
+                if not heartbeat(collection, doc["_id"], owner, lease_seconds):
+                    logger.warning(f"Lease on doc_id={doc['_id']} was lost to another worker.")
+                    return
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed for doc_id={doc['_id']}: {e}")
+
+    renewer = threading.Thread(target=renew, name=f"lease-{doc['_id']}", daemon=True)
+    renewer.start()
+    try:
+        yield doc
+    finally:
+        stop.set()
+        renewer.join()
+        try:
+            release(collection, doc["_id"], owner)
+        except Exception as e:
+            logger.error(f"Error releasing lease on doc_id={doc['_id']}: {e}")
+
+
+def claim_each(collection: Collection, query: dict, limit: Optional[int] = None,
+               sort: Optional[Sequence[Tuple[str, int]]] = None, owner: str = WORKER_ID,
+               lease_seconds: float = settings.LEASE_SECONDS, projection: Optional[dict] = None) -> Iterator[dict]:
+    """
+    Claims and yields matching documents one at a time, holding each lease (with heartbeats) while
+    the caller works on it, so memory stays flat however large the backlog is. A document is yielded
+    at most once per call, even if the caller leaves it in a status that still matches query.
+    Wrap in contextlib.closing when the loop may exit early.
+    """
+    claim_query = {"$and": [query, claimed_before(run_cutoff())]}
+    count = 0
+    while limit is None or count < limit:
+        doc = claim_next(collection, claim_query, sort, owner, lease_seconds, projection)
+        if doc is None:
+            return
+        count += 1
+        with leased(collection, doc, owner, lease_seconds):
+            yield doc
@@ -1,6 +1,6 @@
 from typing import List, Optional, Literal, Union
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 class ScriptSlide(BaseModel):
     """Represents a single slide in the video script."""
@@ -10,6 +10,51 @@ class ScriptSlide(BaseModel):
     start_ms: int
     end_ms: int
 
+class ValidationResult(BaseModel):
+    """Gemini's verdict on one headline (Scheduler 2)."""
+    id: Optional[str] = None  # Set in batch validation replies
+    valid: Literal["YES", "NO"]
+    related_to_india: Literal["YES", "NO"]
+    relevancy: Optional[int] = None
+    reason: Optional[str] = None
+
+    @field_validator("valid", "related_to_india", mode="before")
+    @classmethod
+    def normalize_yes_no(cls, value):
+        return str(value).strip().upper() if value is not None else value
+
+    @field_validator("relevancy", mode="before")
+    @classmethod
+    def lenient_relevancy(cls, value):
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def id_as_string(cls, value):
+        return str(value) if value is not None else None
+
+class ScriptResult(BaseModel):
+    """Gemini's script fields for one article (Scheduler 3)."""
+    sentiment: Literal["happy", "sad", "neutral", "angry", "surprised"]
+    video_title: str
+    hashtags: List[str]
+    caption: str
+
+    @field_validator("sentiment", mode="before")
+    @classmethod
+    def normalize_sentiment(cls, value):
+        return str(value).strip().lower() if value is not None else value
+
+    @field_validator("hashtags", mode="before")
+    @classmethod
+    def split_hashtag_string(cls, value):
+        if isinstance(value, str):
+            return [tag for tag in value.replace(",", " ").split() if tag]
+        return value
+
 class UnifiedNewsDoc(BaseModel):
     """
     Pydantic model for the unified MongoDB document schema used in the autonomous video generation pipeline.
@@ -19,13 +64,19 @@ class UnifiedNewsDoc(BaseModel):
     _id: Optional[str] = None
     headline: str
     article: str
+    condensed_article: Optional[str] = None  # Article trimmed to the script prompt token budget (Scheduler 3)
+    condensed_token_budget: Optional[int] = None  # Budget condensed_article was built for
     domain: str  # Domain is not fixed; can be changed/extended
     source: str
     news_link: Optional[str] = None
+    normalized_link: Optional[str] = None  # Canonical news_link used for deduplication
     created_at: datetime
     mod_at: Optional[datetime] = None
     # Pipeline Meta
     status: str  # Use enums below for allowed values
+    cluster_id: Optional[str] = None  # Near-duplicate story cluster; only one doc per cluster is processed
+    simhash: Optional[str] = None  # 64-bit SimHash of headline + article, hex encoded
+    simhash_bands: Optional[List[str]] = None  # Band keys of simhash, indexed for candidate lookup
     relevancy: Optional[int] = None
     sentiment: Optional[Literal["positive", "neutral", "negative"]] = None
     video_title: Optional[str] = None
@@ -36,12 +87,18 @@ class UnifiedNewsDoc(BaseModel):
     voiceover_url: Optional[str] = None
     video_url: Optional[str] = None
     video_local_path: Optional[str] = None
+    render_profile: Optional[Literal["preview", "final"]] = None  # Profile the next render uses (default RENDER_DEFAULT_PROFILE)
+    rendered_profile: Optional[Literal["preview", "final"]] = None  # Profile of the current video; only final renders are published
+    approved_at: Optional[datetime] = None  # When the preview was approved for a final render
     youtube_id: Optional[str] = None
     instagram_id: Optional[str] = None
     # Error Handling
     error_type: Optional[str] = None
     error_message: Optional[str] = None
     error_at: Optional[datetime] = None
+    attempts: Optional[int] = None  # Consecutive failed attempts at the current stage
+    next_attempt_at: Optional[datetime] = None  # Error docs are not retried before this
+    dead_letter_from: Optional[str] = None  # Error status the doc had when it was moved to DEAD_LETTER
 
     class Config:
         schema_extra = {
@@ -84,6 +141,7 @@ STATUS_SUCCESS = [
     "FETCHED",
     "VALID_ARTICLE",
     "INVALID_ARTICLE",
+    "DUPLICATE_ARTICLE",
     "SCRIPT_GENERATED",
     "IMAGES_CREATED",
     "VIDEO_GENERATED",
@@ -95,5 +153,6 @@ STATUS_ERROR = [
     "ERROR_SCRIPT",
     "ERROR_IMAGES",
     "ERROR_VIDEO",
-    "ERROR_POST"
+    "ERROR_POST",
+    "DEAD_LETTER"
 ] 
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Near-duplicate story clustering at ingest.
+Each new article gets a SimHash fingerprint over its headline and article text. Candidates are
+looked up by exact band match (a multikey index on 'simhash_bands' in MongoDB plus in-process
+buckets for docs of the current run), so each lookup touches only the matching buckets.
+An article close to an existing one joins its cluster and is stored as DUPLICATE_ARTICLE,
+so only the cluster representative goes through validation and script generation.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo.collection import Collection
+from app.config import settings
+from app.database.indexes import ensure_collection_indexes
+from app.database.models import UnifiedNewsDoc
+from app.utils.logger import logger
+from app.utils.simhash import MAX_BAND_DISTANCE, band_keys, hamming_distance, simhash
+
+DUPLICATE_STATUS = "DUPLICATE_ARTICLE"
+CANDIDATE_LIMIT = 50
+
+
+def fingerprint_text(doc: UnifiedNewsDoc) -> str:
+    return f"{doc.headline}\n{(doc.article or '')[:settings.NEAR_DUP_ARTICLE_CHARS]}"
+
+
+class NearDuplicateIndex:
+    """
+    Assigns cluster ids to incoming docs. Docs assigned during this index's lifetime are kept
+    in memory, so duplicates within one ingest batch are caught before they reach MongoDB.
+    """
+    def __init__(self, collection: Optional[Collection], max_distance: int = settings.NEAR_DUP_MAX_DISTANCE):
+        self._collection = collection
+        self._max_distance = min(max_distance, MAX_BAND_DISTANCE)
+        self._buckets: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+
+    def _db_candidates(self, keys: List[str]) -> List[Tuple[int, str]]:
+        if self._collection is None:
+            return []
+        since = datetime.utcnow() - timedelta(hours=settings.NEAR_DUP_WINDOW_HOURS)
+        try:
+            cursor = self._collection.find(
+                {"simhash_bands": {"$in": keys}, "created_at": {"$gte": since}},
+                {"simhash": 1, "cluster_id": 1}
+            ).limit(CANDIDATE_LIMIT)
+            return [(int(doc["simhash"], 16), doc.get("cluster_id") or str(doc["_id"])) for doc in cursor]
+        except Exception as e:
+            logger.error(f"Error looking up near-duplicate candidates: {e}")
+            return []
+
+    def find_cluster(self, fingerprint: int) -> Optional[str]:
+        """Returns the cluster id of the closest known story within max_distance, if any."""
+        keys = band_keys(fingerprint)
+        candidates = [c for key in keys for c in self._buckets.get(key, [])] + self._db_candidates(keys)
+        best: Optional[Tuple[int, str]] = None
+        for candidate, cluster_id in candidates:
+            distance = hamming_distance(fingerprint, candidate)
+            if distance <= self._max_distance and (best is None or distance < best[0]):
+                best = (distance, cluster_id)
+        return best[1] if best else None
+
+    def assign(self, doc: UnifiedNewsDoc) -> bool:
+        """
+        Sets simhash, simhash_bands and cluster_id on doc and records it in the index.
+        Marks the doc DUPLICATE_ARTICLE and returns True if it joined an existing cluster.
+        """
+        fingerprint = simhash(fingerprint_text(doc))
+        cluster_id = self.find_cluster(fingerprint)
+        is_duplicate = cluster_id is not None
+        doc.simhash = f"{fingerprint:016x}"
+        doc.simhash_bands = band_keys(fingerprint)
+        doc.cluster_id = cluster_id or uuid.uuid4().hex
+        if is_duplicate:
+            doc.status = DUPLICATE_STATUS
+            logger.info(f"Near-duplicate story '{doc.headline}' joined cluster {doc.cluster_id}.")
+        for key in doc.simhash_bands:
+            self._buckets[key].append((fingerprint, doc.cluster_id))
+        return is_duplicate
+
+
+def new_near_duplicate_index(collection: Optional[Collection]) -> NearDuplicateIndex:
+    """Returns a NearDuplicateIndex for one ingest run, making sure the band index exists."""
+    if collection is not None:
+        try:
+            ensure_collection_indexes(collection)
+        except Exception as e:
+            logger.error(f"Error creating news indexes: {e}")
+    return NearDuplicateIndex(collection)
@@ -0,0 +1,78 @@
+"""
+Retry scheduling for pipeline stages.
+A failed stage records the error, increments 'attempts' and sets 'next_attempt_at' with exponential
+backoff; stage queries only pick up documents whose next attempt is due. After RETRY_MAX_ATTEMPTS
+failures, or straight away for permanent errors, the document moves to DEAD_LETTER and keeps the
+error status it came from in 'dead_letter_from' so it can be requeued by hand.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo.collection import Collection
+from app.config import settings
+from app.database.indexes import ensure_collection_indexes
+from app.database.leases import update_leased
+from app.utils.logger import logger
+
+DEAD_LETTER = "DEAD_LETTER"
+# Merged into a stage's success update so the next stage starts with a clean retry budget
+RETRY_RESET = {"attempts": 0, "next_attempt_at": None}
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Backoff before retrying after the given number of failed attempts (1-based)."""
+    return min(settings.RETRY_BACKOFF_MAX_SECONDS, settings.RETRY_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def due_query(statuses: List[str], collection: Optional[Collection] = None) -> dict:
+    """
+    Query for documents in statuses whose next attempt is due (or that never failed).
+    Pass the collection to make sure the supporting indexes exist.
+    """
+    if collection is not None:
+        try:
+            ensure_collection_indexes(collection)
+        except Exception as e:
+            logger.error(f"Error creating stage query indexes: {e}")
+    return {
+        "status": {"$in": statuses},
+        "$or": [{"next_attempt_at": None}, {"next_attempt_at": {"$lte": datetime.utcnow()}}],
+    }
+
+
+def mark_failed(collection: Collection, doc: dict, status: str, message: str, error_type: Optional[str] = None,
+                permanent: bool = False) -> Optional[str]:
+    """
+    Records a failed attempt on doc (which the caller holds a lease on) and schedules the retry, or
+    moves the doc to DEAD_LETTER once its attempts are used up. Returns the status that was set, or
+    None if the lease was lost and another worker owns the doc now.
+    """
+    now = datetime.utcnow()
+    attempts = (doc.get("attempts") or 0) + 1
+    update = {
+        "status": status,
+        "error_message": message,
+        "error_type": error_type,
+        "error_at": now,
+        "mod_at": now,
+        "attempts": attempts,
+        "next_attempt_at": now + timedelta(seconds=retry_delay_seconds(attempts)),
+    }
+    if permanent or attempts >= settings.RETRY_MAX_ATTEMPTS:
+        update.update({"status": DEAD_LETTER, "dead_letter_from": status, "next_attempt_at": None})
+    if not update_leased(collection, doc["_id"], {"$set": update}):
+        return None
+    if update["status"] == DEAD_LETTER:
+        logger.warning(f"doc_id={doc['_id']} moved to {DEAD_LETTER} after {attempts} attempt(s) at {status}: {message}")
+    return update["status"]
+
+
+def requeue(collection: Collection, doc_id) -> bool:
+    """Moves a DEAD_LETTER doc back to the error status it came from with a fresh retry budget."""
+    doc = collection.find_one({"_id": doc_id, "status": DEAD_LETTER}, {"dead_letter_from": 1})
+    if not doc or not doc.get("dead_letter_from"):
+        return False
+    collection.update_one({"_id": doc_id, "status": DEAD_LETTER}, {
+        "$set": {"status": doc["dead_letter_from"], "mod_at": datetime.utcnow(), **RETRY_RESET},
+        "$unset": {"dead_letter_from": ""},
+    })
+    return True
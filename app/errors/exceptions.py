@@ -1 +1,32 @@
-# Custom error classes and error handling helpers 
\ No newline at end of file
+# Custom error classes and error handling helpers
+
+
+class LLMResponseError(ValueError):
+    """Raised when an LLM reply cannot be turned into the expected JSON."""
+    pass
+
+
+class LLMResponseSchemaError(LLMResponseError):
+    """Raised when an LLM reply is valid JSON but does not match the expected model."""
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit breaker is open."""
+    def __init__(self, service: str, retry_in: float = 0.0):
+        super().__init__(f"Circuit for '{service}' is open; retry in {retry_in:.0f}s.")
+        self.service = service
+        self.retry_in = retry_in
+
+
+class MissingBackgroundAssetError(FileNotFoundError):
+    """Raised when no background video or music exists for an article's domain / sentiment."""
+    pass
+
+
+class VideoRenderError(RuntimeError):
+    """Raised when an ffmpeg render exits with an error; carries the end of its stderr."""
+    def __init__(self, returncode: int, stderr: str = ""):
+        super().__init__(f"ffmpeg exited with status {returncode}: {stderr.strip()[-500:]}")
+        self.returncode = returncode
+        self.stderr = stderr
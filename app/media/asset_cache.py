@@ -0,0 +1,155 @@
+"""
+Pre-normalized background clips.
+Background clips come in whatever resolution, frame rate and codec they were made with, so every
+render used to scale and convert them in its filter graph. Each clip is now transcoded once per
+render profile resolution into the render format (yuv420p, fixed frame rate, no audio) and stored in
+BACKGROUND_CACHE_DIR under the SHA-256 of the source file. A changed clip hashes to a new entry;
+entries whose source is gone or changed are pruned by prepare_all().
+
+Prepare every clip ahead of time with: python -m app.media.asset_cache
+"""
+import hashlib
+import os
+import subprocess
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.errors.exceptions import VideoRenderError
+from app.media.render_profiles import RENDER_PROFILES
+from app.utils.logger import logger
+
+MEDIA_DIR = os.path.dirname(__file__)
+BACKGROUND_VIDEO_DIR = os.path.join(MEDIA_DIR, 'background_video')
+CANONICAL_RESOLUTION = "1080x1920"
+CACHE_FORMAT_VERSION = 1  # Bump when the canonical encoding changes so old entries are rebuilt
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_key_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_failed: set = set()  # Cache paths whose transcode failed; the key changes with the source, so an edited clip is tried again
+
+
+def source_hash(path: str) -> str:
+    """SHA-256 of the file, memoized on (path, size, mtime) so unchanged clips are hashed once per process."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def cache_path(path: str, resolution: str = CANONICAL_RESOLUTION) -> str:
+    name = f"{source_hash(path)}_{resolution}_{settings.BACKGROUND_CACHE_FPS}fps_v{CACHE_FORMAT_VERSION}.mp4"
+    return os.path.join(settings.BACKGROUND_CACHE_DIR, name)
+
+
+def transcode_command(source: str, output: str, resolution: str = CANONICAL_RESOLUTION) -> List[str]:
+    """ffmpeg command for the canonical form; the scale matches what renders did in their filter graph."""
+    width, height = map(int, resolution.split('x'))
+    return [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", source,
+        "-vf", f"scale={width}:{height},setsar=1,fps={settings.BACKGROUND_CACHE_FPS},format=yuv420p",
+        "-an",
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", str(settings.BACKGROUND_CACHE_CRF),
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        "-f", "mp4",
+        output,
+    ]
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def prepare_background(path: str, resolution: str = CANONICAL_RESOLUTION) -> str:
+    """
+    Returns the cached canonical copy of the clip at path, transcoding it first if needed.
+    Concurrent callers in this process wait for a single transcode; other processes may transcode
+    the same clip too, but the entry is only ever replaced atomically.
+    Raises VideoRenderError if ffmpeg fails.
+    """
+    target = cache_path(path, resolution)
+    with _key_lock(target):
+        if os.path.exists(target):
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = f"{target}.{uuid.uuid4().hex[:8]}.part"
+        logger.info(f"Transcoding background clip {path} into the asset cache")
+        result = subprocess.run(transcode_command(os.path.abspath(path), partial, resolution),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise VideoRenderError(result.returncode, result.stderr)
+        os.replace(partial, target)
+        _failed.discard(target)
+    return target
+
+
+def cached_background(path: str, resolution: str = CANONICAL_RESOLUTION) -> Optional[str]:
+    """
+    The canonical copy of the clip for a render, or None if it cannot be prepared (the render then
+    falls back to normalizing the source clip itself). A clip that failed to transcode is not tried
+    again by this process until it changes; prepare_all() still retries it.
+    """
+    if not settings.BACKGROUND_CACHE_ENABLED:
+        return None
+    target = None
+    try:
+        target = cache_path(path, resolution)
+        if target in _failed:
+            return None
+        return prepare_background(path, resolution)
+    except Exception as e:
+        logger.error(f"Could not prepare background clip {path}; rendering from source: {e}")
+        if target is not None:
+            _failed.add(target)
+        return None
+
+
+def background_clips(root: str = BACKGROUND_VIDEO_DIR) -> List[str]:
+    """Every clip under root/<domain>/<sentiment>/."""
+    clips = []
+    for dirpath, _, filenames in os.walk(root):
+        clips.extend(os.path.join(dirpath, name) for name in sorted(filenames) if name.endswith('.mp4'))
+    return sorted(clips)
+
+
+def prepare_all(root: str = BACKGROUND_VIDEO_DIR, resolutions: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Prepares every clip under root in each resolution (default: those of the render profiles) and
+    removes cache entries that no clip maps to any more.
+    Returns source path -> cached paths for the clips that were prepared.
+    """
+    if resolutions is None:
+        resolutions = sorted({profile.resolution for profile in RENDER_PROFILES.values()})
+    prepared: Dict[str, List[str]] = {}
+    for clip in background_clips(root):
+        for resolution in resolutions:
+            try:
+                prepared.setdefault(clip, []).append(prepare_background(clip, resolution))
+            except Exception as e:
+                logger.error(f"Could not prepare background clip {clip} at {resolution}: {e}")
+    directory = settings.BACKGROUND_CACHE_DIR
+    if any(prepared.values()) and os.path.isdir(directory):
+        keep = {os.path.basename(path) for paths in prepared.values() for path in paths}
+        for name in os.listdir(directory):
+            if name.endswith('.mp4') and name not in keep:
+                os.remove(os.path.join(directory, name))
+                logger.info(f"Removed stale background cache entry {name}")
+    return prepared
+
+
+if __name__ == "__main__":
+    for source, cached in prepare_all().items():
+        print(f"{os.path.relpath(source, BACKGROUND_VIDEO_DIR)} -> {', '.join(cached)}")
@@ -0,0 +1,74 @@
+"""
+Caption overlay compositor.
+The caption and the dimming layer never change during a reel, so they are drawn once into an RGBA
+PNG the size of the video and ffmpeg blends it with a single overlay filter, instead of running
+libass (subtitles=) and a full-frame drawbox on every frame. Lines are wrapped on the measured
+width of the words in the configured font.
+"""
+from functools import lru_cache
+from typing import List
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+# libass scales subtitle sizes to a 288 px high script when none is given; sizes are converted from
+# that scale so captions keep the size they had with the subtitles filter
+ASS_PLAY_RES_Y = 288
+LINE_SPACING = 0.25  # Extra space between lines, as a fraction of the font size
+MARGIN = 0.08  # Horizontal margin on each side, as a fraction of the width
+
+
+@lru_cache(maxsize=16)
+def load_font(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, size)
+
+
+def font_pixel_size(font_size: int, height: int) -> int:
+    """Pixel size of a subtitles-filter FontSize on a video of the given height."""
+    return max(1, round(font_size * height / ASS_PLAY_RES_Y))
+
+
+def wrap_caption(caption: str, font: ImageFont.FreeTypeFont, max_width: float) -> List[str]:
+    """
+    Greedy word wrap on rendered text width. Words wider than max_width on their own are split
+    between characters.
+    """
+    lines: List[str] = []
+    for paragraph in caption.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if font.getlength(candidate) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ""
+            for char in word:
+                if line and font.getlength(line + char) > max_width:
+                    lines.append(line)
+                    line = ""
+                line += char
+        lines.append(line)
+    return lines
+
+
+def render_caption_overlay(caption: str, font_path: str, output_path: str, resolution: str = "1080x1920",
+                           overlay_opacity: float = 0.7, font_size: int = 12, font_color: str = "white") -> List[str]:
+    """
+    Writes the full-frame dimming layer with the caption centred on it to output_path (RGBA PNG).
+    font_size uses the subtitles-filter scale (see ASS_PLAY_RES_Y). Returns the wrapped lines.
+    """
+    width, height = map(int, resolution.split('x'))
+    size = font_pixel_size(font_size, height)
+    font = load_font(font_path, size)
+    lines = wrap_caption(caption, font, width * (1 - 2 * MARGIN))
+    image = Image.new("RGBA", (width, height), (0, 0, 0, round(255 * overlay_opacity)))
+    draw = ImageDraw.Draw(image)
+    # Outline like the subtitles filter's default style, so text stays readable on bright frames
+    stroke = max(1, size // 16)
+    draw.multiline_text(
+        (width / 2, height / 2), "\n".join(lines), font=font, anchor="mm", align="center",
+        spacing=round(size * LINE_SPACING), fill=ImageColor.getrgb(font_color),
+        stroke_width=stroke, stroke_fill=(0, 0, 0),
+    )
+    image.save(output_path, format="PNG")
+    return lines
@@ -2,6 +2,16 @@ import subprocess
 import os
 import shlex
 import textwrap
+from typing import Optional
+from app.config import settings
+from app.errors.exceptions import VideoRenderError
+from app.media.asset_cache import cached_background
+from app.media.caption_overlay import render_caption_overlay
+from app.media.render_pool import render_plan, render_workspace
+from app.media.render_profiles import FINAL, RENDER_PROFILES, RenderProfile
+
+CAPTION_SRT = "caption.srt"
+CAPTION_PNG = "caption.png"
 
 def generate_srt_file(caption: str, output_srt_path: str, words_per_line: int = 8):
     """
@@ -30,67 +40,92 @@ def generate_video_with_overlay_and_caption(
     font_path: str,
     caption: str,
     output_path: str,
-    resolution: str = "1080x1920",
+    profile: Optional[RenderProfile] = None,
     overlay_opacity: float = 0.7,
     font_size: int = 12,
     font_color: str = "white",
-    words_per_line: int = 8
+    words_per_line: int = 8,
+    threads: Optional[int] = None,
+    caption_renderer: Optional[str] = None
 ):
     """
     Generate a video with a full-screen black overlay and multi-line caption using ffmpeg.
+    ffmpeg runs in its own temporary workspace, so several renders can run at the same time.
+    The background clip is read from the asset cache, already scaled and in yuv420p, when available.
     Args:
         background_video_path: Path to the background video.
         background_music_path: Path to the background music.
         font_path: Path to the .ttf font file.
         caption: Text to overlay on the video.
         output_path: Path to save the output video.
-        resolution: Output resolution (default 1080x1920).
+        profile: Resolution, encoder settings and maximum length (default: the "final" profile).
         overlay_opacity: Opacity of the black overlay (0-1).
         font_size: Size of the caption font.
         font_color: Color of the caption text.
-        words_per_line: Number of words per line for wrapping.
+        words_per_line: Number of words per line for wrapping (subtitles renderer only).
+        threads: x264 threads for this render (default: the render pool's share of the cores).
+        caption_renderer: "overlay" draws the dimming layer and caption once into a PNG that is
+            overlaid on every frame; "subtitles" uses drawbox and libass per frame.
+            Defaults to CAPTION_RENDERER.
+    Raises:
+        VideoRenderError: If ffmpeg exits with an error.
     """
+    profile = profile or RENDER_PROFILES[FINAL]
+    resolution = profile.resolution
     width, height = map(int, resolution.split('x'))
-    temp_srt_path = "caption.srt"
-    
-    # --- FIX: Generate an SRT file for robust text handling ---
-    generate_srt_file(caption, temp_srt_path, words_per_line=words_per_line)
+    if threads is None:
+        threads = render_plan().threads
+    caption_renderer = caption_renderer or settings.CAPTION_RENDERER
+    prepared_video_path = cached_background(background_video_path, resolution)
+    # A cached clip is already in the output size and pixel format
+    normalize = None if prepared_video_path else f"scale={width}:{height},format=yuv420p"
+
+    if caption_renderer == "subtitles":
+        # Full screen overlay
+        drawbox = f"drawbox=x=0:y=0:w={width}:h={height}:color=black@{overlay_opacity}:t=fill"
+
+        # Use subtitles filter with system font fallback for better compatibility.
+        # The SRT path is relative to the workspace ffmpeg runs in, so it needs no filter escaping.
+        subtitles = (
+            f"subtitles={CAPTION_SRT}:force_style='FontName=Arial,"
+            f"FontSize={font_size},PrimaryColour=&HFFFFFF,Alignment=10'"
+        )
+        filter_complex = "[0:v]" + ",".join(f for f in (normalize, drawbox, subtitles) if f) + "[v]"
+        caption_inputs = []
+    else:
+        # The PNG is a single frame; overlay repeats it until the background ends
+        background = f"[0:v]{normalize}[bg];[bg]" if normalize else "[0:v]"
+        filter_complex = f"{background}[2:v]overlay=0:0:format=yuv420,format=yuv420p[v]"
+        caption_inputs = ["-i", CAPTION_PNG]
 
-    # Full screen overlay
-    drawbox = f"drawbox=x=0:y=0:w={width}:h={height}:color=black@{overlay_opacity}:t=fill"
-    
-    # Use subtitles filter with system font fallback for better compatibility
-    subtitles = (
-        f"subtitles={temp_srt_path}:force_style='FontName=Arial,"
-        f"FontSize={font_size},PrimaryColour=&HFFFFFF,Alignment=10'"
-    )
-    
-    filter_complex = f"[0:v]scale={width}:{height},format=yuv420p,{drawbox},{subtitles}[v]"
-    
     ffmpeg_cmd = [
-        "ffmpeg", "-y",
-        "-i", background_video_path,
-        "-i", background_music_path,
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", os.path.abspath(prepared_video_path or background_video_path),
+        "-i", os.path.abspath(background_music_path),
+        *caption_inputs,
         "-filter_complex", filter_complex,
         "-map", "[v]",
         "-map", "1:a",
         "-shortest",
-        "-c:v", "libx264",
+        "-t", str(profile.max_duration_seconds),
+        *profile.video_encoder_args(threads),
         "-c:a", "aac",
-        "-b:a", "192k",
+        "-b:a", profile.audio_bitrate,
         "-pix_fmt", "yuv420p",
-        output_path
+        os.path.abspath(output_path)
     ]
-    
-    try:
-        subprocess.run(ffmpeg_cmd, check=True)
-        print(f"Video successfully generated at: {output_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"An error occurred with FFmpeg: {e}")
-    finally:
-        # Clean up the temporary SRT file
-        if os.path.exists(temp_srt_path):
-            os.remove(temp_srt_path)
+
+    with render_workspace() as work_dir:
+        if caption_renderer == "subtitles":
+            # --- FIX: Generate an SRT file for robust text handling ---
+            generate_srt_file(caption, os.path.join(work_dir, CAPTION_SRT), words_per_line=words_per_line)
+        else:
+            render_caption_overlay(caption, font_path, os.path.join(work_dir, CAPTION_PNG), resolution,
+                                   overlay_opacity=overlay_opacity, font_size=font_size, font_color=font_color)
+        result = subprocess.run(ffmpeg_cmd, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise VideoRenderError(result.returncode, result.stderr)
+    print(f"Video successfully generated at: {output_path}")
 
 # --- Example Usage ---
 if __name__ == '__main__':
@@ -0,0 +1,104 @@
+"""
+Parallel video rendering.
+Renders run as ffmpeg subprocesses, so a small thread pool is enough to keep several going at
+once. The number of parallel renders and the x264 threads each one gets are derived from the
+available cores, so running renders side by side never oversubscribes the machine. Every render
+works in its own temporary directory (subtitle files and other intermediates), so concurrent
+renders never touch each other's files.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+from app.config import settings
+from app.media.render_profiles import RenderProfile, get_render_profile
+from app.utils.logger import logger
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    workers: int  # Renders running at the same time
+    threads: int  # x264 threads per render
+
+
+def available_cores() -> int:
+    """Cores this process may run on (honours CPU affinity, e.g. in containers)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def render_plan(cores: Optional[int] = None, pool_size: Optional[int] = None,
+                profile: Optional[RenderProfile] = None) -> RenderPlan:
+    """
+    Splits cores between parallel renders. pool_size defaults to RENDER_POOL_SIZE (0 = auto: one
+    render per profile.threads cores, else per RENDER_TARGET_THREADS). The pool is sized for profile
+    (default: RENDER_DEFAULT_PROFILE, the tier most renders use), so workers x threads fills the cores.
+    """
+    cores = max(1, cores or available_cores())
+    profile = profile or get_render_profile()
+    workers = pool_size if pool_size is not None else settings.RENDER_POOL_SIZE
+    if workers <= 0:
+        workers = max(1, cores // max(1, profile.threads or settings.RENDER_TARGET_THREADS))
+    return RenderPlan(workers=workers, threads=max(1, cores // workers))
+
+
+@contextmanager
+def render_workspace() -> Iterator[str]:
+    """A fresh temporary directory for one render, removed afterwards."""
+    with tempfile.TemporaryDirectory(prefix="render_", dir=settings.RENDER_TMP_DIR) as path:
+        yield path
+
+
+def run_render_jobs(next_job: Callable[[], Optional[bool]], limit: Optional[int] = None,
+                    workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Calls next_job from workers threads (default: the render plan) until it returns None or limit
+    jobs have run. next_job claims and renders one item and returns whether the render succeeded,
+    or None when there is nothing left. Exceptions count as failures and stop the worker that
+    raised them. Returns the number of jobs that succeeded and failed.
+    """
+    workers = workers or render_plan().workers
+    lock = threading.Lock()
+    started = 0
+    counts = {"succeeded": 0, "failed": 0}
+
+    def take_slot() -> bool:
+        nonlocal started
+        with lock:
+            if limit is not None and started >= limit:
+                return False
+            started += 1
+            return True
+
+    def give_back() -> None:
+        nonlocal started
+        with lock:
+            started -= 1
+
+    def count(outcome: str) -> None:
+        with lock:
+            counts[outcome] += 1
+
+    def work() -> None:
+        while take_slot():
+            try:
+                succeeded = next_job()
+            except Exception:
+                count("failed")
+                raise
+            if succeeded is None:
+                give_back()
+                return
+            count("succeeded" if succeeded else "failed")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as pool:
+        futures = [pool.submit(work) for _ in range(workers)]
+    for future in futures:
+        if future.exception() is not None:
+            logger.error(f"Render worker stopped: {future.exception()}")
+    return counts
@@ -0,0 +1,43 @@
+"""
+Named render profiles.
+Every article is rendered with the profile named in its 'render_profile' field (default
+RENDER_DEFAULT_PROFILE). New reels get a cheap low-resolution "preview" for approval in the
+dashboard; approving one requeues it for a "final" render, which is the only kind Scheduler 6
+publishes. Final-quality encodes are therefore only paid for approved reels.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+from app.config import settings
+
+PREVIEW = "preview"
+FINAL = "final"
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    resolution: str
+    preset: str  # x264 speed/size trade-off
+    crf: int  # x264 constant quality; lower is better and larger
+    max_duration_seconds: float  # Reels are cut here, whatever the length of the music
+    threads: Optional[int] = None  # Cores per render when this tier sizes the render pool; None = RENDER_TARGET_THREADS
+    audio_bitrate: str = "192k"
+
+    def video_encoder_args(self, threads: int) -> List[str]:
+        return ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf), "-threads", str(threads)]
+
+
+RENDER_PROFILES = {
+    PREVIEW: RenderProfile(PREVIEW, "540x960", preset="veryfast", crf=30,
+                           max_duration_seconds=settings.VIDEO_MAX_DURATION_SECONDS, threads=2, audio_bitrate="96k"),
+    FINAL: RenderProfile(FINAL, "1080x1920", preset="medium", crf=20,
+                         max_duration_seconds=settings.VIDEO_MAX_DURATION_SECONDS),
+}
+
+
+def get_render_profile(name: Optional[str] = None) -> RenderProfile:
+    """The profile called name (default RENDER_DEFAULT_PROFILE). Raises ValueError for unknown names."""
+    name = name or settings.RENDER_DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}'. Expected one of {sorted(RENDER_PROFILES)}.")
+    return RENDER_PROFILES[name]
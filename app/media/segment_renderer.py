@@ -0,0 +1,208 @@
+"""
+Slide-timed segment rendering.
+A reel with a script is rendered one slide at a time: each slide's time range of the background
+clip is encoded with that slide's caption overlay as its own segment, segments are encoded in
+parallel with identical encoder settings, joined with the concat demuxer without re-encoding, and
+the music is muxed in once at the end.
+
+Segments are cached in SEGMENT_CACHE_DIR under a hash of everything that affects their pixels
+(background clip, time range, caption text and style, encoder settings), so re-rendering a reel
+after editing one slide only encodes that slide again. Segments not used for
+SEGMENT_CACHE_MAX_AGE_DAYS are removed.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Sequence
+from app.config import settings
+from app.database.models import ScriptSlide
+from app.errors.exceptions import VideoRenderError
+from app.media.asset_cache import cached_background, source_hash
+from app.media.caption_overlay import render_caption_overlay
+from app.media.ffmpeg_utils import CAPTION_PNG
+from app.media.render_pool import render_plan, render_workspace
+from app.media.render_profiles import FINAL, RENDER_PROFILES, RenderProfile
+from app.utils.logger import logger
+
+CONCAT_LIST = "segments.txt"
+# Every segment of a reel must be encoded identically for the concat demuxer to join them with -c copy;
+# these are added to the render profile's encoder settings
+SEGMENT_ENCODER_ARGS = ["-profile:v", "high", "-pix_fmt", "yuv420p", "-video_track_timescale", "90000"]
+SEGMENT_FORMAT_VERSION = 1  # Bump when SEGMENT_ENCODER_ARGS or the overlay drawing change
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    start_frame: int
+    frames: int
+
+
+def plan_segments(slides: Sequence[ScriptSlide], fps: int, max_duration_seconds: Optional[float] = None) -> List[Segment]:
+    """
+    Turns slides into back-to-back segments on frame boundaries. Each slide runs until the next one
+    starts (the first from 0), so the reel has no gaps and rounding never accumulates drift.
+    Slides are cut at max_duration_seconds; slides that end up with no frames are dropped.
+    """
+    max_frame = round(max_duration_seconds * fps) if max_duration_seconds else None
+    ordered = sorted(slides, key=lambda slide: slide.start_ms)
+    segments = []
+    for index, slide in enumerate(ordered):
+        start_ms = 0 if index == 0 else slide.start_ms
+        end_ms = ordered[index + 1].start_ms if index + 1 < len(ordered) else slide.end_ms
+        start_frame, end_frame = round(start_ms * fps / 1000), round(end_ms * fps / 1000)
+        if max_frame is not None:
+            end_frame = min(end_frame, max_frame)
+        if end_frame > start_frame:
+            segments.append(Segment(slide.text, start_frame, end_frame - start_frame))
+    return segments
+
+
+def segment_key(segment: Segment, background_path: str, font_path: str, profile: RenderProfile,
+                overlay_opacity: float, font_size: int, font_color: str, fps: int) -> str:
+    parts = {
+        "background": source_hash(background_path), "font": source_hash(font_path), "text": segment.text,
+        "start_frame": segment.start_frame, "frames": segment.frames, "fps": fps,
+        "resolution": profile.resolution, "preset": profile.preset, "crf": profile.crf,
+        "overlay_opacity": overlay_opacity, "font_size": font_size, "font_color": font_color,
+        "encoder": SEGMENT_ENCODER_ARGS, "version": SEGMENT_FORMAT_VERSION,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def prune_segment_cache(max_age_days: float) -> int:
+    """Removes cached segments not used for max_age_days. Returns how many were removed."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for entry in os.scandir(settings.SEGMENT_CACHE_DIR):
+        if entry.name.endswith(".mp4") and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+@lru_cache(maxsize=64)
+def _clip_duration(path: str, content_hash: str) -> float:
+    result = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise VideoRenderError(result.returncode, result.stderr)
+    return float(result.stdout.strip())
+
+
+def clip_duration(path: str) -> float:
+    """Duration of a clip in seconds, probed once per clip content."""
+    return _clip_duration(os.path.abspath(path), source_hash(path))
+
+
+def _run_ffmpeg(cmd: List[str], cwd: Optional[str] = None) -> None:
+    result = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise VideoRenderError(result.returncode, result.stderr)
+
+
+def render_segment(segment: Segment, background_path: str, font_path: str, output_path: str,
+                   profile: RenderProfile, overlay_opacity: float, font_size: int, font_color: str, fps: int,
+                   threads: int) -> None:
+    """Encodes one slide's frames of the (looped) background with its caption overlay, without audio."""
+    resolution = profile.resolution
+    width, height = map(int, resolution.split('x'))
+    prepared_path = cached_background(background_path, resolution)
+    normalize = "" if prepared_path else f"scale={width}:{height},format=yuv420p,"
+    input_path = os.path.abspath(prepared_path or background_path)
+    # Short clips loop; seek within the first loop to the point the slide starts at
+    offset = (segment.start_frame / fps) % clip_duration(input_path)
+    with render_workspace() as work_dir:
+        render_caption_overlay(segment.text, font_path, os.path.join(work_dir, CAPTION_PNG), resolution,
+                               overlay_opacity=overlay_opacity, font_size=font_size, font_color=font_color)
+        partial = f"{output_path}.{uuid.uuid4().hex[:8]}.part"
+        _run_ffmpeg([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-stream_loop", "-1", "-ss", f"{offset:.6f}",
+            "-i", input_path,
+            "-i", CAPTION_PNG,
+            "-filter_complex", f"[0:v]{normalize}fps={fps}[bg];[bg][1:v]overlay=0:0:format=yuv420,format=yuv420p[v]",
+            "-map", "[v]", "-an",
+            "-frames:v", str(segment.frames), "-r", str(fps),
+            *profile.video_encoder_args(threads),
+            *SEGMENT_ENCODER_ARGS,
+            "-f", "mp4", partial,
+        ], cwd=work_dir)
+    os.replace(partial, output_path)
+
+
+def render_slides(
+    background_video_path: str,
+    background_music_path: str,
+    font_path: str,
+    slides: Sequence[ScriptSlide],
+    output_path: str,
+    profile: Optional[RenderProfile] = None,
+    overlay_opacity: float = 0.7,
+    font_size: int = 12,
+    font_color: str = "white",
+    threads: Optional[int] = None
+) -> None:
+    """
+    Renders a reel from script slides (see the module docstring) with profile (default: "final").
+    threads is this render's share of the cores (default: the render pool's share);
+    it is split between the segments encoded in parallel.
+    Raises VideoRenderError if ffmpeg fails, ValueError if no slide has any duration.
+    """
+    profile = profile or RENDER_PROFILES[FINAL]
+    fps = settings.BACKGROUND_CACHE_FPS
+    segments = plan_segments(slides, fps, profile.max_duration_seconds)
+    if not segments:
+        raise ValueError("Script has no slide with a duration.")
+    if threads is None:
+        threads = render_plan().threads
+    os.makedirs(settings.SEGMENT_CACHE_DIR, exist_ok=True)
+    style = dict(profile=profile, overlay_opacity=overlay_opacity, font_size=font_size, font_color=font_color)
+    paths = [
+        os.path.join(settings.SEGMENT_CACHE_DIR,
+                     segment_key(segment, background_video_path, font_path, fps=fps, **style) + ".mp4")
+        for segment in segments
+    ]
+    missing = []
+    for segment, path in zip(segments, paths):
+        if os.path.exists(path):
+            os.utime(path)  # Marks the segment as used for pruning
+        else:
+            missing.append((segment, path))
+    workers = max(1, min(len(missing), threads))
+    logger.info(f"Rendering {len(missing)} of {len(segments)} slide segments ({workers} in parallel)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") as pool:
+        futures = [
+            pool.submit(render_segment, segment, background_video_path, font_path, path,
+                        fps=fps, threads=max(1, threads // workers), **style)
+            for segment, path in missing
+        ]
+    for future in futures:
+        future.result()
+
+    with render_workspace() as work_dir:
+        with open(os.path.join(work_dir, CONCAT_LIST), "w", encoding="utf-8") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        _run_ffmpeg([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", CONCAT_LIST,
+            "-i", os.path.abspath(background_music_path),
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy",
+            "-c:a", "aac", "-b:a", profile.audio_bitrate,
+            "-shortest", "-movflags", "+faststart",
+            os.path.abspath(output_path),
+        ], cwd=work_dir)
+    try:
+        prune_segment_cache(settings.SEGMENT_CACHE_MAX_AGE_DAYS)
+    except OSError as e:
+        logger.error(f"Error pruning segment cache: {e}")
+    print(f"Video successfully generated at: {output_path}")
@@ -5,15 +5,25 @@
 # */15 * * * * /usr/bin/python3 /path/to/your/project/app/pipelines/scheduler1_fetch_news.py
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from app.database.bulk_writer import BulkNewsWriter
+from app.database.dedup import SeenUrlIndex, get_seen_url_index
+from app.database.feed_cache import save_feed_state
 from app.database.models import UnifiedNewsDoc
+from app.database.near_duplicates import new_near_duplicate_index
 from app.database.mongo import get_collection
 from app.config import settings
 import requests
-from app.apis.google_news import fetch_google_custom_search
+from app.apis.google_news import fetch_google_custom_search, search_quota
 from app.utils.logger import logger
+from app.utils.helpers import RequestLimiter
+from app.utils.http_transport import transport
 from app.utils.rss_utils import fetch_rss_articles, scrape_article_content
+from app.utils.url_utils import normalize_url
 
 RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources')
 QUERIES_PATH = os.path.join(RESOURCES_DIR, 'news_queries.json')
@@ -49,72 +59,185 @@ def fetch_news_for_domain(domain: str, query: str, max_results: int = 5) -> List
     return news_items
 
 def store_news_in_db(news_items: List[Dict], domain: str):
-    """Store each news item as a UnifiedNewsDoc in MongoDB with status FETCHED."""
+    """Store each news item as a UnifiedNewsDoc in MongoDB with status FETCHED, in unordered batches."""
     collection = get_collection("news")
     if collection is None:
         logger.warning("Could not get MongoDB collection 'news'. Skipping DB insert.")
         return
-    for item in news_items:
-        doc = UnifiedNewsDoc(
-            headline=item.get("title", ""),
-            article=item.get("snippet", ""),
-            domain=domain.capitalize(),
-            source=item.get("displayLink", ""),
-            news_link=item.get("link", ""),
-            created_at=datetime.utcnow(),
-            status="FETCHED"
-        )
-        # Insert as dict, omitting None fields
-        try:
-            collection.insert_one({k: v for k, v in doc.dict().items() if v is not None})
-            logger.info(f"Saved news: '{doc.headline}' for domain '{domain}' to DB.")
-        except Exception as e:
-            if 'duplicate key error' in str(e):
-                logger.warning(f"Duplicate news found: '{doc.headline}' for domain '{domain}'. Skipping.")
-            else:
-                logger.error(f"Error inserting news: '{doc.headline}' for domain '{domain}': {e}")
-
-def fetch_and_store_all_domains():
-    """Fetch and store news for all domains as per queries in resources/news_queries.json."""
-    queries = ensure_resources_and_queries()
-    for domain, query in queries.items():
-        try:
-            news_items = fetch_news_for_domain(domain, query)
-            store_news_in_db(news_items, domain)
-        except Exception as e:
-            # Log error and continue
-            print(f"Error fetching/storing news for {domain}: {e}") 
-
-def fetch_and_store_rss_news():
-    rss_path = os.path.join(RESOURCES_DIR, 'rss_feeds.json')
-    with open(rss_path, 'r') as f:
-        rss_feeds = json.load(f)
-    collection = get_collection("news")
-    for feed in rss_feeds:
-        source = feed["source"]
-        url = feed["url"]
-        tags = feed.get("tags", [])
-        articles = fetch_rss_articles(url)
-        for art in articles:
-            full_article = scrape_article_content(art["link"])
+    url_index = get_seen_url_index()
+    near_duplicates = new_near_duplicate_index(collection)
+    with BulkNewsWriter(collection, on_failure=lambda doc: url_index.discard(doc.news_link or "")) as writer:
+        for item in news_items:
+            if url_index.check_and_add(item.get("link", "")):
+                logger.info(f"Skipping known news link: {item.get('link')}")
+                continue
             doc = UnifiedNewsDoc(
-                headline=art["title"],
-                article=full_article or art["summary"],
-                domain=", ".join(tags),
-                source=source,
-                news_link=art.get("link", ""),
+                headline=item.get("title", ""),
+                article=item.get("snippet", ""),
+                domain=domain.capitalize(),
+                source=item.get("displayLink", ""),
+                news_link=item.get("link", ""),
+                normalized_link=normalize_url(item.get("link", "")) or None,
                 created_at=datetime.utcnow(),
                 status="FETCHED"
             )
-            if collection is not None:
+            near_duplicates.assign(doc)
+            writer.add(doc)
+    logger.info(f"Stored news for domain '{domain}': {writer.stats}")
+
+def fetch_and_store_all_domains(concurrent: Optional[bool] = None):
+    """
+    Fetch and store news for all domains as per queries in resources/news_queries.json.
+    In concurrent mode the domain queries run in parallel (up to SEARCH_MAX_CONCURRENCY);
+    results are still stored in query-file order. Repeated queries are served from the search
+    cache and the daily quota is tracked by fetch_google_custom_search.
+    """
+    if concurrent is None:
+        concurrent = settings.SEARCH_MAX_CONCURRENCY > 1
+    queries = ensure_resources_and_queries()
+    started = time.monotonic()
+    if concurrent:
+        workers = max(1, min(len(queries), settings.SEARCH_MAX_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search") as pool:
+            futures = {domain: pool.submit(fetch_news_for_domain, domain, query) for domain, query in queries.items()}
+            for domain, future in futures.items():
+                try:
+                    store_news_in_db(future.result(), domain)
+                except Exception as e:
+                    logger.error(f"Error fetching/storing news for {domain}: {e}")
+    else:
+        for domain, query in queries.items():
+            try:
+                news_items = fetch_news_for_domain(domain, query)
+                store_news_in_db(news_items, domain)
+            except Exception as e:
+                # Log error and continue
+                print(f"Error fetching/storing news for {domain}: {e}")
+    remaining = search_quota.remaining()
+    logger.info(f"Fetched {len(queries)} domain queries in {time.monotonic() - started:.2f}s "
+                f"(search quota remaining today: {remaining})")
+
+def load_rss_feeds() -> List[Dict]:
+    """Load the RSS feed definitions from resources/rss_feeds.json."""
+    rss_path = os.path.join(RESOURCES_DIR, 'rss_feeds.json')
+    with open(rss_path, 'r') as f:
+        return json.load(f)
+
+def collect_feed_docs(feed: Dict, limiter: Optional[RequestLimiter] = None,
+                      scrape_pool: Optional[ThreadPoolExecutor] = None,
+                      url_index: Optional[SeenUrlIndex] = None) -> Tuple[List[UnifiedNewsDoc], float, Optional[Dict]]:
+    """
+    Fetch one RSS feed and scrape every new entry into a UnifiedNewsDoc.
+    Entries whose normalized link is already in url_index are dropped before scraping.
+    When a limiter and scrape pool are given, article scrapes run in parallel under the limiter.
+    Returns the docs in feed order, the elapsed wall time in seconds and the feed state to record
+    once the docs are stored (see fetch_rss_articles).
+    """
+    started = time.monotonic()
+    source = feed["source"]
+    tags = feed.get("tags", [])
+    with (limiter.slot(feed["url"]) if limiter else nullcontext()):
+        articles, feed_state = fetch_rss_articles(feed["url"])
+    if url_index is not None:
+        fresh = [art for art in articles if not url_index.check_and_add(art["link"])]
+        if len(fresh) < len(articles):
+            logger.info(f"Skipping {len(articles) - len(fresh)} known articles from '{source}'")
+        articles = fresh
+
+    def scrape(link: str) -> str:
+        with (limiter.slot(link) if limiter else nullcontext()):
+            return scrape_article_content(link)
+
+    links = [art["link"] for art in articles]
+    contents = list(scrape_pool.map(scrape, links)) if scrape_pool else [scrape(link) for link in links]
+    docs = []
+    for art, full_article in zip(articles, contents):
+        docs.append(UnifiedNewsDoc(
+            headline=art["title"],
+            article=full_article or art["summary"],
+            domain=", ".join(tags),
+            source=source,
+            news_link=art.get("link", ""),
+            normalized_link=normalize_url(art.get("link", "")) or None,
+            created_at=datetime.utcnow(),
+            status="FETCHED"
+        ))
+    return docs, time.monotonic() - started, feed_state
+
+def fetch_and_store_rss_news(concurrent: Optional[bool] = None) -> Dict[str, float]:
+    """
+    Fetch every feed in resources/rss_feeds.json, scrape the articles and store them as FETCHED.
+    In concurrent mode feeds and article scrapes run on thread pools, capped by
+    RSS_MAX_CONCURRENCY requests overall and RSS_PER_HOST_CONCURRENCY per host.
+    Docs are still stored in feed order, so the result matches the sequential path.
+    Links already known to the URL dedup index are never scraped, near-duplicate stories are
+    clustered (see NearDuplicateIndex) and docs are written in unordered batches (see BulkNewsWriter).
+    A feed's validators and seen GUIDs are recorded only after its docs are written; a feed with a
+    failed insert keeps its old state, so the next poll fetches those articles again.
+    Returns the per-feed fetch time in seconds, keyed by source.
+    """
+    if concurrent is None:
+        concurrent = settings.RSS_CONCURRENT_FETCH
+    rss_feeds = load_rss_feeds()
+    collection = get_collection("news")
+    url_index = get_seen_url_index()
+    near_duplicates = new_near_duplicate_index(collection)
+    failed_links = set()
+
+    def on_failure(doc: UnifiedNewsDoc):
+        url_index.discard(doc.news_link or "")
+        failed_links.add(doc.news_link or "")
+
+    writer = BulkNewsWriter(collection, on_failure=on_failure)
+    pending_states: List[Tuple[Dict, List[UnifiedNewsDoc], Dict]] = []
+
+    def store(feed: Dict, docs: List[UnifiedNewsDoc], feed_state: Optional[Dict]):
+        for doc in docs:
+            near_duplicates.assign(doc)
+            writer.add(doc)
+        if feed_state is not None:
+            pending_states.append((feed, docs, feed_state))
+
+    timings: Dict[str, float] = {}
+    run_started = time.monotonic()
+
+    def collected(feed: Dict, docs: List[UnifiedNewsDoc], elapsed: float, feed_state: Optional[Dict]):
+        timings[feed["source"]] = elapsed
+        logger.info(f"Fetched {len(docs)} RSS articles from '{feed['source']}' in {elapsed:.2f}s")
+        store(feed, docs, feed_state)
+
+    try:
+        if concurrent:
+            limiter = RequestLimiter(settings.RSS_MAX_CONCURRENCY, settings.RSS_PER_HOST_CONCURRENCY)
+            workers = max(1, min(len(rss_feeds), settings.RSS_MAX_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rss-feed") as feed_pool, \
+                    ThreadPoolExecutor(max_workers=settings.RSS_MAX_CONCURRENCY, thread_name_prefix="rss-scrape") as scrape_pool:
+                futures = [feed_pool.submit(collect_feed_docs, feed, limiter, scrape_pool, url_index) for feed in rss_feeds]
+                for feed, future in zip(rss_feeds, futures):
+                    try:
+                        collected(feed, *future.result())
+                    except Exception as e:
+                        logger.error(f"Error fetching RSS feed '{feed['source']}': {e}")
+        else:
+            for feed in rss_feeds:
                 try:
-                    collection.insert_one({k: v for k, v in doc.dict().items() if v is not None})
-                    logger.info(f"Saved RSS news: '{doc.headline}' from '{source}' to DB.")
+                    collected(feed, *collect_feed_docs(feed, url_index=url_index))
                 except Exception as e:
-                    if 'duplicate key error' in str(e):
-                        logger.warning(f"Duplicate RSS news found: '{doc.headline}' from '{source}'. Skipping.")
-                    else:
-                        logger.error(f"Error inserting RSS news: '{doc.headline}' from '{source}': {e}")
+                    logger.error(f"Error fetching RSS feed '{feed['source']}': {e}")
+    finally:
+        # Docs buffered from the feeds that did succeed are written even if the run is cut short
+        writer.flush()
+        if collection is not None:
+            for feed, docs, feed_state in pending_states:
+                if any((doc.news_link or "") in failed_links for doc in docs):
+                    logger.warning(f"Not recording RSS feed state for '{feed['source']}': some articles were not stored")
+                    continue
+                save_feed_state(feed["url"], **feed_state)
+    mode = "concurrent" if concurrent else "sequential"
+    logger.info(f"RSS fetch ({mode}) finished {len(timings)} feeds in {time.monotonic() - run_started:.2f}s, "
+                f"stored: {writer.stats}")
+    transport.log_stats()
+    return timings
 
 
 if __name__ == "__main__":
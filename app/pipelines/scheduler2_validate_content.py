@@ -1,14 +1,28 @@
 import os
-import json
+from contextlib import closing
 from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database.leases import claim_batch, claim_each, claimed_before, release, run_cutoff, update_leased
 from app.database.mongo import get_collection
-from app.ai.gemini_client import gemini_generate_content
+from app.database.retries import RETRY_RESET, due_query, mark_failed
+from app.ai.gemini_client import gemini_generate_content, invalidate_cached_response
+from app.ai.response_parser import (
+    VALIDATION_BATCH_ITEM_SCHEMA, VALIDATION_RESPONSE_SCHEMA, array_schema, json_generation_config, parse_model,
+    parse_model_list
+)
+from app.database.models import ValidationResult
+from app.errors.exceptions import CircuitOpenError, LLMResponseError
 from app.utils.logger import logger
 
 RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources')
 PROMPT_PATH = os.path.join(RESOURCES_DIR, 'gemini_validation_prompt.txt')
+BATCH_FORMAT_PATH = os.path.join(RESOURCES_DIR, 'gemini_validation_batch_format.txt')
 
 NEWS_COLLECTION = 'news'
+VALIDATE_STATUSES = ["FETCHED", "ERROR_VALIDATE"]
+# Fields validation reads; article bodies are never loaded by this stage
+VALIDATE_PROJECTION = {"headline": 1, "status": 1, "attempts": 1}
 
 
 def load_prompt_template() -> str:
@@ -19,25 +33,61 @@ def build_prompt(headline: str) -> str:
     template = load_prompt_template()
     return template.replace('{headline}', headline)
 
+def build_batch_prompt(docs: List[dict]) -> str:
+    """
+    Builds one prompt for several headlines from gemini_validation_prompt.txt: the evaluation
+    criteria are kept, the single headline is replaced by an id-tagged list and the
+    single-object response format by the array format in gemini_validation_batch_format.txt.
+    """
+    criteria = load_prompt_template().split('Respond ONLY')[0]
+    headlines = "\n".join(f"[{doc['_id']}] {doc['headline']}" for doc in docs)
+    with open(BATCH_FORMAT_PATH, 'r') as f:
+        batch_format = f.read()
+    return criteria.replace('Headline: {headline}', f"Headlines:\n{headlines}") + batch_format
+
+def validation_generation_config(batch: bool = False) -> Optional[dict]:
+    """JSON-mode generationConfig for single or batch validation, or None if structured output is disabled."""
+    if not settings.GEMINI_STRUCTURED_OUTPUT:
+        return None
+    schema = array_schema(VALIDATION_BATCH_ITEM_SCHEMA) if batch else VALIDATION_RESPONSE_SCHEMA
+    return json_generation_config(schema)
+
 def validate_article_with_gemini(headline: str) -> dict:
     prompt = build_prompt(headline)
-    result = gemini_generate_content(prompt)
-    if not result or 'candidates' not in result or not result['candidates']:
+    config = validation_generation_config()
+    result = gemini_generate_content(prompt, generation_config=config)
+    if not result:
         return {"error": "No response from Gemini API."}
     try:
-        text = result['candidates'][0]['content']['parts'][0]['text']
-        # Remove triple backticks and whitespace if present
-        text = text.strip()
-        if text.startswith('```json'):
-            text = text[len('```json'):].strip()
-        if text.startswith('```'):
-            text = text[len('```'):].strip()
-        if text.endswith('```'):
-            text = text[:-len('```')].strip()
-        return json.loads(text)
-    except Exception as e:
-        logger.error(f"Raw Gemini response text: {text}")
-        return {"error": f"Failed to parse Gemini response: {e}", "raw_text": text, "raw_result": result}
+        return parse_model(result, ValidationResult).dict()
+    except LLMResponseError as e:
+        logger.error(f"Raw Gemini response: {result}")
+        invalidate_cached_response(prompt, config)
+        return {"error": f"Failed to parse Gemini response: {e}", "raw_result": result}
+
+def validate_articles_batch(docs: List[dict]) -> Dict[str, dict]:
+    """
+    Validates several headlines with one Gemini call and returns the results keyed by str(doc _id).
+    Headlines missing from the reply, or the whole batch if the reply is malformed,
+    fall back to one validate_article_with_gemini call each.
+    """
+    results: Dict[str, dict] = {}
+    prompt = build_batch_prompt(docs)
+    config = validation_generation_config(batch=True)
+    result = gemini_generate_content(prompt, generation_config=config)
+    try:
+        wanted = {str(doc["_id"]) for doc in docs}
+        for item in parse_model_list(result, ValidationResult):
+            if item.id in wanted:
+                results[item.id] = item.dict()
+    except LLMResponseError as e:
+        invalidate_cached_response(prompt, config)
+        logger.error(f"Malformed batch validation response for {len(docs)} headlines, falling back to single calls: {e}")
+    missing = [doc for doc in docs if str(doc["_id"]) not in results]
+    for doc in missing:
+        results[str(doc["_id"])] = validate_article_with_gemini(doc["headline"])
+    logger.info(f"Batch validated {len(docs)} headlines with {len(missing)} single-call fallbacks.")
+    return results
 
 def update_article_status(doc_id, status, message, error_type=None):
     collection = get_collection(NEWS_COLLECTION)
@@ -53,53 +103,89 @@ def update_article_status(doc_id, status, message, error_type=None):
             "mod_at": datetime.utcnow()
         }
     }
-    collection.update_one({"_id": doc_id}, update)
+    update_leased(collection, doc_id, update)
+
+def apply_validation_result(collection, doc: dict, result: dict):
+    """Updates one article's status from its Gemini validation result."""
+    doc_id = doc["_id"]
+    headline = doc["headline"]
+    if "error" in result:
+        mark_failed(collection, doc, "ERROR_VALIDATE", result["error"], error_type="GEMINI_VALIDATION_ERROR")
+        logger.error(f"Validation failed for '{headline}': {result['error']}")
+        return
+    if result.get("valid", "NO") != "YES":
+        update_article_status(doc_id, "INVALID_ARTICLE", result.get("reason") or "Not valid.")
+        logger.info(f"Article '{headline}' marked as INVALID_ARTICLE.")
+        return
+    if result.get("related_to_india", "NO") != "YES":
+        update_article_status(doc_id, "INVALID_ARTICLE", "Not related to India.")
+        logger.info(f"Article '{headline}' not related to India.")
+        return
+    # If valid and related to India; relevancy was already coerced to int or None by ValidationResult
+    relevancy = result.get("relevancy")
+    update = {
+        "$set": {
+            "status": "VALID_ARTICLE",
+            "error_message": "Validated successfully.",
+            "error_type": None,
+            "error_at": None,
+            "relevancy": relevancy,
+            "mod_at": datetime.utcnow(),
+            **RETRY_RESET
+        }
+    }
+    if update_leased(collection, doc_id, update):
+        logger.info(f"Article '{headline}' marked as VALID_ARTICLE with relevancy={relevancy}.")
+
+def validate_document(collection, doc: dict) -> None:
+    """Validates one FETCHED / ERROR_VALIDATE article with a single Gemini call. Raises CircuitOpenError."""
+    logger.info(f"Validating article: {doc['headline']}")
+    apply_validation_result(collection, doc, validate_article_with_gemini(doc["headline"]))
 
-def process_fetched_articles():
+def validate_documents(collection, docs: List[dict]) -> None:
+    """Validates several claimed articles with one batch Gemini call. Raises CircuitOpenError."""
+    logger.info(f"Validating batch of {len(docs)} articles")
+    results = validate_articles_batch(docs)
+    for doc in docs:
+        apply_validation_result(collection, doc, results[str(doc["_id"])])
+
+def process_fetched_articles(batch_size: Optional[int] = None):
+    """
+    Validates all FETCHED / ERROR_VALIDATE articles that are due. With batch_size > 1 (default VALIDATION_BATCH_SIZE),
+    headlines are validated batch_size at a time in a single Gemini call each.
+    If the Gemini circuit opens, the run stops and the remaining articles keep their status for the next run.
+    """
+    if batch_size is None:
+        batch_size = settings.VALIDATION_BATCH_SIZE
     collection = get_collection(NEWS_COLLECTION)
     if collection is None:
         logger.error("Could not get MongoDB collection 'news'. Skipping processing.")
         return
-    fetched = list(collection.find({"status": {"$in": ["FETCHED", "ERROR_VALIDATE"]}}))
-    logger.info(f"Found {len(fetched)} articles with status FETCHED or ERROR_VALIDATE ")
-    for doc in fetched:
-        doc_id = doc["_id"]
-        headline = doc["headline"]
-        logger.info(f"Validating article: {headline}")
-        result = validate_article_with_gemini(headline)
-        if "error" in result:
-            update_article_status(doc_id, "ERROR_VALIDATE", result["error"], error_type="GEMINI_VALIDATION_ERROR")
-            logger.error(f"Validation failed for '{headline}': {result['error']}")
-            continue
-        if result.get("valid", "NO") != "YES":
-            update_article_status(doc_id, "INVALID_ARTICLE", result.get("reason", "Not valid."))
-            logger.info(f"Article '{headline}' marked as INVALID_ARTICLE.")
-            continue
-        if result.get("related_to_india", "NO") != "YES":
-            update_article_status(doc_id, "INVALID_ARTICLE", "Not related to India.")
-            logger.info(f"Article '{headline}' not related to India.")
-            continue
-        # If valid and related to India
-        relevancy = result.get("relevancy")
-        if relevancy is not None:
-            try:
-                relevancy = int(relevancy)
-            except (TypeError, ValueError):
-                relevancy = None
+    # Articles are leased before validation so several workers can run this stage side by side;
+    # ERROR_VALIDATE articles are only picked up once their retry backoff has passed
+    validate_query = due_query(VALIDATE_STATUSES, collection)
+    handled = 0
+    try:
+        if batch_size > 1:
+            query = {"$and": [validate_query, claimed_before(run_cutoff())]}
+            while True:
+                batch = claim_batch(collection, query, batch_size, projection=VALIDATE_PROJECTION)
+                if not batch:
+                    break
+                handled += len(batch)
+                try:
+                    validate_documents(collection, batch)
+                finally:
+                    for doc in batch:
+                        release(collection, doc["_id"])
         else:
-            relevancy = None
-        update = {
-            "$set": {
-                "status": "VALID_ARTICLE",
-                "error_message": "Validated successfully.",
-                "error_type": None,
-                "error_at": None,
-                "relevancy": relevancy,
-                "mod_at": datetime.utcnow()
-            }
-        }
-        collection.update_one({"_id": doc_id}, update)
-        logger.info(f"Article '{headline}' marked as VALID_ARTICLE with relevancy={relevancy}.")
+            with closing(claim_each(collection, validate_query, projection=VALIDATE_PROJECTION)) as docs:
+                for doc in docs:
+                    handled += 1
+                    validate_document(collection, doc)
+    except CircuitOpenError as e:
+        logger.warning(f"Stopping validation run early: {e}")
+    logger.info(f"Processed {handled} articles with status FETCHED or ERROR_VALIDATE")
 
 if __name__ == "__main__":
     process_fetched_articles() 
\ No newline at end of file
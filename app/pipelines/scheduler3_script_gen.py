@@ -1,14 +1,26 @@
 import os
-import json
+from contextlib import closing
 from datetime import datetime
+from typing import Optional
+from app.database.leases import claim_each, update_leased
 from app.database.mongo import get_collection
-from app.ai.gemini_client import gemini_generate_content
+from app.database.retries import RETRY_RESET, due_query, mark_failed
+from app.database.models import ScriptResult
+from app.ai.gemini_client import gemini_generate_content, invalidate_cached_response
+from app.ai.response_parser import SCRIPT_RESPONSE_SCHEMA, json_generation_config, parse_model
+from app.errors.exceptions import CircuitOpenError, LLMResponseError, LLMResponseSchemaError
+from app.config import settings
+from app.utils.text_condense import condense_article, estimate_tokens
 from app.utils.logger import logger
 
 RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources')
 PROMPT_PATH = os.path.join(RESOURCES_DIR, 'gemini_script_prompt.txt')
 
 NEWS_COLLECTION = 'news'
+# Fields script generation reads
+SCRIPT_PROJECTION = {
+    "headline": 1, "article": 1, "condensed_article": 1, "condensed_token_budget": 1, "status": 1, "attempts": 1
+}
 
 
 def load_prompt_template() -> str:
@@ -19,88 +31,96 @@ def build_prompt(headline: str, article: str) -> str:
     template = load_prompt_template()
     return template.replace('{headline}', headline).replace('{article}', article)
 
+def script_generation_config() -> Optional[dict]:
+    """JSON mode with the script schema when GEMINI_STRUCTURED_OUTPUT is on, otherwise Gemini's defaults."""
+    if settings.GEMINI_STRUCTURED_OUTPUT:
+        return json_generation_config(SCRIPT_RESPONSE_SCHEMA)
+    return None
+
 def parse_gemini_script_response(result: dict) -> dict:
-    # Expects Gemini to return a JSON object as text in result['candidates'][0]['content']['parts'][0]['text']
-    if not result or 'candidates' not in result or not result['candidates']:
-        return {"error": "No response from Gemini API."}
-    try:
-        text = result['candidates'][0]['content']['parts'][0]['text']
-        text = text.strip()
-        if text.startswith('```json'):
-            text = text[len('```json'):].strip()
-        if text.startswith('```'):
-            text = text[len('```'):].strip()
-        if text.endswith('```'):
-            text = text[:-len('```')].strip()
-        return json.loads(text)
-    except Exception as e:
-        logger.error(f"Raw Gemini response text: {text}")
-        return {"error": f"Failed to parse Gemini response: {e}", "raw_text": text, "raw_result": result}
+    """
+    Parses a Gemini script reply into a ScriptResult dict.
+    Raises LLMResponseSchemaError if fields are missing or invalid, LLMResponseError if no JSON is found.
+    """
+    return parse_model(result, ScriptResult).dict()
 
-def update_article_status(doc_id, status, message, error_type=None):
-    collection = get_collection(NEWS_COLLECTION)
-    if collection is None:
-        logger.error("Could not get MongoDB collection 'news'. Skipping update.")
+def get_condensed_article(collection, doc: dict) -> str:
+    """
+    Returns the article trimmed so the script prompt fits SCRIPT_PROMPT_TOKEN_BUDGET.
+    The result is stored on the document, so retries reuse it instead of recomputing.
+    """
+    headline = doc.get("headline", "")
+    article_budget = max(0, settings.SCRIPT_PROMPT_TOKEN_BUDGET - estimate_tokens(build_prompt(headline, "")))
+    if doc.get("condensed_article") and doc.get("condensed_token_budget") == article_budget:
+        return doc["condensed_article"]
+    article = doc.get("article", "")
+    condensed = condense_article(article, article_budget, headline=headline)
+    if condensed != article:
+        logger.info(f"Condensed article '{headline}' from ~{estimate_tokens(article)} to ~{estimate_tokens(condensed)} tokens.")
+    collection.update_one({"_id": doc["_id"]}, {"$set": {
+        "condensed_article": condensed,
+        "condensed_token_budget": article_budget
+    }})
+    return condensed
+
+def generate_script_for_document(collection, doc: dict) -> None:
+    """
+    Generates the script fields for one VALID_ARTICLE / ERROR_SCRIPT article and updates its status.
+    Raises CircuitOpenError, leaving the article untouched, if the Gemini circuit is open.
+    """
+    doc_id = doc["_id"]
+    headline = doc.get("headline", "")
+    article = get_condensed_article(collection, doc)
+    logger.info(f"Generating script for article: {headline}")
+    prompt = build_prompt(headline, article)
+    generation_config = script_generation_config()
+    result = gemini_generate_content(prompt, generation_config=generation_config)
+    if result is None:
+        mark_failed(collection, doc, "ERROR_SCRIPT", "No response from Gemini API.", error_type="GEMINI_SCRIPT_ERROR")
+        logger.error(f"Script generation failed for '{headline}': No response from Gemini API.")
+        return
+    try:
+        parsed = parse_gemini_script_response(result)
+    except LLMResponseError as e:
+        invalidate_cached_response(prompt, generation_config)
+        error_type = "GEMINI_SCRIPT_MISSING_FIELDS" if isinstance(e, LLMResponseSchemaError) else "GEMINI_SCRIPT_ERROR"
+        mark_failed(collection, doc, "ERROR_SCRIPT", str(e), error_type=error_type)
+        logger.error(f"Script generation failed for '{headline}': {e}")
         return
+    # Update document with script data
     update = {
         "$set": {
-            "status": status,
-            "error_message": message,
-            "error_type": error_type,
-            "error_at": datetime.utcnow(),
-            "mod_at": datetime.utcnow()
+            "sentiment": parsed["sentiment"],
+            "video_title": parsed["video_title"],
+            "hashtags": parsed["hashtags"],
+            "caption": parsed["caption"],
+            "status": "SCRIPT_GENERATED",
+            "error_message": None,
+            "error_type": None,
+            "error_at": None,
+            "mod_at": datetime.utcnow(),
+            **RETRY_RESET
         }
     }
-    collection.update_one({"_id": doc_id}, update)
+    if update_leased(collection, doc_id, update):
+        logger.info(f"Script generated and updated for article '{headline}'.")
 
 def process_valid_articles():
     collection = get_collection(NEWS_COLLECTION)
     if collection is None:
         logger.error("Could not get MongoDB collection 'news'. Skipping processing.")
         return
-    # Get top 10 articles sorted by relevancy desc, then created_at desc
-    valid_articles = list(collection.find({"status": {"$in": ["VALID_ARTICLE", "ERROR_SCRIPT"]}}).sort([
-        ("relevancy", -1), ("created_at", -1)
-    ]).limit(10))
-    logger.info(f"Found {len(valid_articles)} articles with status VALID_ARTICLE or ERROR_SCRIPT ")
-    for doc in valid_articles:
-        doc_id = doc["_id"]
-        headline = doc.get("headline", "")
-        article = doc.get("article", "")
-        logger.info(f"Generating script for article: {headline}")
-        prompt = build_prompt(headline, article)
-        result = gemini_generate_content(prompt)
-        if result is None:
-            update_article_status(doc_id, "ERROR_SCRIPT", "No response from Gemini API.", error_type="GEMINI_SCRIPT_ERROR")
-            logger.error(f"Script generation failed for '{headline}': No response from Gemini API.")
-            continue
-        parsed = parse_gemini_script_response(result)
-        if "error" in parsed:
-            update_article_status(doc_id, "ERROR_SCRIPT", parsed["error"], error_type="GEMINI_SCRIPT_ERROR")
-            logger.error(f"Script generation failed for '{headline}': {parsed['error']}")
-            continue
-        # Validate required fields
-        required_fields = ["sentiment", "video_title", "hashtags", "caption"]
-        if not all(field in parsed for field in required_fields):
-            update_article_status(doc_id, "ERROR_SCRIPT", f"Missing fields in Gemini response: {parsed}", error_type="GEMINI_SCRIPT_MISSING_FIELDS")
-            logger.error(f"Missing fields in Gemini response for '{headline}': {parsed}")
-            continue
-        # Update document with script data
-        update = {
-            "$set": {
-                "sentiment": parsed["sentiment"],
-                "video_title": parsed["video_title"],
-                "hashtags": parsed["hashtags"],
-                "caption": parsed["caption"],
-                "status": "SCRIPT_GENERATED",
-                "error_message": None,
-                "error_type": None,
-                "error_at": None,
-                "mod_at": datetime.utcnow()
-            }
-        }
-        collection.update_one({"_id": doc_id}, update)
-        logger.info(f"Script generated and updated for article '{headline}'.")
+    # Lease the top 10 articles one at a time, sorted by relevancy desc, then created_at desc
+    query = due_query(["VALID_ARTICLE", "ERROR_SCRIPT"], collection)
+    with closing(claim_each(collection, query, limit=10, sort=[("relevancy", -1), ("created_at", -1)],
+                            projection=SCRIPT_PROJECTION)) as docs:
+        for doc in docs:
+            try:
+                generate_script_for_document(collection, doc)
+            except CircuitOpenError as e:
+                # Leave this and the remaining articles as they are; the next run picks them up
+                logger.warning(f"Stopping script generation run early: {e}")
+                return
 
 if __name__ == "__main__":
     process_valid_articles() 
\ No newline at end of file
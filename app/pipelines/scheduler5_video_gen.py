@@ -1,12 +1,26 @@
 import os
 from datetime import datetime
+from typing import Optional
+from app.config import settings
+from app.database.leases import claim_next, claimed_before, leased, run_cutoff, update_leased
+from app.database.models import ScriptSlide
 from app.database.mongo import get_collection
+from app.database.retries import RETRY_RESET, due_query, mark_failed
+from app.errors.exceptions import MissingBackgroundAssetError
 from app.media.ffmpeg_utils import generate_video_with_overlay_and_caption
+from app.media.render_pool import render_plan, run_render_jobs
+from app.media.render_profiles import FINAL, PREVIEW, get_render_profile
+from app.media.segment_renderer import render_slides
 from app.utils.logger import logger
 from app.apis.gcs_client import GCSClient
 
 NEWS_COLLECTION = 'news'
-VIDEO_RESOLUTION = "1080x1920"
+# Fields video generation reads
+VIDEO_PROJECTION = {
+    "domain": 1, "sentiment": 1, "caption": 1, "script": 1, "video_title": 1, "render_profile": 1, "status": 1, "attempts": 1
+}
+VIDEO_STATUSES = ["SCRIPT_GENERATED", "ERROR_VIDEO"]
+VIDEO_SORT = [("relevancy", -1)]
 FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'media', 'fonts', 'Montserrat-SemiBold.ttf')
 BACKGROUND_VIDEO_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'media', 'background_video')
 BACKGROUND_MUSIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'media', 'background_music')
@@ -22,75 +36,125 @@ def get_background_video(domain: str, sentiment: str) -> str:
     logger.warning(f"Background video not found for {domain}/{sentiment}, using fallback.")
     # Fallback: pick any video in the domain/sentiment folder
     folder = os.path.join(BACKGROUND_VIDEO_DIR, domain, sentiment)
-    for f in os.listdir(folder):
-        if f.endswith('.mp4'):
-            return os.path.join(folder, f)
-    raise FileNotFoundError(f"No background video found for {domain}/{sentiment}")
+    if os.path.isdir(folder):
+        for f in os.listdir(folder):
+            if f.endswith('.mp4'):
+                return os.path.join(folder, f)
+    raise MissingBackgroundAssetError(f"No background video found for {domain}/{sentiment}")
 
 def get_background_music(sentiment: str) -> str:
     sentiment = sentiment.lower()
     music_path = os.path.join(BACKGROUND_MUSIC_DIR, f"{sentiment}.mp3")
     if os.path.exists(music_path):
         return music_path
-    raise FileNotFoundError(f"No background music found for sentiment {sentiment}")
+    raise MissingBackgroundAssetError(f"No background music found for sentiment {sentiment}")
 
 def safe_filename(name: str) -> str:
     return "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in name).strip().replace(' ', '_')
 
-def process_script_generated_articles():
-    collection = get_collection(NEWS_COLLECTION)
-    if collection is None:
-        logger.error("Could not get MongoDB collection 'news'. Skipping processing.")
-        return
-    articles = list(collection.find({"status": {"$in": ["SCRIPT_GENERATED", "ERROR_VIDEO"]}}).sort([("relevancy", -1)]).limit(2))
-    logger.info(f"Found {len(articles)} articles with status SCRIPT_GENERATED or ERROR_VIDEO ")
-    for doc in articles:
-        doc_id = doc["_id"]
-        domain = doc.get("domain", "entertainment")
-        sentiment = doc.get("sentiment", "neutral")
-        caption = doc.get("caption", "")
-        video_title = doc.get("video_title", f"video_{doc_id}")
-        try:
-            video_path = get_background_video(domain, sentiment)
-            music_path = get_background_music(sentiment)
-            today = datetime.now().strftime('%Y-%m-%d')
-            output_dir = os.path.join(OUTPUTS_DIR, today)
-            os.makedirs(output_dir, exist_ok=True)
-            output_filename = safe_filename(video_title) + ".mp4"
-            output_path = os.path.join(output_dir, output_filename)
+def generate_video_for_document(collection, doc: dict) -> bool:
+    """
+    Renders and uploads the video for one SCRIPT_GENERATED / ERROR_VIDEO article and updates its status.
+    Returns True if the article reached VIDEO_GENERATED.
+    Articles with script slides are rendered slide by slide, others with the caption over the whole reel.
+    The render profile is the article's 'render_profile' (default RENDER_DEFAULT_PROFILE).
+    """
+    doc_id = doc["_id"]
+    domain = doc.get("domain", "entertainment")
+    sentiment = doc.get("sentiment", "neutral")
+    caption = doc.get("caption", "")
+    video_title = doc.get("video_title", f"video_{doc_id}")
+    try:
+        profile = get_render_profile(doc.get("render_profile"))
+        video_path = get_background_video(domain, sentiment)
+        music_path = get_background_music(sentiment)
+        today = datetime.now().strftime('%Y-%m-%d')
+        output_dir = os.path.join(OUTPUTS_DIR, today)
+        os.makedirs(output_dir, exist_ok=True)
+        # Previews get their own name so an approved final render never reuses a preview's URL
+        suffix = "" if profile.name == FINAL else f"_{profile.name}"
+        output_filename = safe_filename(video_title) + suffix + ".mp4"
+        output_path = os.path.join(output_dir, output_filename)
+        slides = [ScriptSlide(**slide) for slide in doc.get("script") or []]
+        if slides:
+            render_slides(video_path, music_path, FONT_PATH, slides, output_path, profile=profile)
+        else:
             generate_video_with_overlay_and_caption(
                 background_video_path=video_path,
                 background_music_path=music_path,
                 font_path=FONT_PATH,
                 caption=caption,
                 output_path=output_path,
-                resolution=VIDEO_RESOLUTION
+                profile=profile
             )
-            # Upload to GCS
-            gcs_client = GCSClient()
-            relative_local_path = os.path.relpath(output_path, start=os.path.dirname(os.path.dirname(__file__)))
-            gcs_blob_name = f"videos/{today}/{output_filename}"
-            public_url = gcs_client.upload_file(output_path, gcs_blob_name)
-            # Update DB
-            collection.update_one({"_id": doc_id}, {"$set": {
-                "video_url": public_url,
-                "video_local_path": relative_local_path,
-                "status": "VIDEO_GENERATED",
-                "error_message": None,
-                "error_type": None,
-                "error_at": None,
-                "mod_at": datetime.utcnow()
-            }})
-            logger.info(f"Video generated and uploaded for article '{video_title}' at {public_url}")
-        except Exception as e:
-            logger.error(f"Video generation failed for '{video_title}': {e}")
-            collection.update_one({"_id": doc_id}, {"$set": {
-                "status": "ERROR_VIDEO",
-                "error_message": str(e),
-                "error_type": "VIDEO_GENERATION_ERROR",
-                "error_at": datetime.utcnow(),
-                "mod_at": datetime.utcnow()
-            }})
+        # Upload to GCS
+        gcs_client = GCSClient()
+        relative_local_path = os.path.relpath(output_path, start=os.path.dirname(os.path.dirname(__file__)))
+        gcs_blob_name = f"videos/{today}/{output_filename}"
+        public_url = gcs_client.upload_file(output_path, gcs_blob_name)
+        # Update DB
+        written = update_leased(collection, doc_id, {"$set": {
+            "video_url": public_url,
+            "video_local_path": relative_local_path,
+            "rendered_profile": profile.name,
+            "status": "VIDEO_GENERATED",
+            "error_message": None,
+            "error_type": None,
+            "error_at": None,
+            "mod_at": datetime.utcnow(),
+            **RETRY_RESET
+        }})
+        if written:
+            logger.info(f"{profile.name} video generated and uploaded for article '{video_title}' at {public_url}")
+        return written
+    except Exception as e:
+        logger.error(f"Video generation failed for '{video_title}': {e}")
+        # A missing background video or music track will not appear on retry; other missing files
+        # (e.g. the ffmpeg binary or the GCS key) are environment problems worth retrying
+        mark_failed(collection, doc, "ERROR_VIDEO", str(e), error_type="VIDEO_GENERATION_ERROR",
+                    permanent=isinstance(e, MissingBackgroundAssetError))
+        return False
+
+def request_final_render(collection, doc_id) -> bool:
+    """
+    Approves a preview: the article goes back to SCRIPT_GENERATED with the final profile, so the
+    video stage renders it again at full quality. Returns False if doc_id has no preview to approve.
+    """
+    now = datetime.utcnow()
+    result = collection.update_one(
+        {"_id": doc_id, "status": "VIDEO_GENERATED", "rendered_profile": PREVIEW},
+        {"$set": {"render_profile": FINAL, "status": "SCRIPT_GENERATED", "approved_at": now, "mod_at": now, **RETRY_RESET}}
+    )
+    return result.matched_count == 1
+
+def render_next_document(collection, query: dict) -> Optional[bool]:
+    """
+    Claims the most relevant due article and renders its video. Returns whether it reached
+    VIDEO_GENERATED, or None if no article is left.
+    """
+    doc = claim_next(collection, query, sort=VIDEO_SORT, projection=VIDEO_PROJECTION)
+    if doc is None:
+        return None
+    # Leases are renewed by heartbeats while a video renders, so long renders are not reclaimed
+    with leased(collection, doc):
+        return generate_video_for_document(collection, doc)
+
+def process_script_generated_articles(limit: Optional[int] = None):
+    """
+    Renders up to limit (default VIDEO_RENDER_LIMIT) due videos, several at a time on the render pool.
+    Each article is rendered at most once per run, even if it fails and stays due.
+    """
+    collection = get_collection(NEWS_COLLECTION)
+    if collection is None:
+        logger.error("Could not get MongoDB collection 'news'. Skipping processing.")
+        return
+    if limit is None:
+        limit = settings.VIDEO_RENDER_LIMIT
+    query = {"$and": [due_query(VIDEO_STATUSES, collection), claimed_before(run_cutoff())]}
+    plan = render_plan()
+    counts = run_render_jobs(lambda: render_next_document(collection, query), limit=limit, workers=plan.workers)
+    logger.info(f"Rendered {counts['succeeded']} videos ({counts['failed']} failed) with {plan.workers} parallel "
+                f"renders of {plan.threads} threads each")
 
 if __name__ == "__main__":
     process_script_generated_articles() 
@@ -1,10 +1,17 @@
 import os
+from contextlib import closing
 from datetime import datetime
+from app.database.leases import claim_each, update_leased
 from app.database.mongo import get_collection
+from app.media.render_profiles import PREVIEW
 from app.utils.logger import logger
 from app.apis.instagram import post_reel_to_instagram, InstagramAPIError
 
 NEWS_COLLECTION = 'news'
+# Fields publishing reads
+PUBLISH_PROJECTION = {"video_url": 1, "caption": 1, "rendered_profile": 1, "status": 1}
+# Previews wait for approval in the dashboard; videos rendered before profiles existed are full quality
+PUBLISHABLE_QUERY = {"status": "VIDEO_GENERATED", "rendered_profile": {"$ne": PREVIEW}}
 
 def update_article_status(doc_id, status, message, error_type=None):
     collection = get_collection(NEWS_COLLECTION)
@@ -20,39 +27,46 @@ def update_article_status(doc_id, status, message, error_type=None):
             "mod_at": datetime.utcnow()
         }
     }
-    collection.update_one({"_id": doc_id}, update)
+    update_leased(collection, doc_id, update)
+
+def publish_document(collection, doc: dict) -> None:
+    """Posts one VIDEO_GENERATED article to Instagram and updates its status. Preview renders are skipped."""
+    doc_id = doc["_id"]
+    if doc.get("rendered_profile") == PREVIEW:
+        logger.info(f"doc_id={doc_id} only has a preview render; waiting for approval before publishing.")
+        return
+    video_url = doc.get("video_url")
+    caption = doc.get("caption", "")
+    try:
+        if not video_url:
+            raise ValueError("No video_url found in document.")
+        logger.info(f"Uploading video for doc_id={doc_id} to Instagram...")
+        instagram_id = post_reel_to_instagram(video_url, caption)
+        update_leased(collection, doc_id, {"$set": {
+            "instagram_id": instagram_id,
+            "status": "POSTED",
+            "error_message": None,
+            "error_type": None,
+            "error_at": None,
+            "mod_at": datetime.utcnow()
+        }})
+        logger.info(f"Successfully posted to Instagram for doc_id={doc_id}, instagram_id={instagram_id}")
+    except InstagramAPIError as e:
+        logger.error(f"Instagram API error for doc_id={doc_id}: {e}")
+        update_article_status(doc_id, "ERROR_POST", str(e), error_type="INSTAGRAM_API_ERROR")
+    except Exception as e:
+        logger.error(f"Unexpected error for doc_id={doc_id}: {e}")
+        update_article_status(doc_id, "ERROR_POST", str(e), error_type="UNEXPECTED_ERROR")
 
 def process_video_generated_articles():
     collection = get_collection(NEWS_COLLECTION)
     if collection is None:
         logger.error("Could not get MongoDB collection 'news'. Skipping processing.")
         return
-    articles = list(collection.find({"status": "VIDEO_GENERATED"}).sort([("relevancy", -1)]).limit(1))
-    logger.info(f"Found {len(articles)} articles with status VIDEO_GENERATED ")
-    for doc in articles:
-        doc_id = doc["_id"]
-        video_url = doc.get("video_url")
-        caption = doc.get("caption", "")
-        try:
-            if not video_url:
-                raise ValueError("No video_url found in document.")
-            logger.info(f"Uploading video for doc_id={doc_id} to Instagram...")
-            instagram_id = post_reel_to_instagram(video_url, caption)
-            collection.update_one({"_id": doc_id}, {"$set": {
-                "instagram_id": instagram_id,
-                "status": "POSTED",
-                "error_message": None,
-                "error_type": None,
-                "error_at": None,
-                "mod_at": datetime.utcnow()
-            }})
-            logger.info(f"Successfully posted to Instagram for doc_id={doc_id}, instagram_id={instagram_id}")
-        except InstagramAPIError as e:
-            logger.error(f"Instagram API error for doc_id={doc_id}: {e}")
-            update_article_status(doc_id, "ERROR_POST", str(e), error_type="INSTAGRAM_API_ERROR")
-        except Exception as e:
-            logger.error(f"Unexpected error for doc_id={doc_id}: {e}")
-            update_article_status(doc_id, "ERROR_POST", str(e), error_type="UNEXPECTED_ERROR")
+    with closing(claim_each(collection, PUBLISHABLE_QUERY, limit=1, sort=[("relevancy", -1)],
+                            projection=PUBLISH_PROJECTION)) as docs:
+        for doc in docs:
+            publish_document(collection, doc)
 
 if __name__ == "__main__":
     process_video_generated_articles() 
\ No newline at end of file
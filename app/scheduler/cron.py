@@ -1,5 +1,6 @@
 import time
 import schedule
+from app.database.indexes import ensure_indexes
 from app.pipelines.scheduler1_fetch_news import fetch_and_store_all_domains, fetch_and_store_rss_news
 from app.pipelines.scheduler3_script_gen import process_valid_articles
 from app.pipelines.scheduler5_video_gen import process_script_generated_articles
@@ -29,6 +30,7 @@ def run_script_and_video_generation():
 
 def run_scheduler():
     print("Starting cron scheduler for news fetch (every 15 minutes) and script generation (every 20 minutes)...")
+    ensure_indexes()
     while True:
         schedule.run_pending()
         time.sleep(1)
@@ -0,0 +1,210 @@
+"""
+Event-driven stage runner.
+Watches the 'news' collection with a change stream and hands each document to the next stage as
+soon as its status changes, instead of waiting for the next cron run. The resume token of every
+handled event is stored in 'event_runner_state', so a restarted runner continues where it stopped
+(events are handled at least once). A document skipped because a service's circuit is open gets
+no new event, so the runner waits for the circuit and sweeps waiting documents again before it
+moves on. On a standalone MongoDB, where change streams are not supported, the runner falls back
+to polling for the same statuses.
+
+Run with: python -m app.scheduler.event_runner
+"""
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo.errors import OperationFailure, PyMongoError
+from app.config import settings
+from app.database.indexes import ensure_indexes
+from app.database.leases import claim_document, leased
+from app.database.mongo import get_collection
+from app.errors.exceptions import CircuitOpenError
+from app.pipelines.scheduler2_validate_content import VALIDATE_PROJECTION, validate_document
+from app.pipelines.scheduler3_script_gen import SCRIPT_PROJECTION, generate_script_for_document
+from app.pipelines.scheduler5_video_gen import VIDEO_PROJECTION, generate_video_for_document
+from app.pipelines.scheduler6_publish import PUBLISH_PROJECTION, publish_document
+from app.utils.logger import logger
+
+NEWS_COLLECTION = 'news'
+RUNNER_STATE_COLLECTION = 'event_runner_state'
+CHANGE_STREAMS_UNSUPPORTED = 40573  # "The $changeStream stage is only supported on replica sets"
+
+Handler = Callable[[Any, dict], None]
+
+# Stage name -> (statuses that trigger it, per-document handler, fields the handler reads)
+STAGES: Dict[str, Tuple[List[str], Handler, dict]] = {
+    "validate": (["FETCHED"], validate_document, VALIDATE_PROJECTION),
+    "script": (["VALID_ARTICLE"], generate_script_for_document, SCRIPT_PROJECTION),
+    "video": (["SCRIPT_GENERATED"], generate_video_for_document, VIDEO_PROJECTION),
+    "publish": (["VIDEO_GENERATED"], publish_document, PUBLISH_PROJECTION),
+}
+
+
+def stage_handlers(stage_names: Optional[List[str]] = None) -> Dict[str, Tuple[Handler, Optional[dict]]]:
+    """Maps each triggering status to its (handler, projection) for the enabled stages."""
+    handlers = {}
+    for name in stage_names if stage_names is not None else settings.EVENT_RUNNER_STAGES:
+        if name not in STAGES:
+            logger.warning(f"Unknown event runner stage '{name}'; ignoring.")
+            continue
+        statuses, handler, projection = STAGES[name]
+        for status in statuses:
+            handlers[status] = (handler, projection)
+    return handlers
+
+
+def change_stream_pipeline(statuses: List[str]) -> List[dict]:
+    """
+    Inserts, replaces and status updates whose current document is in one of statuses. Only the
+    document's _id and status are sent; the handler's fields are read when the document is claimed.
+    """
+    return [
+        {"$match": {
+            "fullDocument.status": {"$in": statuses},
+            "$or": [
+                {"operationType": {"$in": ["insert", "replace"]}},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+            ],
+        }},
+        {"$project": {"operationType": 1, "fullDocument._id": 1, "fullDocument.status": 1}},
+    ]
+
+
+class EventRunner:
+    def __init__(self, collection, state_collection=None, handlers: Optional[Dict[str, Tuple[Handler, Optional[dict]]]] = None,
+                 name: str = "news_stages", poll_interval: float = settings.EVENT_POLL_INTERVAL_SECONDS):
+        self.collection = collection
+        self.state_collection = state_collection
+        self.handlers = handlers if handlers is not None else stage_handlers()
+        self.name = name
+        self.poll_interval = poll_interval
+        self._stopped = False
+        self._retry_in: Optional[float] = None  # Set when a dispatch hit an open circuit
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    def dispatch(self, doc: Optional[dict]) -> bool:
+        """
+        Runs the handler for doc's current status under a lease, so cron runs and other runners never
+        work on the same document. Returns False if nothing handled it.
+        """
+        if not doc:
+            return False
+        stage = self.handlers.get(doc.get("status"))
+        if stage is None:
+            return False
+        handler, projection = stage
+        claimed = claim_document(self.collection, doc["_id"], {"status": doc["status"]}, projection=projection)
+        if claimed is None:
+            logger.info(f"doc_id={doc['_id']} is leased by another worker or has moved on; skipping.")
+            return False
+        try:
+            with leased(self.collection, claimed):
+                handler(self.collection, claimed)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping doc_id={doc.get('_id')} while circuit is open: {e}")
+            self._retry_in = max(self._retry_in or 0.0, e.retry_in, 1.0)
+        except Exception as e:
+            logger.error(f"Stage handler for status {doc.get('status')} failed on doc_id={doc.get('_id')}: {e}")
+        return True
+
+    def load_resume_token(self) -> Optional[dict]:
+        if self.state_collection is None:
+            return None
+        state = self.state_collection.find_one({"_id": self.name})
+        return state.get("resume_token") if state else None
+
+    def save_resume_token(self, token: Optional[dict]) -> None:
+        if self.state_collection is None or token is None:
+            return
+        self.state_collection.update_one(
+            {"_id": self.name}, {"$set": {"resume_token": token, "updated_at": datetime.utcnow()}}, upsert=True
+        )
+
+    def poll_once(self) -> int:
+        """Dispatches every document currently waiting in a handled status. Returns how many were handled."""
+        handled = 0
+        cursor = self.collection.find({"status": {"$in": list(self.handlers)}}, {"status": 1},
+                                      batch_size=settings.STAGE_CURSOR_BATCH_SIZE)
+        for doc in cursor.sort([("created_at", 1)]):
+            if self._stopped:
+                break
+            handled += self.dispatch(doc)
+        return handled
+
+    def sweep_skipped(self) -> None:
+        """
+        After a dispatch hit an open circuit, waits until the circuit may close and dispatches the
+        documents still waiting, until a sweep gets through without hitting an open circuit.
+        """
+        while self._retry_in is not None and not self._stopped:
+            retry_in, self._retry_in = self._retry_in, None
+            logger.info(f"Sweeping documents skipped while a circuit was open in {retry_in:.0f}s")
+            time.sleep(retry_in)
+            self.poll_once()
+
+    def watch(self, max_events: Optional[int] = None) -> None:
+        """
+        Follows the change stream, resuming from the stored token. Without a token the runner first
+        sweeps documents that are already waiting, after the stream is opened so nothing is missed.
+        Raises OperationFailure(40573) on deployments without change streams.
+        """
+        token = self.load_resume_token()
+        pipeline = change_stream_pipeline(list(self.handlers))
+        with self.collection.watch(pipeline, full_document="updateLookup", start_after=token) as stream:
+            if token is None:
+                logger.info("No resume token stored; processing documents already waiting.")
+                self.poll_once()
+                self.sweep_skipped()
+            handled = 0
+            while not self._stopped and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    continue
+                self.dispatch(change.get("fullDocument"))
+                # The token only advances once skipped documents were handled, so none are stranded
+                self.sweep_skipped()
+                self.save_resume_token(stream.resume_token)
+                handled += 1
+                if max_events is not None and handled >= max_events:
+                    return
+
+    def poll(self) -> None:
+        """Polling fallback for standalone MongoDB."""
+        logger.info(f"Polling '{NEWS_COLLECTION}' every {self.poll_interval}s for statuses {list(self.handlers)}")
+        while not self._stopped:
+            self.poll_once()
+            self.sweep_skipped()
+            time.sleep(self.poll_interval)
+
+    def run(self) -> None:
+        try:
+            self.watch()
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAMS_UNSUPPORTED:
+                raise
+            logger.warning("Change streams are not supported by this MongoDB deployment; falling back to polling.")
+            self.poll()
+
+
+def run_event_runner() -> None:
+    collection = get_collection(NEWS_COLLECTION)
+    if collection is None:
+        logger.error("Could not get MongoDB collection 'news'. Event runner not started.")
+        return
+    ensure_indexes()
+    runner = EventRunner(collection, get_collection(RUNNER_STATE_COLLECTION))
+    logger.info(f"Starting event runner for statuses {list(runner.handlers)}")
+    while True:
+        try:
+            runner.run()
+            return
+        except PyMongoError as e:
+            # Network blips and elections: reopen the stream from the last stored token
+            logger.error(f"Change stream interrupted: {e}; resuming in {runner.poll_interval}s")
+            time.sleep(runner.poll_interval)
+
+
+if __name__ == "__main__":
+    run_event_runner()
@@ -0,0 +1,241 @@
+"""
+Pipelined stage runner.
+Stages are connected by bounded in-process queues of document ids and each stage has its own
+worker threads, so video rendering overlaps with validation and script generation instead of
+waiting for them to finish. A full queue blocks the stage feeding it (backpressure). Every stage
+is also seeded with the due documents already waiting in its statuses. When a stage has no more
+producers it receives one sentinel per worker, so the run shuts down cleanly from front to back.
+Workers claim each document with a lease (app.database.leases) before handling it, so this
+runner can share the collection with cron jobs, the event runner or other workers.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from app.config import settings
+from app.database.leases import claim_document, leased, release
+from app.database.mongo import get_collection
+from app.database.retries import due_query
+from app.errors.exceptions import CircuitOpenError
+from app.media.render_pool import render_plan
+from app.pipelines.scheduler2_validate_content import VALIDATE_PROJECTION, validate_document, validate_documents
+from app.pipelines.scheduler3_script_gen import SCRIPT_PROJECTION, generate_script_for_document
+from app.pipelines.scheduler5_video_gen import (
+    VIDEO_PROJECTION, VIDEO_SORT, VIDEO_STATUSES, generate_video_for_document
+)
+from app.utils.logger import logger
+
+NEWS_COLLECTION = 'news'
+_SENTINEL = object()
+
+
+@dataclass
+class PipelineStage:
+    name: str
+    statuses: List[str]  # Statuses the stage consumes (due error statuses included)
+    handler: Callable[[object, dict], None]
+    workers: int = 1
+    batch_handler: Optional[Callable[[object, List[dict]], None]] = None
+    batch_size: int = 1
+    limit: Optional[int] = None  # Max documents handled per run; the rest wait for the next run
+    sort: Optional[list] = None
+    projection: Optional[dict] = None  # Fields the handlers read; other fields are never loaded
+    inbox: "queue.Queue" = field(init=False)
+    handled: int = field(default=0, init=False)
+    halted: bool = field(default=False, init=False)
+    _producers: int = field(default=0, init=False)
+    _live_workers: int = field(default=0, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def take_slot(self) -> bool:
+        """Reserves one unit of the per-run limit. Returns False once the limit is used up or the stage halted."""
+        with self._lock:
+            if self.halted or (self.limit is not None and self.handled >= self.limit):
+                return False
+            self.handled += 1
+            return True
+
+
+class PipelineRunner:
+    def __init__(self, collection, stages: List[PipelineStage], queue_size: int = settings.PIPELINE_QUEUE_SIZE):
+        self.collection = collection
+        self.stages = stages
+        for index, stage in enumerate(stages):
+            stage.inbox = queue.Queue(maxsize=max(1, queue_size))
+            # Each stage is fed by its backlog seeder and, after the first, by the stage before it
+            stage._producers = 1 if index == 0 else 2
+            stage._live_workers = max(1, stage.workers)
+
+    def _next_stage(self, stage: PipelineStage) -> Optional[PipelineStage]:
+        index = self.stages.index(stage)
+        return self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+    def _producer_done(self, stage: PipelineStage) -> None:
+        with stage._lock:
+            stage._producers -= 1
+            finished = stage._producers == 0
+        if finished:
+            for _ in range(max(1, stage.workers)):
+                stage.inbox.put(_SENTINEL)
+
+    def _seed(self, stage: PipelineStage) -> None:
+        """Queues the ids of due documents already waiting for stage."""
+        try:
+            cursor = self.collection.find(due_query(stage.statuses, self.collection), {"_id": 1},
+                                          batch_size=settings.STAGE_CURSOR_BATCH_SIZE)
+            if stage.sort:
+                cursor = cursor.sort(stage.sort)
+            if stage.limit is not None:
+                cursor = cursor.limit(stage.limit)
+            for doc in cursor:
+                stage.inbox.put(doc["_id"])
+        except Exception as e:
+            logger.error(f"Error seeding pipeline stage '{stage.name}': {e}")
+        finally:
+            self._producer_done(stage)
+
+    def _claim(self, stage: PipelineStage, doc_id) -> Optional[dict]:
+        if not stage.take_slot():
+            return None
+        claimed = None
+        try:
+            claimed = claim_document(self.collection, doc_id, due_query(stage.statuses), projection=stage.projection)
+        finally:
+            if claimed is None:
+                with stage._lock:
+                    stage.handled -= 1
+        return claimed
+
+    def _forward(self, stage: PipelineStage, doc_ids: List) -> None:
+        """Passes documents that reached the next stage's input status downstream (blocks when it is full)."""
+        next_stage = self._next_stage(stage)
+        if next_stage is None:
+            return
+        for doc in self.collection.find({"_id": {"$in": doc_ids}, "status": {"$in": next_stage.statuses}}, {"_id": 1}):
+            next_stage.inbox.put(doc["_id"])
+
+    def _release_all(self, docs: List[dict]) -> None:
+        for doc in docs:
+            try:
+                release(self.collection, doc["_id"])
+            except Exception as e:
+                logger.error(f"Error releasing lease on doc_id={doc['_id']}: {e}")
+
+    def _process(self, stage: PipelineStage, docs: List[dict]) -> None:
+        try:
+            if stage.batch_handler is not None and len(docs) > 1:
+                try:
+                    stage.batch_handler(self.collection, docs)
+                finally:
+                    self._release_all(docs)
+            else:
+                done = 0
+                try:
+                    for doc in docs:
+                        with leased(self.collection, doc):
+                            stage.handler(self.collection, doc)
+                        done += 1
+                finally:
+                    # Documents after one that raised were claimed but never handled
+                    self._release_all(docs[done + 1:])
+        except CircuitOpenError as e:
+            # Remaining ids are drained without work; the documents keep their status for the next run
+            logger.warning(f"Pipeline stage '{stage.name}' halted: {e}")
+            stage.halted = True
+        except Exception as e:
+            logger.error(f"Pipeline stage '{stage.name}' failed on {[doc['_id'] for doc in docs]}: {e}")
+
+    def _handle(self, stage: PipelineStage, doc_ids: List) -> None:
+        """Claims, handles and forwards one batch. Database errors only cost the batch, never the worker."""
+        docs = []
+        try:
+            for doc_id in doc_ids:
+                doc = self._claim(stage, doc_id)
+                if doc is not None:
+                    docs.append(doc)
+            if not docs:
+                return
+            self._process(stage, docs)
+            self._forward(stage, [doc["_id"] for doc in docs])
+        except Exception as e:
+            # Unforwarded documents keep their status and are picked up by the next run
+            logger.error(f"Pipeline stage '{stage.name}' could not claim or forward {doc_ids}: {e}")
+            self._release_all(docs)
+
+    def _next_batch(self, stage: PipelineStage) -> Optional[List]:
+        """Blocks for one id, then takes up to batch_size - 1 more without waiting. None means shut down."""
+        first = stage.inbox.get()
+        if first is _SENTINEL:
+            return None
+        batch = [first]
+        while len(batch) < stage.batch_size:
+            try:
+                item = stage.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is _SENTINEL:
+                # Leave the sentinel for the next get; the current batch is still handled
+                stage.inbox.put(item)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self, stage: PipelineStage) -> None:
+        try:
+            while True:
+                batch = self._next_batch(stage)
+                if batch is None:
+                    break
+                self._handle(stage, batch)
+        finally:
+            # The last worker out shuts the next stage down, however this one ended, so run() never hangs
+            with stage._lock:
+                stage._live_workers -= 1
+                last = stage._live_workers == 0
+            next_stage = self._next_stage(stage)
+            if last and next_stage is not None:
+                self._producer_done(next_stage)
+
+    def run(self) -> Dict[str, int]:
+        """Runs every stage until all queues drain. Returns the number of documents each stage handled."""
+        started = time.monotonic()
+        threads = []
+        for stage in self.stages:
+            threads.append(threading.Thread(target=self._seed, args=(stage,), name=f"seed-{stage.name}", daemon=True))
+            for n in range(max(1, stage.workers)):
+                threads.append(threading.Thread(target=self._worker, args=(stage,), name=f"{stage.name}-{n}", daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts = {stage.name: stage.handled for stage in self.stages}
+        logger.info(f"Pipelined run finished in {time.monotonic() - started:.1f}s: {counts}")
+        return counts
+
+
+def default_stages() -> List[PipelineStage]:
+    """
+    Validation, script and video stages with the same per-run caps as their cron jobs. The video
+    stage runs one worker per render pool slot unless PIPELINE_WORKERS sets it.
+    """
+    workers = settings.PIPELINE_WORKERS
+    return [
+        PipelineStage("validate", ["FETCHED", "ERROR_VALIDATE"], handler=validate_document,
+                      workers=workers.get("validate", 1), batch_handler=validate_documents,
+                      batch_size=max(1, settings.VALIDATION_BATCH_SIZE), projection=VALIDATE_PROJECTION),
+        PipelineStage("script", ["VALID_ARTICLE", "ERROR_SCRIPT"], handler=generate_script_for_document,
+                      workers=workers.get("script", 1), limit=10, sort=[("relevancy", -1), ("created_at", -1)],
+                      projection=SCRIPT_PROJECTION),
+        PipelineStage("video", VIDEO_STATUSES, handler=generate_video_for_document,
+                      workers=workers.get("video", render_plan().workers), limit=settings.VIDEO_RENDER_LIMIT,
+                      sort=VIDEO_SORT, projection=VIDEO_PROJECTION),
+    ]
+
+
+def run_pipeline() -> Optional[Dict[str, int]]:
+    collection = get_collection(NEWS_COLLECTION)
+    if collection is None:
+        logger.error("Could not get MongoDB collection 'news'. Skipping pipelined run.")
+        return None
+    return PipelineRunner(collection, default_stages()).run()
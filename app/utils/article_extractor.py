@@ -0,0 +1,99 @@
+"""
+Main-text extraction for scraped news articles.
+Pages are streamed with a byte cap, parsed with lxml when it is installed (falling back to
+html.parser), and the block with the highest readability-style score is returned, so
+navigation, footers and cookie banners do not end up in the article text.
+"""
+import re
+from typing import Dict, List, Optional
+from bs4 import BeautifulSoup, Tag
+from app.config import settings
+from app.utils.http_transport import http_get
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+CHUNK_SIZE = 64 * 1024
+MIN_PARAGRAPH_CHARS = 25
+NOISE_TAGS = ["script", "style", "noscript", "nav", "footer", "header", "aside", "form", "iframe", "svg", "button"]
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|post|story|text", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"comment|cookie|consent|banner|footer|nav|menu|sidebar|related|share|social|promo|"
+    r"subscribe|newsletter|advert|sponsor|popup|modal|breadcrumb", re.I)
+
+
+def fetch_html(url: str, max_bytes: int = settings.ARTICLE_MAX_BYTES, timeout: int = 10) -> bytes:
+    """
+    Streams a page body, stopping once max_bytes have been read.
+    Raises requests.RequestException on network or HTTP errors.
+    """
+    with http_get(url, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        chunks: List[bytes] = []
+        size = 0
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+    return b"".join(chunks)[:max_bytes]
+
+
+def _class_weight(tag: Tag) -> int:
+    hints = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+    weight = 0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+
+def _link_density(tag: Tag) -> float:
+    text_length = len(tag.get_text(" ", strip=True)) or 1
+    link_length = sum(len(a.get_text(" ", strip=True)) for a in tag.find_all("a"))
+    return link_length / text_length
+
+
+def _best_block(soup: BeautifulSoup) -> Optional[Tag]:
+    """Scores the parents of substantial paragraphs and returns the best one."""
+    scores: Dict[int, float] = {}
+    blocks: Dict[int, Tag] = {}
+    for p in soup.find_all("p"):
+        text = p.get_text(" ", strip=True)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        for depth, ancestor in enumerate([p.parent, p.parent.parent if p.parent else None]):
+            if not isinstance(ancestor, Tag):
+                continue
+            key = id(ancestor)
+            if key not in blocks:
+                blocks[key] = ancestor
+                scores[key] = _class_weight(ancestor)
+            scores[key] += score if depth == 0 else score / 2
+    if not blocks:
+        return None
+    best_key = max(blocks, key=lambda k: scores[k] * (1 - _link_density(blocks[k])))
+    return blocks[best_key]
+
+
+def extract_main_text(html: bytes) -> str:
+    """
+    Returns the paragraphs of the highest-scoring content block, one per line.
+    Falls back to every paragraph on the page if no block qualifies.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup.find_all(NOISE_TAGS):
+        tag.decompose()
+    block = _best_block(soup)
+    paragraphs = (block or soup).find_all("p")
+    return "\n".join(p.get_text(" ", strip=True) for p in paragraphs if p.get_text(strip=True)).strip()
+
+
+def extract_article_text(url: str) -> str:
+    """Streams the article at url and returns its main text."""
+    return extract_main_text(fetch_html(url))
@@ -0,0 +1,120 @@
+"""
+Circuit breaker for external services.
+CLOSED passes calls through and counts consecutive failures; after failure_threshold it trips
+to OPEN and rejects calls with CircuitOpenError for recovery_seconds; then HALF_OPEN lets a single
+probe through, which closes the circuit on success or re-opens it on failure.
+Every transition and every change of the failure count is written to the 'service_health'
+collection so the dashboard and the Flask app, which run in other processes, can show the current
+state. Successes are only written when they reset a failure count, so healthy calls cost nothing.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.database.mongo import get_collection
+from app.errors.exceptions import CircuitOpenError
+from app.utils.logger import logger
+
+SERVICE_HEALTH_COLLECTION = 'service_health'
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 60.0, persist: bool = True):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.persist = persist
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._opened_at_utc: Optional[datetime] = None  # opened_at as wall-clock time, for other processes
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError unless a call may go ahead now."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_seconds:
+                    raise CircuitOpenError(self.name, self.retry_in())
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back is replaced after recovery_seconds
+                now = time.monotonic()
+                if self._probe_started is not None and now - self._probe_started < self.recovery_seconds:
+                    raise CircuitOpenError(self.name, self.recovery_seconds - (now - self._probe_started))
+                self._probe_started = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._probe_started = None
+            had_failures, self.failures = self.failures > 0, 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+            elif had_failures:
+                self._persist()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._probe_started = None
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._opened_at_utc = datetime.utcnow()
+                self._transition(OPEN)
+            else:
+                self._persist()
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 if it is not open)."""
+        if self.state != OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.recovery_seconds - (time.monotonic() - self.opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": self.failures,
+            "opened_at": self._opened_at_utc if self.state != CLOSED else None,
+            "retry_in_seconds": round(self.retry_in(), 1),
+        }
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit '{self.name}' {previous} -> {state} after {self.failures} consecutive failures")
+        self._persist()
+
+    def _persist(self) -> None:
+        if self.persist:
+            save_breaker_state(self.snapshot())
+
+
+def save_breaker_state(snapshot: Dict[str, Any]) -> None:
+    """Upserts a breaker snapshot into service_health. Best effort: errors are logged, never raised."""
+    collection = get_collection(SERVICE_HEALTH_COLLECTION)
+    if collection is None:
+        return
+    try:
+        collection.update_one(
+            {"_id": snapshot["name"]}, {"$set": {**snapshot, "updated_at": datetime.utcnow()}}, upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Error saving circuit state for '{snapshot['name']}': {e}")
+
+
+def load_breaker_states() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Returns the last persisted snapshot of every breaker keyed by name, or None if the DB is unavailable."""
+    collection = get_collection(SERVICE_HEALTH_COLLECTION)
+    if collection is None:
+        return None
+    try:
+        return {doc.pop("_id"): doc for doc in collection.find()}
+    except Exception as e:
+        logger.error(f"Error reading circuit states: {e}")
+        return None
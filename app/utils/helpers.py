@@ -1 +1,36 @@
-# Miscellaneous helper functions 
\ No newline at end of file
+# Miscellaneous helper functions
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from urllib.parse import urlparse
+
+
+class RequestLimiter:
+    """
+    Caps the number of concurrent outbound requests, both globally and per host.
+    Safe to share between threads.
+    """
+    def __init__(self, max_concurrency: int, per_host: int):
+        self._global = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._per_host = max(1, per_host)
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._hosts.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._per_host)
+                self._hosts[host] = semaphore
+        return semaphore
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """
+        Blocks until a request to `url` may start. The host slot is taken first so a
+        busy host never holds global slots while it waits.
+        """
+        with self._host_semaphore(url):
+            with self._global:
+                yield
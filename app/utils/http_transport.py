@@ -0,0 +1,108 @@
+"""
+Shared HTTP transport for all outbound API calls.
+Keeps one pooled keep-alive requests.Session per host, applies default timeouts and records
+per-host request counts, latency and byte counts so slow upstreams show up in the logs.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+from app.utils.logger import logger
+
+DEFAULT_TIMEOUT = (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+# Hosts we call with more parallelism than the default pool allows
+HOST_POOL_SIZES = {
+    "generativelanguage.googleapis.com": max(settings.HTTP_POOL_SIZE, settings.GEMINI_MAX_CONCURRENCY * 2),
+    "www.googleapis.com": max(settings.HTTP_POOL_SIZE, settings.SEARCH_MAX_CONCURRENCY),
+}
+
+
+class HttpTransport:
+    """
+    Pooled HTTP client. Sessions are created lazily per host and shared across threads.
+    """
+    def __init__(self, default_pool_size: int = settings.HTTP_POOL_SIZE):
+        self._default_pool_size = default_pool_size
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _session_for(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                pool_size = HOST_POOL_SIZES.get(host, self._default_pool_size)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def _record(self, host: str, elapsed: float, sent: int, received: int, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                "requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "bytes_sent": 0, "bytes_received": 0
+            })
+            stats["requests"] += 1
+            stats["errors"] += int(failed)
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["bytes_sent"] += sent
+            stats["bytes_received"] += received
+
+    def request(self, method: str, url: str, timeout: Optional[Any] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the host's pooled session. Uses DEFAULT_TIMEOUT unless a timeout is given.
+        Streamed responses are counted by their Content-Length header.
+        Raises requests.RequestException like requests.request.
+        """
+        host = urlparse(url).netloc.lower()
+        session = self._session_for(host)
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        except requests.RequestException:
+            self._record(host, time.monotonic() - started, 0, 0, failed=True)
+            raise
+        elapsed = time.monotonic() - started
+        body = response.request.body if response.request is not None else None
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        if kwargs.get("stream"):
+            received = int(response.headers.get("Content-Length") or 0)
+        else:
+            received = len(response.content or b"")
+        self._record(host, elapsed, sent, received, failed=response.status_code >= 400)
+        logger.debug(f"{method} {host} -> {response.status_code} in {elapsed:.2f}s ({received} bytes)")
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns a copy of the per-host counters, with the average latency added."""
+        with self._lock:
+            snapshot = {host: dict(values) for host, values in self._stats.items()}
+        for values in snapshot.values():
+            values["avg_seconds"] = values["total_seconds"] / values["requests"] if values["requests"] else 0.0
+        return snapshot
+
+    def log_stats(self) -> None:
+        """Logs one line per host, slowest hosts first."""
+        for host, values in sorted(self.stats().items(), key=lambda item: -item[1]["total_seconds"]):
+            logger.info(
+                f"HTTP {host}: {values['requests']} requests ({values['errors']} errors), "
+                f"avg {values['avg_seconds']:.2f}s, max {values['max_seconds']:.2f}s, "
+                f"sent {values['bytes_sent']} B, received {values['bytes_received']} B"
+            )
+
+
+transport = HttpTransport()
+http_get = transport.get
+http_post = transport.post
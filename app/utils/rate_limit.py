@@ -0,0 +1,44 @@
+"""
+Rate limiting primitives shared by API clients.
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity tokens
+    (default: one minute's worth). The bucket state is guarded by a thread lock, so one
+    instance can be shared by several threads and event loops.
+    """
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = max(rate_per_minute, 1e-9) / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, amount: float = 1.0) -> float:
+        """
+        Takes amount tokens if available and returns 0, otherwise returns the seconds to wait
+        before they will be. Requests larger than capacity are clamped to capacity.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate_per_second
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Waits until amount tokens can be taken."""
+        while True:
+            wait = self.try_take(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -1,29 +1,66 @@
 import feedparser
 import requests
-from bs4 import BeautifulSoup
+from app.database.feed_cache import load_feed_state
+from app.utils.article_extractor import extract_article_text
+from app.utils.http_transport import http_get
 from app.utils.logger import logger
 
-def fetch_rss_articles(rss_url, max_results=5):
-    """Fetch articles from an RSS feed."""
-    feed = feedparser.parse(rss_url)
+RSS_FETCH_TIMEOUT = 10
+
+
+def fetch_rss_articles(rss_url, max_results=5, use_cache=True):
+    """
+    Fetch articles from an RSS feed.
+    With use_cache, the stored ETag / Last-Modified validators are sent as a conditional GET:
+    a 304 returns no articles, and entries whose GUID was already returned are skipped.
+    Returns (articles, feed_state). feed_state holds the new validators and GUIDs, or None when
+    there is nothing to record; pass it to save_feed_state only once the articles are stored, so
+    articles lost to a crash or a failed insert are fetched again on the next poll.
+    """
+    state = load_feed_state(rss_url) if use_cache else {}
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    try:
+        resp = http_get(rss_url, headers=headers, timeout=RSS_FETCH_TIMEOUT)
+    except requests.RequestException as e:
+        logger.error(f"Error fetching RSS feed {rss_url}: {e}")
+        return [], None
+    if resp.status_code == 304:
+        logger.info(f"RSS feed not modified since last poll: {rss_url}")
+        return [], None
+    if resp.status_code >= 400:
+        logger.error(f"Error fetching RSS feed {rss_url}: HTTP {resp.status_code}")
+        return [], None
+    feed = feedparser.parse(resp.content)
+    seen_guids = set(state.get("seen_guids", []))
     articles = []
     for entry in feed.entries[:max_results]:
+        guid = entry.get("id") or entry.get("link", "")
+        if guid in seen_guids:
+            continue
         articles.append({
             "title": entry.get("title", ""),
             "link": entry.get("link", ""),
             "published": entry.get("published", ""),
             "summary": entry.get("summary", ""),
+            "guid": guid,
         })
-    return articles
+    feed_state = None
+    if use_cache:
+        feed_state = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "new_guids": [art["guid"] for art in articles if art["guid"]],
+        }
+    return articles, feed_state
 
 def scrape_article_content(url):
-    """Scrape the main content from a news article URL."""
+    """Scrape the main content from a news article URL (see app.utils.article_extractor)."""
     try:
-        resp = requests.get(url, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-        paragraphs = soup.find_all('p')
-        article_text = "\n".join([p.get_text() for p in paragraphs])
-        return article_text.strip()
+        return extract_article_text(url)
     except Exception as e:
         logger.error(f"Error scraping {url}: {e}")
-        return "" 
\ No newline at end of file
+        return ""
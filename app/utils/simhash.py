@@ -0,0 +1,43 @@
+"""
+64-bit SimHash fingerprints for near-duplicate text detection.
+Fingerprints are split into NUM_BANDS bands; by the pigeonhole principle two fingerprints
+within MAX_BAND_DISTANCE bits of each other share at least one identical band, so bands
+can be used as exact-match index keys for candidate lookup.
+"""
+import hashlib
+import re
+from typing import List
+
+SIMHASH_BITS = 64
+NUM_BANDS = 4
+BAND_BITS = SIMHASH_BITS // NUM_BANDS
+MAX_BAND_DISTANCE = NUM_BANDS - 1
+SHINGLE_SIZE = 3
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingles(text: str) -> List[str]:
+    tokens = WORD_RE.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> int:
+    """Returns the 64-bit SimHash of the word 3-shingles of text (0 for empty text)."""
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def band_keys(fingerprint: int) -> List[str]:
+    """Returns one 'band:value' key per band, e.g. '0:1a2b'."""
+    mask = (1 << BAND_BITS) - 1
+    return [f"{band}:{(fingerprint >> (band * BAND_BITS)) & mask:04x}" for band in range(NUM_BANDS)]
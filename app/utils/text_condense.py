@@ -0,0 +1,89 @@
+"""
+Offline extractive condensation of article text to a token budget.
+Keeps the lead paragraphs, then fills the remaining budget with the sentences that score
+highest on word frequency (and headline overlap), emitted in their original order.
+"""
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+LEAD_PARAGRAPHS = 2
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"'”’)]?\s+(?=[A-Z0-9\"'“‘(])")
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = set(
+    "a an and are as at be been but by for from had has have he her his i in is it its of on or our she that the "
+    "their them they this to was we were which who will with would you your said says also after before about "
+    "into over than then there these those not no so if more most can could may might just".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token)."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(paragraph) if s.strip()]
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def _truncate_to_budget(text: str, token_budget: int) -> str:
+    kept: List[str] = []
+    for sentence in split_sentences(text):
+        if estimate_tokens(" ".join(kept + [sentence])) > token_budget:
+            break
+        kept.append(sentence)
+    return " ".join(kept) if kept else text[:token_budget * CHARS_PER_TOKEN]
+
+
+def condense_article(text: str, token_budget: int, headline: Optional[str] = None,
+                     lead_paragraphs: int = LEAD_PARAGRAPHS) -> str:
+    """
+    Returns text unchanged if it fits in token_budget, otherwise the lead paragraphs plus the
+    highest-scoring later sentences that fit, in original order, one paragraph per line.
+    """
+    if not text or estimate_tokens(text) <= token_budget:
+        return text
+    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
+    kept_lead: List[str] = []
+    for paragraph in paragraphs[:lead_paragraphs]:
+        if estimate_tokens("\n".join(kept_lead + [paragraph])) > token_budget:
+            if not kept_lead:
+                return _truncate_to_budget(paragraph, token_budget)
+            break
+        kept_lead.append(paragraph)
+
+    frequencies = Counter(_words(text))
+    top = max(frequencies.values(), default=1)
+    headline_words = set(_words(headline or ""))
+    candidates: List[Tuple[float, int, int, str]] = []
+    for p_index, paragraph in enumerate(paragraphs[len(kept_lead):], start=len(kept_lead)):
+        for s_index, sentence in enumerate(split_sentences(paragraph)):
+            words = _words(sentence)
+            if not words:
+                continue
+            score = sum(frequencies[w] / top for w in words) / len(words) ** 0.5
+            score += 0.5 * len(headline_words.intersection(words))
+            candidates.append((score, p_index, s_index, sentence))
+
+    used = estimate_tokens("\n".join(kept_lead))
+    chosen: List[Tuple[int, int, str]] = []
+    for score, p_index, s_index, sentence in sorted(candidates, key=lambda c: -c[0]):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost <= token_budget:
+            chosen.append((p_index, s_index, sentence))
+            used += cost
+    chosen.sort()
+    body: List[str] = []
+    current_paragraph = None
+    for p_index, _, sentence in chosen:
+        if p_index != current_paragraph:
+            body.append(sentence)
+            current_paragraph = p_index
+        else:
+            body[-1] += " " + sentence
+    return "\n".join(kept_lead + body)
@@ -0,0 +1,43 @@
+"""
+URL normalization helpers used to recognise the same article behind different links.
+"""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking/campaign data and never change the page content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "cmpid", "ito", "ocid", "ncid", "s_cid", "spm", "_ga",
+    "at_medium", "at_campaign", "at_custom1", "at_custom2", "at_custom3", "at_custom4",
+}
+TRACKING_PREFIXES = ("utm_",)
+HOST_PREFIXES = ("www.", "m.", "amp.")
+DEFAULT_PORTS = {"80", "443"}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Returns a canonical form of an article URL for deduplication:
+    https scheme, lowercase host without www./m./amp. prefixes or default port,
+    no trailing slash, no fragment, tracking params removed and the rest sorted.
+    Returns an empty string for empty input.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and str(parts.port) not in DEFAULT_PORTS:
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking_param(k)))
+    return urlunsplit(("https", host, path, query, ""))
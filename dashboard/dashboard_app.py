@@ -10,6 +10,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app.database.mongo import get_collection
 from app.database.models import STATUS_SUCCESS, STATUS_ERROR
+from app.database.retries import DEAD_LETTER, requeue
+from app.media.render_profiles import PREVIEW
+from app.pipelines.scheduler5_video_gen import request_final_render
+from app.utils.circuit_breaker import CLOSED, OPEN, load_breaker_states
 
 # --- CONFIG ---
 COLLECTION_NAME = 'news'  # Change if your collection name is different
@@ -34,9 +38,26 @@ def fetch_articles():
     df['_id'] = df['_id'].fillna('')  # Ensure no NaN in _id
     return df
 
+def show_service_health():
+    breakers = load_breaker_states()
+    st.sidebar.subheader('Service Health')
+    if not breakers:
+        st.sidebar.caption('No circuit breaker state recorded yet.')
+        return
+    for name, state in sorted(breakers.items()):
+        updated = state['updated_at'].strftime('%Y-%m-%d %H:%M:%S') if state.get('updated_at') else 'unknown'
+        text = f"{name}: {state.get('state')}, {state.get('failures', 0)} consecutive failures (as of {updated})"
+        if state.get('state') == OPEN:
+            st.sidebar.error(text)
+        elif state.get('state') == CLOSED:
+            st.sidebar.success(text)
+        else:
+            st.sidebar.warning(text)
+
 # --- STREAMLIT UI ---
 st.set_page_config(page_title='Articles Dashboard', layout='wide')
 st.title('Automated Reels Generation - Articles Dashboard')
+show_service_health()
 
 # Load data
 df = fetch_articles()
@@ -66,7 +87,8 @@ if sort_by in filtered_df.columns:
 
 # --- DISPLAY AS TILES ---
 fields_to_show = [
-    "_id", "caption", "created_at", "domain", "headline", "relevancy", "sentiment", "status", "video_url"
+    "_id", "caption", "created_at", "domain", "headline", "relevancy", "sentiment", "status", "video_url",
+    "rendered_profile"
 ]
 
 def show_articles_as_tiles(df, tiles_per_row=3):
@@ -80,6 +102,8 @@ def show_articles_as_tiles(df, tiles_per_row=3):
                 video_url = str(getattr(row, 'video_url', '') or '')
                 id = str(row._asdict().get('_1', ''))
                 status = getattr(row, 'status', '')
+                rendered_profile = getattr(row, 'rendered_profile', None)
+                rendered_profile = rendered_profile if isinstance(rendered_profile, str) else ''
                 link_html = f'<a href="{video_url}" target="_blank">Watch Video</a>' if video_url else ''
                 st.markdown(
                     f'''
@@ -91,22 +115,37 @@ def show_articles_as_tiles(df, tiles_per_row=3):
                         <p><b>Domain:</b> {getattr(row, 'domain', '')}</p>
                         <p><b>Sentiment:</b> {getattr(row, 'sentiment', '')}</p>
                         <p><b>Caption:</b> {getattr(row, 'caption', '')}</p>
+                        <p><b>Render:</b> {rendered_profile}</p>
                         <p><b>ID:</b> {id}</p>
                         {link_html}
                     </div>
                     ''',
                     unsafe_allow_html=True
                 )
+                # Previews are approved for a full-quality render before they can be posted
+                if status == 'VIDEO_GENERATED' and rendered_profile == PREVIEW and id:
+                    if st.button('Approve for final render', key=f'approve_{id}_{i}_{j}'):
+                        collection = get_collection(COLLECTION_NAME)
+                        if collection is not None:
+                            request_final_render(collection, __import__('bson').ObjectId(id))
+                        st.rerun()
                 # Show button if status is VIDEO_GENERATED
-                if status == 'VIDEO_GENERATED' and id:
+                elif status == 'VIDEO_GENERATED' and id:
                     if st.button('Mark as POSTED', key=f'post_{id}_{i}_{j}'):
                         # Update status in MongoDB
                         collection = get_collection(COLLECTION_NAME)
                         if collection is not None:
                             collection.update_one({'_id': __import__('bson').ObjectId(id)}, {'$set': {'status': 'POSTED'}})
                         st.rerun()
+                # Dead-lettered articles can be sent back to the stage that failed
+                if status == DEAD_LETTER and id:
+                    if st.button('Requeue', key=f'requeue_{id}_{i}_{j}'):
+                        collection = get_collection(COLLECTION_NAME)
+                        if collection is not None:
+                            requeue(collection, __import__('bson').ObjectId(id))
+                        st.rerun()
 
 # Show total count of filtered results
 st.markdown(f"**Total articles: {len(filtered_df)}**")
 
-show_articles_as_tiles(filtered_df[fields_to_show]) 
\ No newline at end of file
+show_articles_as_tiles(filtered_df.reindex(columns=fields_to_show)) 
\ No newline at end of file
@@ -1,9 +1,11 @@
 from flask import Flask
+from endpoints.health import health_bp
 from endpoints.ping_server import ping_bp
 from endpoints.top_news import top_news_bp
 
 app = Flask(__name__)
 app.register_blueprint(ping_bp)
+app.register_blueprint(health_bp)
 app.register_blueprint(top_news_bp)
 
 if __name__ == "__main__":
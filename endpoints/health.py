@@ -0,0 +1,22 @@
+from datetime import datetime
+from flask import Blueprint, jsonify
+from app.utils.circuit_breaker import OPEN, load_breaker_states
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route("/health", methods=["GET"])
+def health():
+    # Breaker state is written by the scheduler process; read the last persisted snapshot
+    breakers = load_breaker_states()
+    if breakers is None:
+        return jsonify({"error": "Database connection error"}), 500
+    now = datetime.utcnow()
+    for state in breakers.values():
+        # Snapshots are written when a breaker changes, so age_seconds says how old this view is
+        if state.get("updated_at"):
+            state["age_seconds"] = round((now - state["updated_at"]).total_seconds(), 1)
+            state["updated_at"] = state["updated_at"].isoformat()
+        if state.get("opened_at"):
+            state["opened_at"] = state["opened_at"].isoformat()
+    degraded = any(state.get("state") == OPEN for state in breakers.values())
+    return jsonify({"status": "degraded" if degraded else "ok", "circuit_breakers": breakers}), 200
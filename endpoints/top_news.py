@@ -18,7 +18,7 @@ def top_news():
         "status": {"$in": ["VIDEO_GENERATED", "POSTED"]}
     }
     print(f"MongoDB query: {query}")  # Log the query being fired
-    cursor = collection.find(query).sort([
+    cursor = collection.find(query, dict.fromkeys(TOP_NEWS_FIELDS, 1)).sort([
         ("relevancy", -1), ("created_at", -1)
     ]).limit(10)
     docs = []
@@ -0,0 +1,64 @@
+# Compares encode speed of the two caption renderers (per-frame libass vs. pre-rendered PNG overlay).
+# Usage: python -m scripts.benchmark_caption_render [--seconds 15] [--runs 3] [--profile final]
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from app.config import settings
+from app.media.ffmpeg_utils import generate_video_with_overlay_and_caption
+from app.media.render_profiles import FINAL, RENDER_PROFILES
+from app.pipelines.scheduler5_video_gen import FONT_PATH
+
+FPS = 30
+CAPTION = (
+    "Sensex closes at a record high as IT stocks rally on strong quarterly results, while the rupee "
+    "firms against the dollar and foreign investors return to Indian equities for a third straight week."
+)
+
+
+def make_inputs(work_dir: str, seconds: int, resolution: str):
+    """A synthetic background clip and a silent music track of the given length."""
+    video = os.path.join(work_dir, "background.mp4")
+    music = os.path.join(work_dir, "music.mp3")
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"testsrc2=size={resolution}:rate={FPS}:duration={seconds}",
+                    "-pix_fmt", "yuv420p", video], check=True)
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", "anullsrc=r=44100:cl=stereo", "-t", str(seconds), music], check=True)
+    return video, music
+
+
+def benchmark(renderer: str, profile, video: str, music: str, work_dir: str, runs: int) -> float:
+    """Best wall-clock time of runs renders with the given caption renderer."""
+    best = float("inf")
+    for run in range(runs):
+        output = os.path.join(work_dir, f"{renderer}_{run}.mp4")
+        started = time.perf_counter()
+        generate_video_with_overlay_and_caption(video, music, FONT_PATH, CAPTION, output,
+                                                profile=profile, caption_renderer=renderer)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare encode fps of the subtitles and overlay caption renderers.")
+    parser.add_argument("--seconds", type=int, default=15, help="Length of the test reel")
+    parser.add_argument("--runs", type=int, default=3, help="Renders per renderer; the fastest counts")
+    parser.add_argument("--profile", default=FINAL, choices=sorted(RENDER_PROFILES), help="Render profile to encode with")
+    args = parser.parse_args()
+    # Both renderers start from the same source clip, so only the caption path differs
+    settings.BACKGROUND_CACHE_ENABLED = False
+    profile = RENDER_PROFILES[args.profile]
+    frames = min(args.seconds, profile.max_duration_seconds) * FPS
+    with tempfile.TemporaryDirectory(prefix="caption_bench_") as work_dir:
+        video, music = make_inputs(work_dir, args.seconds, profile.resolution)
+        results = {renderer: benchmark(renderer, profile, video, music, work_dir, args.runs)
+                   for renderer in ("subtitles", "overlay")}
+    for renderer, seconds in results.items():
+        print(f"{renderer:>10}: {seconds:6.2f}s  {frames / seconds:7.1f} fps")
+    print(f"   speedup: {results['subtitles'] / results['overlay']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
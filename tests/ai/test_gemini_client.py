@@ -20,7 +20,7 @@ def test_gemini_generate_content_success(mock_success_response):
     def mock_post(*args, **kwargs):
         return MockResponse()
     with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"):
-        with patch("requests.post", mock_post):
+        with patch("app.ai.gemini_client.http_post", mock_post):
             result = gemini_generate_content("Hello Gemini!")
             assert result == mock_success_response
 
@@ -44,6 +44,115 @@ def test_gemini_generate_content_http_error():
     def mock_post(*args, **kwargs):
         return MockResponse()
     with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"):
-        with patch("requests.post", mock_post):
+        with patch("app.ai.gemini_client.http_post", mock_post):
             result = gemini_generate_content("Test error")
-            assert result is None 
\ No newline at end of file
+            assert result is None 
+
+class StatusResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+    def json(self):
+        return self.payload
+
+
+def test_gemini_generate_content_retries_transient_errors_with_server_hint(mock_success_response):
+    """
+    Test that a 429 is retried after at least the Retry-After delay and the later success is returned.
+    """
+    responses = [StatusResponse(429, headers={"Retry-After": "7"}), StatusResponse(200, mock_success_response)]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"), \
+            patch("app.ai.gemini_client.http_post", side_effect=responses), \
+            patch("app.ai.gemini_client.asyncio.sleep", fake_sleep):
+        result = gemini_generate_content("Retry me")
+    assert result == mock_success_response
+    assert len(sleeps) == 1 and sleeps[0] >= 7
+
+
+def test_gemini_generate_content_does_not_retry_client_errors():
+    """
+    Test that a non-retryable 400 fails after a single request.
+    """
+    with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"), \
+            patch("app.ai.gemini_client.http_post", return_value=StatusResponse(400)) as post:
+        assert gemini_generate_content("Bad request") is None
+    assert post.call_count == 1
+
+
+def test_retry_after_seconds_reads_gemini_retry_info():
+    """
+    Test that the RetryInfo retryDelay in a Gemini error body is used as a server hint.
+    """
+    from app.ai.gemini_client import retry_after_seconds
+    body = {"error": {"details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "17s"}]}}
+    assert retry_after_seconds(StatusResponse(429, body)) == 17.0
+
+
+def test_gemini_generate_content_limits_concurrency_across_threads(mock_success_response):
+    """
+    Test that sync calls from several threads never have more than max_concurrency requests in flight.
+    """
+    import threading
+    import time
+    from app.ai.gemini_client import AsyncGeminiClient
+    from app.utils.circuit_breaker import CircuitBreaker
+    client = AsyncGeminiClient(max_concurrency=2, requests_per_minute=10000, tokens_per_minute=10 ** 9,
+                               breaker=CircuitBreaker("gemini-test", persist=False))
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def slow_post(*args, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return StatusResponse(200, mock_success_response)
+
+    with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"), \
+            patch("app.ai.gemini_client.gemini_async_client", client), \
+            patch("app.ai.gemini_client.http_post", slow_post):
+        threads = [threading.Thread(target=gemini_generate_content, args=(f"Prompt {n}",), kwargs={"use_cache": False})
+                   for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert peak[0] == 2
+
+
+def test_gemini_generate_content_gives_up_on_an_oversized_retry_hint():
+    """
+    Test that a Retry-After longer than GEMINI_BACKOFF_MAX_SECONDS is not slept on: the call fails
+    at once and counts as a breaker failure.
+    """
+    from app.ai import gemini_client
+    from app.ai.gemini_client import AsyncGeminiClient, backoff_delay
+    from app.utils.circuit_breaker import CircuitBreaker
+    breaker = CircuitBreaker("gemini-test", failure_threshold=5, persist=False)
+    client = AsyncGeminiClient(breaker=breaker)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"), \
+            patch("app.ai.gemini_client.gemini_async_client", client), \
+            patch("app.ai.gemini_client.http_post", return_value=StatusResponse(429, headers={"Retry-After": "3600"})) as post, \
+            patch("app.ai.gemini_client.asyncio.sleep", fake_sleep):
+        assert gemini_generate_content("Slow down", use_cache=False) is None
+    assert post.call_count == 1
+    assert sleeps == []
+    assert breaker.failures == 1
+    assert backoff_delay(1, hint=3600) <= gemini_client.settings.GEMINI_BACKOFF_MAX_SECONDS
@@ -0,0 +1,58 @@
+import time
+from unittest.mock import patch
+from app.ai import gemini_client
+from app.ai.response_cache import ResponseCache, make_cache_key
+
+
+def test_response_cache_ttl_and_lru_eviction(tmp_path):
+    """
+    Test that expired entries miss and the least recently used entry is evicted beyond max_entries.
+    """
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    time.sleep(0.01)
+    assert cache.get("a") == {"v": 1}  # touch "a" so "b" is least recently used
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("c") == {"v": 3}
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 2}
+
+    expired = ResponseCache(str(tmp_path / "expired.sqlite3"), ttl_seconds=0, max_entries=2)
+    expired.set("a", {"v": 1})
+    time.sleep(0.01)
+    assert expired.get("a") is None
+
+
+def test_cache_key_depends_on_model_prompt_and_config():
+    """
+    Test that any change to model, prompt or generation config changes the key.
+    """
+    base = make_cache_key("m", "p", {"temperature": 0})
+    assert base == make_cache_key("m", "p", {"temperature": 0})
+    assert base != make_cache_key("m2", "p", {"temperature": 0})
+    assert base != make_cache_key("m", "p2", {"temperature": 0})
+    assert base != make_cache_key("m", "p", {"temperature": 1})
+
+
+def test_gemini_generate_content_reuses_cached_response():
+    """
+    Test that a repeated prompt is answered from the cache without a second API call.
+    """
+    reply = {"candidates": [{"content": {"parts": [{"text": "cached"}]}}]}
+
+    class MockResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return reply
+
+    with patch("app.ai.gemini_client.GEMINI_API_KEY", "dummy-key"):
+        with patch("app.ai.gemini_client.http_post", return_value=MockResponse()) as post:
+            assert gemini_client.gemini_generate_content("same prompt") == reply
+            assert gemini_client.gemini_generate_content("same prompt") == reply
+            assert post.call_count == 1
+            gemini_client.invalidate_cached_response("same prompt")
+            gemini_client.gemini_generate_content("same prompt")
+            assert post.call_count == 2
@@ -0,0 +1,62 @@
+import pytest
+from app.ai.response_parser import extract_json, parse_model, parse_model_list
+from app.database.models import ScriptResult, ValidationResult
+from app.errors.exceptions import LLMResponseError, LLMResponseSchemaError
+
+
+def gemini_reply(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+@pytest.mark.parametrize("text", [
+    '{"valid": "YES", "relevancy": 7}',
+    '```json\n{"valid": "YES", "relevancy": 7}\n```',
+    'Sure! Here is the result:\n{"valid": "YES", "relevancy": 7}\nLet me know if you need more.',
+    '{\n  "valid": "YES", // the verdict\n  "relevancy": 7, /* 1-10 */\n}',
+    '{“valid”: “YES”, "relevancy": 7,}',
+])
+def test_extract_json_tolerates_common_malformations(text):
+    """
+    Test that fences, surrounding prose, comments, smart quotes and trailing commas are repaired.
+    """
+    assert extract_json(text) == {"valid": "YES", "relevancy": 7}
+
+
+def test_extract_json_rewrites_python_literals_outside_strings():
+    """
+    Test that True/False/None become JSON literals while the same words inside strings are kept.
+    """
+    assert extract_json("{'ok': True, 'note': None}".replace("'", '"')) == {"ok": True, "note": None}
+    assert extract_json('{"reason": "None of the above", "ok": False,}') == {"reason": "None of the above", "ok": False}
+
+
+def test_extract_json_raises_when_nothing_parses():
+    """
+    Test that a reply with no JSON raises LLMResponseError.
+    """
+    with pytest.raises(LLMResponseError):
+        extract_json("not json")
+
+
+def test_parse_model_coerces_fields_and_reports_schema_errors():
+    """
+    Test that parse_model normalizes sentiment and hashtags, and raises LLMResponseSchemaError on missing fields.
+    """
+    reply = gemini_reply('{"sentiment": "Happy", "video_title": "T", "hashtags": "#a, #b", "caption": "c"}')
+    script = parse_model(reply, ScriptResult)
+    assert script.sentiment == "happy"
+    assert script.hashtags == ["#a", "#b"]
+    with pytest.raises(LLMResponseSchemaError):
+        parse_model(gemini_reply('{"sentiment": "happy"}'), ScriptResult)
+    with pytest.raises(LLMResponseError):
+        parse_model(None, ScriptResult)
+
+
+def test_parse_model_list_drops_invalid_items():
+    """
+    Test that parse_model_list keeps valid items, skips invalid ones and unwraps an object holding the array.
+    """
+    reply = gemini_reply('{"results": [{"id": "a", "valid": "YES", "related_to_india": "NO", "relevancy": "8"},'
+                         ' {"id": "b", "valid": "MAYBE"}]}')
+    results = parse_model_list(reply, ValidationResult)
+    assert [(r.id, r.relevancy) for r in results] == [("a", 8)]
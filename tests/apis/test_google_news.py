@@ -52,4 +52,53 @@
 # def test_fetch_google_news_no_api_key(monkeypatch):
 #     monkeypatch.setenv("GOOGLE_NEWS_API_KEY", "")
 #     results = fetch_google_custom_search("test")
-#     assert results == [] 
\ No newline at end of file
+#     assert results == [] 
+
+from unittest.mock import patch
+from app.apis import google_news
+
+
+class MockSearchResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_fetch_google_custom_search_serves_cache_without_spending_quota():
+    """
+    Test that a cached query returns the cached items without a request or quota use.
+    """
+    cached = [{"title": "Cached headline"}]
+    with patch.object(google_news, "GOOGLE_SEARCH_API_KEY", "key"), patch.object(google_news, "GOOGLE_SEARCH_CX", "cx"), \
+            patch.object(google_news, "get_cached_response", return_value=cached), \
+            patch.object(google_news.search_quota, "try_consume") as consume, \
+            patch.object(google_news, "http_get") as get:
+        assert google_news.fetch_google_custom_search("india news") == cached
+    consume.assert_not_called()
+    get.assert_not_called()
+
+
+def test_fetch_google_custom_search_stops_when_quota_is_spent():
+    """
+    Test that no request is made once the daily quota is used up, and a 429 marks the quota exhausted.
+    """
+    with patch.object(google_news, "GOOGLE_SEARCH_API_KEY", "key"), patch.object(google_news, "GOOGLE_SEARCH_CX", "cx"), \
+            patch.object(google_news, "get_cached_response", return_value=None), \
+            patch.object(google_news.search_quota, "try_consume", return_value=False), \
+            patch.object(google_news, "http_get") as get:
+        assert google_news.fetch_google_custom_search("india news") == []
+    get.assert_not_called()
+
+    with patch.object(google_news, "GOOGLE_SEARCH_API_KEY", "key"), patch.object(google_news, "GOOGLE_SEARCH_CX", "cx"), \
+            patch.object(google_news, "get_cached_response", return_value=None), \
+            patch.object(google_news.search_quota, "try_consume", return_value=True), \
+            patch.object(google_news.search_quota, "mark_exhausted") as mark_exhausted, \
+            patch.object(google_news, "http_get", return_value=MockSearchResponse(429)):
+        assert google_news.fetch_google_custom_search("india news") == []
+    mark_exhausted.assert_called_once()
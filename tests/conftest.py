@@ -0,0 +1,30 @@
+import pytest
+from app.ai import gemini_client
+from app.ai.response_cache import ResponseCache
+from app.database.mongo import get_db
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def isolated_gemini_cache(tmp_path, monkeypatch):
+    """Points the Gemini response cache at a per-test file so tests never share cached replies."""
+    cache = ResponseCache(str(tmp_path / "gemini_cache.sqlite3"), ttl_seconds=3600, max_entries=100)
+    monkeypatch.setattr(gemini_client, "response_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_gemini_breaker(monkeypatch):
+    """Gives each test a fresh, non-persisting Gemini circuit breaker."""
+    breaker = CircuitBreaker("gemini", failure_threshold=5, recovery_seconds=60, persist=False)
+    monkeypatch.setattr(gemini_client.gemini_async_client, "breaker", breaker)
+    return breaker
+
+
+@pytest.fixture
+def mongo_db():
+    """The configured MongoDB database, skipping the test when MongoDB is not reachable."""
+    db = get_db()
+    if db is None:
+        pytest.skip("needs a reachable MongoDB at MONGO_URI")
+    return db
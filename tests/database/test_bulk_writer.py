@@ -0,0 +1,54 @@
+"""
+Tests for the batched news writer.
+"""
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+from pymongo.results import InsertManyResult
+from app.database.bulk_writer import BulkNewsWriter
+from app.database.models import UnifiedNewsDoc
+
+
+def make_doc(i: int) -> UnifiedNewsDoc:
+    return UnifiedNewsDoc(headline=f"Headline {i}", article="Body", domain="tech", source="Example",
+                          news_link=f"https://example.com/{i}", created_at=datetime.utcnow(), status="FETCHED")
+
+
+class RecordingCollection:
+    def __init__(self, write_errors=None):
+        self.batches = []
+        self.write_errors = write_errors or []
+
+    def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.batches.append(docs)
+        if self.write_errors:
+            raise BulkWriteError({"nInserted": len(docs) - len(self.write_errors), "writeErrors": self.write_errors})
+        return InsertManyResult([None] * len(docs), True)
+
+
+def test_bulk_writer_flushes_by_size_and_on_exit():
+    """
+    Test that docs are written in batches of flush_size and the remainder is flushed on exit.
+    """
+    collection = RecordingCollection()
+    with BulkNewsWriter(collection, flush_size=2, flush_interval=3600) as writer:
+        writer.add_many([make_doc(i) for i in range(5)])
+        assert [len(b) for b in collection.batches] == [2, 2]
+    assert [len(b) for b in collection.batches] == [2, 2, 1]
+    assert writer.stats == {"inserted": 5, "duplicates": 0, "failed": 0}
+
+
+def test_bulk_writer_classifies_duplicates_per_document():
+    """
+    Test that duplicate-key errors are counted as duplicates and other write errors are reported as failures.
+    """
+    errors = [
+        {"index": 0, "code": 11000, "errmsg": "E11000 duplicate key error"},
+        {"index": 2, "code": 121, "errmsg": "Document failed validation"},
+    ]
+    failed = []
+    writer = BulkNewsWriter(RecordingCollection(errors), flush_size=10, on_failure=failed.append)
+    writer.add_many([make_doc(i) for i in range(3)])
+    writer.flush()
+    assert writer.stats == {"inserted": 1, "duplicates": 1, "failed": 1}
+    assert [doc.headline for doc in failed] == ["Headline 2"]
@@ -0,0 +1,143 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+from pymongo.errors import NetworkTimeout, OperationFailure
+from app.database import indexes
+from app.database.leases import claim_filter, claimed_before, run_cutoff
+from app.database.retries import due_query
+from app.pipelines.scheduler6_publish import PUBLISHABLE_QUERY
+
+# (filter, sort) of every query the pipeline runs against the news collection
+STAGE_QUERIES = {
+    "validate": (due_query(["FETCHED", "ERROR_VALIDATE"]), None),
+    "script": (due_query(["VALID_ARTICLE", "ERROR_SCRIPT"]), [("relevancy", -1), ("created_at", -1)]),
+    "video": (due_query(["SCRIPT_GENERATED", "ERROR_VIDEO"]), [("relevancy", -1)]),
+    "publish": (PUBLISHABLE_QUERY, [("relevancy", -1)]),
+}
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def _winning_stages(cursor) -> list:
+    return list(_plan_stages(cursor.explain()["queryPlanner"]["winningPlan"]))
+
+
+def test_index_names_are_unique_per_collection():
+    """
+    Test that no two registered indexes of a collection share a name.
+    """
+    for name, models in indexes.INDEXES.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), name
+
+
+def test_ensure_collection_indexes_runs_once_per_collection(monkeypatch):
+    """
+    Test that registered indexes are created on first use only, and unregistered collections are ignored.
+    """
+    monkeypatch.setattr(indexes, "_ensured", set())
+    collection = MagicMock()
+    collection.name = "news"
+    collection.full_name = "test_db.news"
+    collection.create_indexes.side_effect = lambda models: [model.document["name"] for model in models]
+    names = [model.document["name"] for model in indexes.INDEXES["news"]]
+    assert indexes.ensure_collection_indexes(collection) == names
+    assert indexes.ensure_collection_indexes(collection) == []
+    assert collection.create_indexes.call_count == len(names)
+    other = MagicMock()
+    other.name = "event_runner_state"
+    assert indexes.ensure_collection_indexes(other) == []
+    other.create_indexes.assert_not_called()
+
+
+def test_a_failing_index_does_not_block_the_others_and_is_not_retried(monkeypatch):
+    """
+    Test that an index that cannot be built is logged and skipped, the rest are created, and the
+    collection is not attempted again on the next call.
+    """
+    monkeypatch.setattr(indexes, "_ensured", set())
+    collection = MagicMock()
+    collection.name = "news"
+    collection.full_name = "test_db.news"
+
+    def create_indexes(models):
+        name = models[0].document["name"]
+        if name == "normalized_link_unique":
+            raise OperationFailure("E11000 duplicate key error", code=11000)
+        return [name]
+
+    collection.create_indexes.side_effect = create_indexes
+    names = indexes.ensure_collection_indexes(collection)
+    assert "normalized_link_unique" not in names
+    assert "status_next_attempt_at" in names and "created_at" in names
+    calls = collection.create_indexes.call_count
+    assert indexes.ensure_collection_indexes(collection) == []
+    assert collection.create_indexes.call_count == calls
+
+
+def test_indexes_that_failed_transiently_are_retried_on_next_use(monkeypatch):
+    """
+    Test that a network error at startup does not mark the indexes as ensured, so a later call creates them.
+    """
+    monkeypatch.setattr(indexes, "_ensured", set())
+    collection = MagicMock()
+    collection.name = "news"
+    collection.full_name = "test_db.news"
+    collection.create_indexes.side_effect = NetworkTimeout("timed out")
+    assert indexes.ensure_collection_indexes(collection) == []
+    collection.create_indexes.side_effect = lambda models: [model.document["name"] for model in models]
+    assert len(indexes.ensure_collection_indexes(collection)) == len(indexes.INDEXES["news"])
+    assert indexes.ensure_collection_indexes(collection) == []
+
+
+@pytest.fixture
+def news_collection(mongo_db, monkeypatch):
+    monkeypatch.setattr(indexes, "_ensured", set())
+    collection = mongo_db["test_indexes_news"]
+    collection.drop()
+    indexes.ensure_collection_indexes(collection, spec="news")
+    now = datetime.utcnow()
+    collection.insert_many([
+        {"status": status, "relevancy": n, "created_at": now, "normalized_link": f"https://example.com/{status}/{n}",
+         "simhash_bands": [f"0:{n}", f"1:{n}"]}
+        for n in range(20) for status in ["FETCHED", "VALID_ARTICLE", "SCRIPT_GENERATED", "VIDEO_GENERATED", "POSTED"]
+    ])
+    yield collection
+    collection.drop()
+
+
+@pytest.mark.parametrize("stage", sorted(STAGE_QUERIES))
+def test_stage_claim_queries_use_an_index(news_collection, stage):
+    """
+    Test against MongoDB that each stage's claim query is answered from an index, not a collection scan.
+    """
+    query, sort = STAGE_QUERIES[stage]
+    cursor = news_collection.find(claim_filter({"$and": [query, claimed_before(run_cutoff())]})).limit(1)
+    if sort:
+        cursor = cursor.sort(sort)
+    stages = _winning_stages(cursor)
+    assert "COLLSCAN" not in stages
+    assert "IXSCAN" in stages
+
+
+def test_read_queries_use_an_index(news_collection):
+    """
+    Test against MongoDB that /top_news, the dedup warm-up and near-duplicate lookups avoid collection scans.
+    """
+    cursors = [
+        news_collection.find({"status": {"$in": ["VIDEO_GENERATED", "POSTED"]}})
+        .sort([("relevancy", -1), ("created_at", -1)]).limit(10),
+        news_collection.find({"normalized_link": {"$exists": True}}).sort("created_at", -1).limit(100),
+        news_collection.find({"simhash_bands": {"$in": ["0:1", "1:2"]}, "created_at": {"$gte": datetime(2020, 1, 1)}}),
+    ]
+    for cursor in cursors:
+        assert "COLLSCAN" not in _winning_stages(cursor)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from app.database import leases
+
+
+def test_claim_next_only_matches_unleased_or_expired_docs():
+    """
+    Test that a claim is one find_one_and_update limited to free or expired leases that records owner and expiry.
+    """
+    collection = MagicMock()
+    leases.claim_next(collection, {"status": "FETCHED"}, sort=[("relevancy", -1)], owner="w1", lease_seconds=60)
+    query, update = collection.find_one_and_update.call_args.args
+    assert query["$and"][0] == {"status": "FETCHED"}
+    assert query["$and"][1]["$or"][0] == {"lease_expires_at": None}
+    fields = update["$set"]
+    assert fields["lease_owner"] == "w1"
+    assert fields["lease_expires_at"] - fields["heartbeat_at"] == timedelta(seconds=60)
+    assert collection.find_one_and_update.call_args.kwargs["sort"] == [("relevancy", -1)]
+
+
+def test_claim_each_yields_each_doc_once_and_releases_it():
+    """
+    Test that claim_each skips docs claimed since the run started, passes the projection and
+    releases every lease it took.
+    """
+    collection = MagicMock()
+    collection.find_one_and_update.side_effect = [{"_id": 1}, {"_id": 2}, None]
+    docs = leases.claim_each(collection, {"status": "FETCHED"}, owner="w1", projection={"headline": 1})
+    assert [doc["_id"] for doc in docs] == [1, 2]
+    query = collection.find_one_and_update.call_args.args[0]
+    run_filter = query["$and"][0]["$and"][1]["$or"]
+    assert run_filter[0] == {"claimed_at": None}
+    assert run_filter[1]["claimed_at"]["$lt"].microsecond % 1000 == 0
+    assert collection.find_one_and_update.call_args.kwargs["projection"] == {"headline": 1}
+    released = [c.args[0]["_id"] for c in collection.update_one.call_args_list if "$unset" in c.args[1]]
+    assert released == [1, 2]
+
+
+def test_leases_are_exclusive_and_expired_leases_are_reclaimed(mongo_db):
+    """
+    Test against MongoDB that a leased doc cannot be claimed by another worker until its lease expires.
+    """
+    collection = mongo_db["test_leases"]
+    collection.drop()
+    collection.insert_one({"_id": "doc-1", "status": "FETCHED"})
+    assert leases.claim_next(collection, {"status": "FETCHED"}, owner="w1")["lease_owner"] == "w1"
+    assert leases.claim_next(collection, {"status": "FETCHED"}, owner="w2") is None
+    assert leases.heartbeat(collection, "doc-1", owner="w2") is False
+    collection.update_one({"_id": "doc-1"}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+    assert leases.claim_next(collection, {"status": "FETCHED"}, owner="w2")["lease_owner"] == "w2"
+    collection.drop()
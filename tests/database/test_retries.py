@@ -0,0 +1,49 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from app.database import retries
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    """
+    Test that the backoff doubles per attempt and never exceeds RETRY_BACKOFF_MAX_SECONDS.
+    """
+    with patch.object(retries.settings, "RETRY_BACKOFF_BASE_SECONDS", 60), \
+            patch.object(retries.settings, "RETRY_BACKOFF_MAX_SECONDS", 300):
+        assert [retries.retry_delay_seconds(n) for n in (1, 2, 3, 4)] == [60, 120, 240, 300]
+
+
+def test_mark_failed_schedules_retry_then_dead_letters():
+    """
+    Test that failures increment attempts with a future next_attempt_at until the last allowed attempt.
+    """
+    collection = MagicMock()
+    with patch.object(retries.settings, "RETRY_MAX_ATTEMPTS", 3):
+        status = retries.mark_failed(collection, {"_id": 1, "attempts": 1}, "ERROR_SCRIPT", "boom", "GEMINI_SCRIPT_ERROR")
+        fields = collection.update_one.call_args.args[1]["$set"]
+        assert status == "ERROR_SCRIPT"
+        assert fields["attempts"] == 2
+        assert fields["next_attempt_at"] > datetime.utcnow()
+
+        status = retries.mark_failed(collection, {"_id": 1, "attempts": 2}, "ERROR_SCRIPT", "boom")
+        fields = collection.update_one.call_args.args[1]["$set"]
+        assert status == retries.DEAD_LETTER
+        assert fields["dead_letter_from"] == "ERROR_SCRIPT"
+        assert fields["next_attempt_at"] is None
+
+
+def test_permanent_failures_go_straight_to_dead_letter():
+    """
+    Test that a permanent error dead-letters the doc on its first failure.
+    """
+    collection = MagicMock()
+    assert retries.mark_failed(collection, {"_id": 1}, "ERROR_VIDEO", "missing", permanent=True) == retries.DEAD_LETTER
+
+
+def test_due_query_excludes_docs_still_backing_off():
+    """
+    Test that the stage query only matches docs without next_attempt_at or whose next attempt is due.
+    """
+    query = retries.due_query(["ERROR_VIDEO"])
+    assert query["status"] == {"$in": ["ERROR_VIDEO"]}
+    assert query["$or"][0] == {"next_attempt_at": None}
+    assert query["$or"][1]["next_attempt_at"]["$lte"] <= datetime.utcnow()
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import pytest
+from app.media import asset_cache
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    """Background clips and the asset cache in tmp_path, with ffmpeg replaced by a copy that counts transcodes."""
+    clips, cache_dir = tmp_path / "clips", tmp_path / "cache"
+    (clips / "tech" / "happy").mkdir(parents=True)
+    monkeypatch.setattr(asset_cache.settings, "BACKGROUND_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(asset_cache, "_failed", set())
+    transcodes = []
+
+    def fake_run(cmd, **kwargs):
+        transcodes.append(cmd)
+        with open(cmd[cmd.index("-i") + 1], "rb") as src, open(cmd[-1], "wb") as out:
+            out.write(b"canonical:" + src.read())
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    monkeypatch.setattr(asset_cache.subprocess, "run", fake_run)
+    return clips, cache_dir, transcodes
+
+
+def test_clips_are_transcoded_once_and_rebuilt_when_the_source_changes(cache):
+    """
+    Test that a clip is transcoded on first use only, and a changed clip gets a new cache entry.
+    """
+    clips, cache_dir, transcodes = cache
+    clip = clips / "tech" / "happy" / "happy_tech.mp4"
+    clip.write_bytes(b"v1")
+    first = asset_cache.prepare_background(str(clip))
+    assert asset_cache.prepare_background(str(clip)) == first
+    assert len(transcodes) == 1
+    assert "scale=1080:1920" in transcodes[0][transcodes[0].index("-vf") + 1]
+    clip.write_bytes(b"v2-changed")
+    second = asset_cache.prepare_background(str(clip))
+    assert second != first
+    assert len(transcodes) == 2
+    assert open(second, "rb").read() == b"canonical:v2-changed"
+
+
+def test_prepare_all_prunes_stale_entries(cache):
+    """
+    Test that prepare_all prepares every clip in every resolution and removes cache entries of changed clips.
+    """
+    clips, cache_dir, _ = cache
+    clip = clips / "tech" / "happy" / "happy_tech.mp4"
+    clip.write_bytes(b"v1")
+    stale = asset_cache.prepare_background(str(clip))
+    clip.write_bytes(b"v2-changed")
+    prepared = asset_cache.prepare_all(str(clips), resolutions=["1080x1920", "540x960"])
+    assert list(prepared) == [str(clip)]
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(path) for path in prepared[str(clip)])
+    assert len(prepared[str(clip)]) == 2
+    assert not os.path.exists(stale)
+
+
+def test_cached_background_falls_back_to_the_source_on_ffmpeg_failure(cache, monkeypatch):
+    """
+    Test that a failed transcode leaves no cache entry, lets the render use the source clip and is
+    not retried until the clip changes.
+    """
+    clips, cache_dir, _ = cache
+    clip = clips / "tech" / "happy" / "happy_tech.mp4"
+    clip.write_bytes(b"broken")
+    attempts = []
+    monkeypatch.setattr(asset_cache.subprocess, "run",
+                        lambda cmd, **kwargs: attempts.append(cmd) or subprocess.CompletedProcess(cmd, 1, stderr="moov atom not found"))
+    assert asset_cache.cached_background(str(clip)) is None
+    assert os.listdir(cache_dir) == []
+    # The failure is remembered until the clip changes
+    assert asset_cache.cached_background(str(clip)) is None
+    assert len(attempts) == 1
+    clip.write_bytes(b"fixed")
+    assert asset_cache.cached_background(str(clip)) is None
+    assert len(attempts) == 2
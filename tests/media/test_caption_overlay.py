@@ -0,0 +1,53 @@
+import os
+import subprocess
+from PIL import Image
+from app.media import caption_overlay, ffmpeg_utils
+from app.pipelines.scheduler5_video_gen import FONT_PATH
+
+CAPTION = "Sensex closes at a record high as IT stocks rally on strong quarterly results and global cues"
+
+
+def test_wrap_caption_fits_lines_to_measured_width():
+    """
+    Test that every wrapped line fits the width, no words are lost and overlong words are split.
+    """
+    font = caption_overlay.load_font(FONT_PATH, 80)
+    lines = caption_overlay.wrap_caption(CAPTION, font, 600)
+    assert len(lines) > 1
+    assert all(font.getlength(line) <= 600 for line in lines)
+    assert " ".join(lines) == CAPTION
+    assert all(font.getlength(line) <= 200 for line in caption_overlay.wrap_caption("Supercalifragilistic", font, 200))
+
+
+def test_render_caption_overlay_writes_a_full_frame_dimming_layer(tmp_path):
+    """
+    Test that the PNG covers the frame, is dimmed at the given opacity and has the caption in the middle.
+    """
+    output = tmp_path / "caption.png"
+    caption_overlay.render_caption_overlay(CAPTION, FONT_PATH, str(output), "1080x1920", overlay_opacity=0.5)
+    image = Image.open(output)
+    assert image.mode == "RGBA" and image.size == (1080, 1920)
+    assert image.getpixel((5, 5)) == (0, 0, 0, 128)
+    assert max(image.crop((0, 800, 1080, 1120)).getdata()) == (255, 255, 255, 255)
+
+
+def test_overlay_renderer_composites_the_png_with_one_overlay_filter(monkeypatch, tmp_path):
+    """
+    Test that the default renderer feeds the caption PNG as a third input to a single overlay filter.
+    """
+    monkeypatch.setattr(ffmpeg_utils.settings, "BACKGROUND_CACHE_ENABLED", False)
+    monkeypatch.setattr(ffmpeg_utils.settings, "CAPTION_RENDERER", "overlay")
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        calls.append((cmd, os.path.exists(os.path.join(cwd, ffmpeg_utils.CAPTION_PNG))))
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    monkeypatch.setattr(ffmpeg_utils.subprocess, "run", fake_run)
+    ffmpeg_utils.generate_video_with_overlay_and_caption("bg.mp4", "bg.mp3", FONT_PATH, CAPTION, str(tmp_path / "out.mp4"))
+    (cmd, png_written), = calls
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert png_written
+    assert cmd.count("-i") == 3 and ffmpeg_utils.CAPTION_PNG in cmd
+    assert graph.count("overlay=") == 1
+    assert "subtitles" not in graph and "drawbox" not in graph
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import threading
+import time
+import pytest
+from app.errors.exceptions import VideoRenderError
+from app.media import ffmpeg_utils, render_pool
+
+
+def test_render_plan_splits_cores_between_renders(monkeypatch):
+    """
+    Test that the pool size follows RENDER_TARGET_THREADS when auto and x264 threads share the cores.
+    """
+    monkeypatch.setattr(render_pool.settings, "RENDER_POOL_SIZE", 0)
+    monkeypatch.setattr(render_pool.settings, "RENDER_TARGET_THREADS", 4)
+    monkeypatch.setattr(render_pool.settings, "RENDER_DEFAULT_PROFILE", "final")
+    assert render_pool.render_plan(cores=16) == render_pool.RenderPlan(workers=4, threads=4)
+    assert render_pool.render_plan(cores=2) == render_pool.RenderPlan(workers=1, threads=2)
+    assert render_pool.render_plan(cores=8, pool_size=3) == render_pool.RenderPlan(workers=3, threads=2)
+    assert render_pool.render_plan(cores=2, pool_size=4) == render_pool.RenderPlan(workers=4, threads=1)
+
+
+@pytest.mark.parametrize("tier", ["preview", "final"])
+@pytest.mark.parametrize("cores", [4, 8, 16])
+def test_render_plan_fills_the_cores_for_each_tier(monkeypatch, tier, cores):
+    """
+    Test that with either tier as the default profile, parallel renders times their x264 threads use every core.
+    """
+    monkeypatch.setattr(render_pool.settings, "RENDER_POOL_SIZE", 0)
+    monkeypatch.setattr(render_pool.settings, "RENDER_TARGET_THREADS", 4)
+    monkeypatch.setattr(render_pool.settings, "RENDER_DEFAULT_PROFILE", tier)
+    plan = render_pool.render_plan(cores=cores)
+    assert plan.workers * plan.threads == cores
+    if tier == "preview":
+        assert plan.threads == render_pool.get_render_profile("preview").threads
+
+
+def test_run_render_jobs_runs_in_parallel_up_to_limit():
+    """
+    Test that jobs overlap across workers, stop at the limit and stop early once next_job runs dry.
+    """
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def job():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return True
+
+    assert render_pool.run_render_jobs(job, limit=5, workers=3) == {"succeeded": 5, "failed": 0}
+    assert peak[0] == 3
+
+    remaining = iter([True, True])
+    assert render_pool.run_render_jobs(lambda: next(remaining, None), limit=10, workers=2) == {"succeeded": 2, "failed": 0}
+
+
+def test_run_render_jobs_counts_failed_renders_separately():
+    """
+    Test that renders reporting failure, or raising, are counted as failed rather than rendered.
+    """
+    outcomes = iter([True, False, True, False])
+    assert render_pool.run_render_jobs(lambda: next(outcomes, None), limit=10, workers=1) == {"succeeded": 2, "failed": 2}
+
+    def crash():
+        raise RuntimeError("ffmpeg missing")
+
+    assert render_pool.run_render_jobs(crash, limit=3, workers=1) == {"succeeded": 0, "failed": 1}
+
+
+def test_renders_use_separate_workspaces_and_raise_on_ffmpeg_failure(monkeypatch, tmp_path):
+    """
+    Test that each render writes its subtitles into its own temp dir, passes x264 threads and
+    raises VideoRenderError with ffmpeg's stderr when ffmpeg fails.
+    """
+    workspaces = tmp_path / "renders"
+    workspaces.mkdir()
+    monkeypatch.setattr(render_pool.settings, "RENDER_TMP_DIR", str(workspaces))
+    monkeypatch.setattr(render_pool.settings, "BACKGROUND_CACHE_ENABLED", False)
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        with open(os.path.join(cwd, ffmpeg_utils.CAPTION_SRT)) as f:
+            calls.append((cmd, cwd, f.read()))
+        return subprocess.CompletedProcess(cmd, 0 if len(calls) == 1 else 1, stderr="Invalid data found")
+
+    monkeypatch.setattr(ffmpeg_utils.subprocess, "run", fake_run)
+    render = dict(background_video_path="bg.mp4", background_music_path="bg.mp3", font_path="font.ttf",
+                  caption_renderer="subtitles")
+    ffmpeg_utils.generate_video_with_overlay_and_caption(caption="first", output_path="a.mp4", threads=3, **render)
+    with pytest.raises(VideoRenderError, match="Invalid data found"):
+        ffmpeg_utils.generate_video_with_overlay_and_caption(caption="second", output_path="b.mp4", **render)
+    (cmd, first_dir, srt), (_, second_dir, _) = calls
+    assert first_dir != second_dir
+    assert "first" in srt
+    assert cmd[cmd.index("-threads") + 1] == "3"
+    assert "scale=1080:1920" in cmd[cmd.index("-filter_complex") + 1]
+    assert os.listdir(workspaces) == []
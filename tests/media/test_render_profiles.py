@@ -0,0 +1,38 @@
+import subprocess
+import pytest
+from app.media import ffmpeg_utils, render_pool, render_profiles
+from app.pipelines.scheduler5_video_gen import FONT_PATH
+
+
+def test_get_render_profile_defaults_to_setting_and_rejects_unknown_names(monkeypatch):
+    """
+    Test that articles without a profile get RENDER_DEFAULT_PROFILE and unknown names raise.
+    """
+    monkeypatch.setattr(render_profiles.settings, "RENDER_DEFAULT_PROFILE", "preview")
+    assert render_profiles.get_render_profile(None).name == render_profiles.PREVIEW
+    assert render_profiles.get_render_profile("final").resolution == "1080x1920"
+    with pytest.raises(ValueError):
+        render_profiles.get_render_profile("4k")
+
+
+def test_render_uses_profile_resolution_encoder_settings_and_duration_cap(monkeypatch, tmp_path):
+    """
+    Test that the ffmpeg command scales to the profile's size, encodes with its preset, CRF and
+    threads and cuts the reel at its max duration.
+    """
+    monkeypatch.setattr(ffmpeg_utils.settings, "BACKGROUND_CACHE_ENABLED", False)
+    monkeypatch.setattr(ffmpeg_utils.settings, "RENDER_POOL_SIZE", 0)
+    monkeypatch.setattr(ffmpeg_utils.settings, "RENDER_DEFAULT_PROFILE", "preview")
+    monkeypatch.setattr(render_pool, "available_cores", lambda: 8)
+    commands = []
+    monkeypatch.setattr(ffmpeg_utils.subprocess, "run",
+                        lambda cmd, **kwargs: commands.append(cmd) or subprocess.CompletedProcess(cmd, 0, stderr=""))
+    preview = render_profiles.RENDER_PROFILES[render_profiles.PREVIEW]
+    ffmpeg_utils.generate_video_with_overlay_and_caption("bg.mp4", "bg.mp3", FONT_PATH, "caption",
+                                                         str(tmp_path / "out.mp4"), profile=preview)
+    cmd, = commands
+    assert "scale=540:960" in cmd[cmd.index("-filter_complex") + 1]
+    assert cmd[cmd.index("-preset") + 1] == preview.preset
+    assert cmd[cmd.index("-crf") + 1] == str(preview.crf)
+    assert cmd[cmd.index("-threads") + 1] == str(preview.threads)
+    assert float(cmd[cmd.index("-t") + 1]) == preview.max_duration_seconds
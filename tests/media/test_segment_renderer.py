@@ -0,0 +1,75 @@
+import subprocess
+import pytest
+from app.database.models import ScriptSlide
+from app.media import segment_renderer
+from app.pipelines.scheduler5_video_gen import FONT_PATH
+
+
+def slide(n, text, start_ms, end_ms):
+    return ScriptSlide(slide=n, text=text, image_query="", start_ms=start_ms, end_ms=end_ms)
+
+
+def test_plan_segments_covers_the_reel_without_gaps():
+    """
+    Test that slides are ordered, gaps are absorbed by the previous slide and empty slides are dropped.
+    """
+    slides = [slide(2, "b", 4000, 7990), slide(1, "a", 200, 3500), slide(3, "c", 7990, 8000)]
+    assert segment_renderer.plan_segments(slides, 30) == [
+        segment_renderer.Segment("a", 0, 120),
+        segment_renderer.Segment("b", 120, 120),
+    ]
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch, tmp_path):
+    """Segment cache in tmp_path and ffmpeg/ffprobe replaced by fakes that record their commands."""
+    monkeypatch.setattr(segment_renderer.settings, "SEGMENT_CACHE_DIR", str(tmp_path / "segments"))
+    monkeypatch.setattr(segment_renderer.settings, "BACKGROUND_CACHE_ENABLED", False)
+    monkeypatch.setattr(segment_renderer.settings, "RENDER_TMP_DIR", None)
+    commands = []
+
+    def fake_run(cmd, cwd=None, **kwargs):
+        if cmd[0] == "ffprobe":
+            return subprocess.CompletedProcess(cmd, 0, stdout="5.0\n", stderr="")
+        output = cmd[-1]
+        if "concat" in cmd:
+            with open(f"{cwd}/{segment_renderer.CONCAT_LIST}") as f:
+                cmd.append(f.read())
+        commands.append(cmd)
+        open(output, "wb").close()
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    monkeypatch.setattr(segment_renderer.subprocess, "run", fake_run)
+    background = tmp_path / "bg.mp4"
+    background.write_bytes(b"background")
+    return commands, str(background), str(tmp_path / "reel.mp4")
+
+
+def test_render_slides_reuses_unchanged_segments(fake_ffmpeg):
+    """
+    Test that segments are encoded once, joined without re-encoding with the music muxed once, and
+    that editing one slide only encodes that slide again.
+    """
+    commands, background, output = fake_ffmpeg
+    slides = [slide(1, "one", 0, 4000), slide(2, "two", 4000, 8000), slide(3, "three", 8000, 12000)]
+    segment_renderer.render_slides(background, "music.mp3", FONT_PATH, slides, output, threads=4)
+    encodes = [cmd for cmd in commands if "concat" not in cmd]
+    concat = [cmd for cmd in commands if "concat" in cmd]
+    assert len(encodes) == 3 and len(concat) == 1
+    assert all("music.mp3" not in " ".join(cmd) for cmd in encodes)
+    assert concat[0][concat[0].index("-c:v") + 1] == "copy"
+    # The second slide starts at 4s, the third wraps around the 5s clip
+    offsets = sorted(cmd[cmd.index("-ss") + 1] for cmd in encodes)
+    assert offsets == ["0.000000", "3.000000", "4.000000"]
+    first_list = concat[0][-1]
+
+    commands.clear()
+    slides[1] = slide(2, "two, edited", 4000, 8000)
+    segment_renderer.render_slides(background, "music.mp3", FONT_PATH, slides, output, threads=4)
+    encodes = [cmd for cmd in commands if "concat" not in cmd]
+    assert len(encodes) == 1
+    assert encodes[0][encodes[0].index("-ss") + 1] == "4.000000"
+    second_list = [cmd for cmd in commands if "concat" in cmd][0][-1]
+    first_files, second_files = first_list.splitlines(), second_list.splitlines()
+    assert first_files[0] == second_files[0] and first_files[2] == second_files[2]
+    assert first_files[1] != second_files[1]
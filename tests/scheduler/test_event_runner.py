@@ -0,0 +1,171 @@
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+from pymongo.errors import OperationFailure
+from app.database.mongo import get_db, mongo_client
+from app.scheduler import event_runner
+from app.errors.exceptions import CircuitOpenError
+from app.scheduler.event_runner import CHANGE_STREAMS_UNSUPPORTED, EventRunner
+
+
+class StandaloneCollection:
+    """Minimal news collection on a deployment without change streams; every lease claim succeeds."""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=CHANGE_STREAMS_UNSUPPORTED)
+
+    def find(self, query, projection=None, batch_size=None):
+        statuses = query["status"]["$in"]
+        return FakeCursor([doc for doc in self.docs if doc["status"] in statuses])
+
+    def find_one_and_update(self, query, update, **kwargs):
+        return next(doc for doc in self.docs if doc["_id"] == query["$and"][0]["_id"])
+
+    def update_one(self, query, update):
+        return MagicMock(matched_count=1)
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+
+class FakeStream:
+    """Change stream that yields the given changes once each."""
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.alive = True
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def try_next(self):
+        change = self.changes.pop(0)
+        self.resume_token = {"_data": change["fullDocument"]["_id"]}
+        return change
+
+
+def replica_set_db():
+    """Returns the test database if MONGO_URI points at a replica set, else None."""
+    client = getattr(mongo_client, "_client", None)
+    if client is None:
+        return None
+    try:
+        return get_db() if client.admin.command("hello").get("setName") else None
+    except Exception:
+        return None
+
+
+def test_dispatch_routes_documents_by_status():
+    """
+    Test that each document goes to the handler registered for its current status and others are ignored.
+    """
+    calls = []
+    collection = StandaloneCollection([{"_id": 1, "status": "FETCHED"}])
+    runner = EventRunner(collection, handlers={"FETCHED": (lambda c, d: calls.append(("validate", d["_id"])), None)})
+    assert runner.dispatch({"_id": 1, "status": "FETCHED"}) is True
+    assert runner.dispatch({"_id": 2, "status": "POSTED"}) is False
+    assert runner.dispatch(None) is False
+    assert calls == [("validate", 1)]
+
+
+def test_dispatch_skips_documents_leased_elsewhere():
+    """
+    Test that a document another worker has already claimed is not handled again.
+    """
+    calls = []
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = None
+    runner = EventRunner(collection, handlers={"FETCHED": (lambda c, d: calls.append(d["_id"]), None)})
+    assert runner.dispatch({"_id": 1, "status": "FETCHED"}) is False
+    assert calls == []
+
+
+def test_stage_handlers_use_configured_stages():
+    """
+    Test that only the enabled stages are wired and unknown names are skipped.
+    """
+    handlers = event_runner.stage_handlers(["validate", "publish", "bogus"])
+    assert set(handlers) == {"FETCHED", "VIDEO_GENERATED"}
+
+
+def test_documents_skipped_while_a_circuit_is_open_are_swept_before_the_token_advances(monkeypatch):
+    """
+    Test that a document whose handler hit an open circuit is handled again once the circuit may
+    have closed, before the resume token moves past its event.
+    """
+    doc = {"_id": 1, "status": "VALID_ARTICLE"}
+    collection = StandaloneCollection([doc])
+    collection.watch = lambda *args, **kwargs: FakeStream([{"fullDocument": doc}])
+    events = []
+    state = MagicMock()
+    state.find_one.return_value = {"resume_token": {"_data": 0}}
+    state.update_one.side_effect = lambda query, update, upsert: events.append(("token", update["$set"]["resume_token"]))
+    monkeypatch.setattr(event_runner.time, "sleep", lambda seconds: events.append(("sleep", seconds)))
+
+    def handle(collection, doc):
+        if not any(event[0] == "sleep" for event in events):
+            events.append(("circuit open", doc["_id"]))
+            raise CircuitOpenError("gemini", retry_in=30)
+        events.append(("handled", doc["_id"]))
+
+    runner = EventRunner(collection, state, handlers={"VALID_ARTICLE": (handle, None)})
+    runner.watch(max_events=1)
+    assert events == [("circuit open", 1), ("sleep", 30), ("handled", 1), ("token", {"_data": 1})]
+
+
+def test_publish_is_not_an_event_stage_by_default():
+    """
+    Test that the default stages leave posting to the rate-limited cron job.
+    """
+    assert "VIDEO_GENERATED" not in event_runner.stage_handlers()
+
+
+def test_run_falls_back_to_polling_without_change_streams():
+    """
+    Test that a standalone deployment (error 40573) is handled by polling for waiting documents.
+    """
+    handled = []
+    runner = EventRunner(StandaloneCollection([{"_id": 1, "status": "FETCHED"}, {"_id": 2, "status": "POSTED"}]),
+                         poll_interval=0)
+
+    def handle(collection, doc):
+        handled.append(doc["_id"])
+        runner.stop()
+
+    runner.handlers = {"FETCHED": (handle, None)}
+    runner.run()
+    assert handled == [1]
+
+
+@pytest.mark.skipif(replica_set_db() is None, reason="needs MONGO_URI pointing at a MongoDB replica set")
+def test_change_stream_hands_off_and_resumes_from_token():
+    """
+    Test against a local replica set that a status change is dispatched and the resume token is stored.
+    """
+    db = replica_set_db()
+    news, state = db["test_event_runner_news"], db["test_event_runner_state"]
+    news.drop()
+    state.drop()
+    handled = []
+    runner = EventRunner(news, state, handlers={"FETCHED": (lambda c, d: handled.append(d["_id"]), None)}, name="test")
+    watcher = threading.Thread(target=runner.watch, kwargs={"max_events": 1})
+    watcher.start()
+    time.sleep(1)
+    news.insert_one({"_id": "doc-1", "status": "FETCHED"})
+    watcher.join(timeout=30)
+    runner.stop()
+    assert handled == ["doc-1"]
+    assert runner.load_resume_token() is not None
+    news.drop()
+    state.drop()
@@ -0,0 +1,186 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from app.scheduler.pipeline_runner import PipelineRunner, PipelineStage
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return FakeCursor(self[:n])
+
+
+class FakeNewsCollection:
+    """In-memory news collection covering the queries the pipeline runner and leases issue."""
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _matches(doc, query):
+        if "$and" in query:
+            return all(FakeNewsCollection._matches(doc, part) for part in query["$and"])
+        for key, value in query.items():
+            if key == "$or":
+                continue  # retry and lease conditions: every test doc is due and unleased
+            if isinstance(value, dict) and "$in" in value:
+                if doc.get(key) not in value["$in"]:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    def find(self, query, projection=None, batch_size=None):
+        with self.lock:
+            return FakeCursor(dict(doc) for doc in self.docs.values() if self._matches(doc, query))
+
+    def find_one_and_update(self, query, update, **kwargs):
+        with self.lock:
+            for doc in self.docs.values():
+                if self._matches(doc, query) and not doc.get("lease_owner"):
+                    doc.update(update["$set"])
+                    return dict(doc)
+        return None
+
+    def update_one(self, query, update):
+        with self.lock:
+            doc = self.docs.get(query["_id"])
+            matched = doc is not None and self._matches(doc, query)
+            if matched:
+                doc.update(update.get("$set", {}))
+                for key in update.get("$unset", {}):
+                    doc.pop(key, None)
+        return MagicMock(matched_count=int(matched))
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+
+def advance_to(status, delay):
+    def handler(collection, doc):
+        time.sleep(delay)
+        collection.update_one({"_id": doc["_id"]}, {"$set": {"status": status}})
+    return handler
+
+
+def build_stages(delay, batch_handler=None):
+    return [
+        PipelineStage("validate", ["FETCHED"], advance_to("VALID_ARTICLE", delay), batch_handler=batch_handler,
+                      batch_size=3 if batch_handler else 1),
+        PipelineStage("script", ["VALID_ARTICLE"], advance_to("SCRIPT_GENERATED", delay)),
+        PipelineStage("video", ["SCRIPT_GENERATED"], advance_to("VIDEO_GENERATED", delay), limit=3),
+    ]
+
+
+def test_pipeline_overlaps_stages_with_backpressure():
+    """
+    Test that documents flow through every stage with a queue of one, and the run takes about
+    the slowest stage rather than the sum of all stages.
+    """
+    collection = FakeNewsCollection([{"_id": i, "status": "FETCHED"} for i in range(4)])
+    delay = 0.1
+    started = time.monotonic()
+    counts = PipelineRunner(collection, build_stages(delay), queue_size=1).run()
+    elapsed = time.monotonic() - started
+    assert counts == {"validate": 4, "script": 4, "video": 3}
+    statuses = sorted(doc["status"] for doc in collection.docs.values())
+    assert statuses == ["SCRIPT_GENERATED"] + ["VIDEO_GENERATED"] * 3
+    assert elapsed < 3 * 4 * delay * 0.8
+    assert not any(doc.get("lease_owner") for doc in collection.docs.values())
+
+
+def test_pipeline_batches_queued_ids_and_seeds_every_stage():
+    """
+    Test that a batch handler receives several queued docs at once and that docs already waiting
+    at later stages are picked up too.
+    """
+    docs = [{"_id": i, "status": "FETCHED"} for i in range(3)] + [{"_id": "late", "status": "VALID_ARTICLE"}]
+    collection = FakeNewsCollection(docs)
+    batches = []
+
+    def validate_batch(collection, docs):
+        batches.append(len(docs))
+        for doc in docs:
+            collection.update_one({"_id": doc["_id"]}, {"$set": {"status": "VALID_ARTICLE"}})
+
+    counts = PipelineRunner(collection, build_stages(0, validate_batch), queue_size=10).run()
+    assert counts["validate"] == 3
+    assert counts["script"] == 4
+    assert sum(batches) == 3
+
+
+def test_next_batch_takes_what_is_queued_and_leaves_the_sentinel():
+    """
+    Test that a worker batches up to batch_size queued ids without waiting and leaves the sentinel for the next get.
+    """
+    stages = build_stages(0, batch_handler=lambda c, docs: None)
+    runner = PipelineRunner(FakeNewsCollection([]), stages, queue_size=10)
+    stage = stages[0]
+    for doc_id in ("a", "b"):
+        stage.inbox.put(doc_id)
+    runner._producer_done(stage)
+    assert runner._next_batch(stage) == ["a", "b"]
+    assert runner._next_batch(stage) is None
+
+
+class FlakyNewsCollection(FakeNewsCollection):
+    """Fails the first claim of one document and the first forward of another, like transient MongoDB errors."""
+    def __init__(self, docs, failing_claim, failing_forward):
+        super().__init__(docs)
+        self.failing_claim, self.failing_forward = failing_claim, failing_forward
+
+    def find_one_and_update(self, query, update, **kwargs):
+        if query["$and"][0]["_id"] == self.failing_claim:
+            self.failing_claim = None
+            raise RuntimeError("connection reset")
+        return super().find_one_and_update(query, update, **kwargs)
+
+    def find(self, query, projection=None, batch_size=None):
+        if self.failing_forward in query.get("_id", {}).get("$in", []):
+            self.failing_forward = None
+            raise RuntimeError("connection reset")
+        return super().find(query, projection, batch_size)
+
+
+def test_pipeline_survives_database_errors_mid_run():
+    """
+    Test that a failing claim or forward costs only its batch: the run still finishes, the other
+    documents flow through, and no lease is left behind.
+    """
+    collection = FlakyNewsCollection([{"_id": i, "status": "FETCHED"} for i in range(4)],
+                                     failing_claim=1, failing_forward=2)
+    stages = build_stages(0)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(PipelineRunner(collection, stages, queue_size=1).run()),
+                              daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "run() hung after a database error"
+    # Each failure strands one document in its current status until the next run
+    assert collection.docs[1]["status"] == "FETCHED"
+    assert collection.docs[2]["status"] == "VALID_ARTICLE"
+    assert [collection.docs[n]["status"] for n in (0, 3)] == ["VIDEO_GENERATED"] * 2
+    assert result["video"] == 2
+    assert not any(doc.get("lease_owner") for doc in collection.docs.values())
+
+
+def test_unhandled_documents_of_a_halted_batch_are_released():
+    """
+    Test that when the handler hits an open circuit, the rest of the claimed batch is released instead of staying leased.
+    """
+    from app.errors.exceptions import CircuitOpenError
+    collection = FakeNewsCollection([{"_id": i, "status": "FETCHED"} for i in range(3)])
+    handled = []
+
+    def handler(collection, doc):
+        handled.append(doc["_id"])
+        raise CircuitOpenError("gemini", retry_in=30)
+
+    stage = PipelineStage("validate", ["FETCHED"], handler, batch_size=3)
+    runner = PipelineRunner(collection, [stage], queue_size=10)
+    runner._handle(stage, [0, 1, 2])
+    assert len(handled) == 1 and stage.halted
+    assert not any(doc.get("lease_owner") for doc in collection.docs.values())
+    assert all(doc["status"] == "FETCHED" for doc in collection.docs.values())
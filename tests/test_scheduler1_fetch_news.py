@@ -1 +1,123 @@
-# Tests for Scheduler 1: News Fetch 
\ No newline at end of file
+# Tests for Scheduler 1: News Fetch
+from unittest.mock import MagicMock, patch
+from pymongo.errors import BulkWriteError
+from pymongo.results import InsertManyResult
+from app.database.dedup import SeenUrlIndex
+from app.database.near_duplicates import NearDuplicateIndex
+from app.pipelines import scheduler1_fetch_news as scheduler1
+
+FEEDS = [
+    {"source": "Feed A", "url": "https://a.example.com/rss", "tags": ["tech"]},
+    {"source": "Feed B", "url": "https://b.example.com/rss", "tags": ["sports"]},
+]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.inserted = []
+
+    def insert_many(self, docs, ordered=True):
+        self.inserted.extend(docs)
+        return InsertManyResult([None] * len(docs), True)
+
+
+def fake_fetch_rss_articles(url, max_results=5):
+    host = url.split("/")[2]
+    articles = [
+        {"title": f"{host} story {i}", "link": f"https://{host}/story/{i}", "published": "", "summary": f"summary {i}"}
+        for i in range(3)
+    ]
+    return articles, {"etag": f'"{host}"', "last_modified": None, "new_guids": [art["link"] for art in articles]}
+
+
+def fake_scrape_article_content(url):
+    return f"content of {url}"
+
+
+def without_run_specific_fields(docs):
+    return [{k: v for k, v in doc.items() if k not in ("created_at", "cluster_id")} for doc in docs]
+
+
+def run_fetch(concurrent, url_index=None, collection=None, save_feed_state=None):
+    collection = collection or FakeCollection()
+    url_index = url_index or SeenUrlIndex(None)
+    with patch.object(scheduler1, "load_rss_feeds", return_value=FEEDS), \
+            patch.object(scheduler1, "save_feed_state", save_feed_state or MagicMock()), \
+            patch.object(scheduler1, "get_seen_url_index", return_value=url_index), \
+            patch.object(scheduler1, "new_near_duplicate_index", return_value=NearDuplicateIndex(None)), \
+            patch.object(scheduler1, "get_collection", return_value=collection), \
+            patch.object(scheduler1, "fetch_rss_articles", fake_fetch_rss_articles), \
+            patch.object(scheduler1, "scrape_article_content", fake_scrape_article_content):
+        timings = scheduler1.fetch_and_store_rss_news(concurrent=concurrent)
+    return collection.inserted, timings
+
+
+def test_concurrent_rss_fetch_matches_sequential():
+    """
+    Test that the concurrent RSS fetch stores the same docs, in the same order, as the sequential path.
+    """
+    sequential_docs, _ = run_fetch(concurrent=False)
+    concurrent_docs, timings = run_fetch(concurrent=True)
+    assert without_run_specific_fields(concurrent_docs) == without_run_specific_fields(sequential_docs)
+    assert len(concurrent_docs) == 6
+    assert set(timings) == {"Feed A", "Feed B"}
+
+
+def test_known_links_are_not_scraped():
+    """
+    Test that articles whose normalized link is already indexed are dropped before scraping.
+    """
+    url_index = SeenUrlIndex(None)
+    url_index.check_and_add("http://www.a.example.com/story/0/?utm_source=rss#top")
+    scraped = []
+
+    def recording_scrape(url):
+        scraped.append(url)
+        return fake_scrape_article_content(url)
+
+    with patch.object(scheduler1, "fetch_rss_articles", fake_fetch_rss_articles), \
+            patch.object(scheduler1, "scrape_article_content", recording_scrape):
+        docs, _, _ = scheduler1.collect_feed_docs(FEEDS[0], url_index=url_index)
+    assert "https://a.example.com/story/0" not in scraped
+    assert [doc.normalized_link for doc in docs] == [
+        "https://a.example.com/story/1", "https://a.example.com/story/2"
+    ]
+
+
+def test_feed_state_is_recorded_only_after_its_docs_are_stored():
+    """
+    Test that a feed's validators are saved after its docs are inserted, and not at all if the insert failed.
+    """
+    events = []
+
+    class FlakyCollection(FakeCollection):
+        def insert_many(self, docs, ordered=True):
+            events.append("insert")
+            # Feed B's docs fail with a non-duplicate write error
+            errors = [{"index": n, "code": 121, "errmsg": "validation failed"}
+                      for n, doc in enumerate(docs) if "b.example.com" in doc["news_link"]]
+            raise BulkWriteError({"nInserted": len(docs) - len(errors), "writeErrors": errors})
+
+    def save_feed_state(url, etag, last_modified, new_guids):
+        events.append(("save", url))
+
+    run_fetch(concurrent=False, collection=FlakyCollection(), save_feed_state=save_feed_state)
+    assert events == ["insert", ("save", FEEDS[0]["url"])]
+
+
+def test_a_failing_feed_does_not_abort_the_sequential_run():
+    """
+    Test that a feed raising while it is stored is skipped, and the docs and state of the feeds before it are still written.
+    """
+    saved = []
+    assign = NearDuplicateIndex.assign
+
+    def flaky_assign(self, doc):
+        if doc.source == "Feed B":
+            raise ValueError("bad doc")
+        return assign(self, doc)
+
+    with patch.object(NearDuplicateIndex, "assign", flaky_assign):
+        inserted, timings = run_fetch(concurrent=False, save_feed_state=lambda url, **state: saved.append(url))
+    assert [doc["source"] for doc in inserted] == ["Feed A"] * 3
+    assert saved == [FEEDS[0]["url"]]
@@ -0,0 +1,76 @@
+# Tests for Scheduler 2: Content Validation
+import json
+from unittest.mock import MagicMock, patch
+from app.errors.exceptions import CircuitOpenError
+from app.pipelines import scheduler2_validate_content as scheduler2
+
+DOCS = [{"_id": "a1", "headline": "India wins the series"}, {"_id": "b2", "headline": "How to bake bread"}]
+
+
+def gemini_reply(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+def test_build_batch_prompt_lists_every_headline_with_its_id():
+    """
+    Test that the batch prompt keeps the validation criteria and tags each headline with its doc id.
+    """
+    prompt = scheduler2.build_batch_prompt(DOCS)
+    assert "[a1] India wins the series" in prompt
+    assert "[b2] How to bake bread" in prompt
+    assert "Is it about a real, recent event" in prompt
+    assert "{headline}" not in prompt
+
+
+def test_validate_articles_batch_maps_results_by_id():
+    """
+    Test that a JSON array reply is mapped back to docs by id with a single Gemini call.
+    """
+    reply = json.dumps([
+        {"id": "b2", "valid": "NO", "related_to_india": "NO", "relevancy": 0, "reason": "Evergreen guide."},
+        {"id": "a1", "valid": "YES", "related_to_india": "YES", "relevancy": 9, "reason": "Big news."},
+    ])
+    with patch.object(scheduler2, "gemini_generate_content", return_value=gemini_reply(reply)) as generate:
+        results = scheduler2.validate_articles_batch(DOCS)
+    assert generate.call_count == 1
+    assert results["a1"]["relevancy"] == 9
+    assert results["b2"]["valid"] == "NO"
+
+
+def test_batch_generation_config_requires_an_id_per_item():
+    """
+    Test that schema-constrained batch replies must tag every result with its id, while single replies need none.
+    """
+    with patch.object(scheduler2.settings, "GEMINI_STRUCTURED_OUTPUT", True):
+        batch = scheduler2.validation_generation_config(batch=True)["responseSchema"]
+        single = scheduler2.validation_generation_config()["responseSchema"]
+    assert batch["type"] == "ARRAY"
+    assert "id" in batch["items"]["required"]
+    assert "id" not in single["required"]
+
+
+def test_validate_articles_batch_falls_back_on_malformed_reply():
+    """
+    Test that a malformed batch reply falls back to one validation call per headline.
+    """
+    single = {"valid": "YES", "related_to_india": "YES", "relevancy": 5, "reason": "ok"}
+    with patch.object(scheduler2, "gemini_generate_content", return_value=gemini_reply("not json")), \
+            patch.object(scheduler2, "validate_article_with_gemini", return_value=single) as validate_one:
+        results = scheduler2.validate_articles_batch(DOCS)
+    assert validate_one.call_count == 2
+    assert results == {"a1": single, "b2": single}
+
+
+def test_process_fetched_articles_stops_when_circuit_opens():
+    """
+    Test that an open Gemini circuit ends the run without marking any article as an error.
+    """
+    collection = MagicMock()
+    collection.find_one_and_update.side_effect = DOCS + [None]
+    with patch.object(scheduler2, "get_collection", return_value=collection), \
+            patch.object(scheduler2, "gemini_generate_content", side_effect=CircuitOpenError("gemini", 60)) as generate, \
+            patch.object(scheduler2, "update_article_status") as update_status:
+        scheduler2.process_fetched_articles(batch_size=1)
+    assert generate.call_count == 1
+    update_status.assert_not_called()
+    assert all("$set" not in c.args[1] for c in collection.update_one.call_args_list)
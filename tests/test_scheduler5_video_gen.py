@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from app.database.leases import WORKER_ID
+from app.pipelines import scheduler5_video_gen
+from tests.scheduler.test_pipeline_runner import FakeNewsCollection
+
+
+def test_process_script_generated_articles_renders_in_parallel_up_to_limit(monkeypatch):
+    """
+    Test that due articles are claimed and rendered by several render workers, capped at the limit.
+    """
+    collection = FakeNewsCollection([{"_id": n, "status": "SCRIPT_GENERATED"} for n in range(5)])
+    monkeypatch.setattr(scheduler5_video_gen, "get_collection", lambda name: collection)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def fake_render(coll, doc):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        coll.update_one({"_id": doc["_id"]}, {"$set": {"status": "VIDEO_GENERATED"}})
+        return True
+
+    monkeypatch.setattr(scheduler5_video_gen, "generate_video_for_document", fake_render)
+    monkeypatch.setattr(scheduler5_video_gen.settings, "RENDER_POOL_SIZE", 2)
+    scheduler5_video_gen.process_script_generated_articles(limit=4)
+    statuses = [doc["status"] for doc in collection.docs.values()]
+    assert statuses.count("VIDEO_GENERATED") == 4
+    assert peak[0] == 2
+    assert not any(doc.get("lease_owner") for doc in collection.docs.values())
+
+
+def test_previews_are_rendered_until_approved(monkeypatch, tmp_path):
+    """
+    Test that an article is rendered with its profile, recorded as a preview, and that approving
+    the preview requeues it for a final render.
+    """
+    # Claimed by this worker, as the stage runners do before calling the handler
+    collection = FakeNewsCollection([{"_id": 1, "status": "SCRIPT_GENERATED", "video_title": "Reel",
+                                      "lease_owner": WORKER_ID}])
+    renders = []
+    monkeypatch.setattr(scheduler5_video_gen, "OUTPUTS_DIR", str(tmp_path))
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_video", lambda domain, sentiment: "bg.mp4")
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_music", lambda sentiment: "bg.mp3")
+    monkeypatch.setattr(scheduler5_video_gen, "generate_video_with_overlay_and_caption",
+                        lambda **kwargs: renders.append(kwargs))
+    monkeypatch.setattr(scheduler5_video_gen, "GCSClient",
+                        lambda: MagicMock(upload_file=lambda path, blob: f"https://storage/{blob}"))
+    monkeypatch.setattr(scheduler5_video_gen.settings, "RENDER_DEFAULT_PROFILE", "preview")
+
+    scheduler5_video_gen.generate_video_for_document(collection, dict(collection.docs[1]))
+    doc = collection.docs[1]
+    assert renders[0]["profile"].name == "preview"
+    assert doc["status"] == "VIDEO_GENERATED" and doc["rendered_profile"] == "preview"
+    assert doc["video_url"].endswith("Reel_preview.mp4")
+
+    assert scheduler5_video_gen.request_final_render(collection, 1)
+    assert doc["status"] == "SCRIPT_GENERATED" and doc["render_profile"] == "final"
+    scheduler5_video_gen.generate_video_for_document(collection, dict(doc))
+    assert renders[1]["profile"].name == "final"
+    assert doc["rendered_profile"] == "final" and doc["video_url"].endswith("Reel.mp4")
+    scheduler5_video_gen.request_final_render(collection, 1)
+    assert doc["status"] == "VIDEO_GENERATED"
+
+
+def test_only_missing_background_assets_dead_letter_on_the_first_attempt(monkeypatch, tmp_path):
+    """
+    Test that a missing background clip is permanent, while a missing ffmpeg binary is retried.
+    """
+    collection = FakeNewsCollection([{"_id": 1, "status": "SCRIPT_GENERATED", "domain": "nowhere", "lease_owner": WORKER_ID},
+                                     {"_id": 2, "status": "SCRIPT_GENERATED", "lease_owner": WORKER_ID}])
+    scheduler5_video_gen.generate_video_for_document(collection, dict(collection.docs[1]))
+    assert collection.docs[1]["status"] == "DEAD_LETTER"
+
+    monkeypatch.setattr(scheduler5_video_gen, "OUTPUTS_DIR", str(tmp_path))
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_video", lambda domain, sentiment: "bg.mp4")
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_music", lambda sentiment: "bg.mp3")
+
+    def missing_ffmpeg(**kwargs):
+        raise FileNotFoundError(2, "No such file or directory", "ffmpeg")
+
+    monkeypatch.setattr(scheduler5_video_gen, "generate_video_with_overlay_and_caption", missing_ffmpeg)
+    scheduler5_video_gen.generate_video_for_document(collection, dict(collection.docs[2]))
+    assert collection.docs[2]["status"] == "ERROR_VIDEO"
+
+
+def test_a_worker_that_lost_its_lease_does_not_overwrite_the_new_owner(monkeypatch, tmp_path):
+    """
+    Test that a render finishing after its lease was reclaimed leaves the other worker's result alone.
+    """
+    collection = FakeNewsCollection([{"_id": 1, "status": "SCRIPT_GENERATED", "lease_owner": WORKER_ID}])
+    monkeypatch.setattr(scheduler5_video_gen, "OUTPUTS_DIR", str(tmp_path))
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_video", lambda domain, sentiment: "bg.mp4")
+    monkeypatch.setattr(scheduler5_video_gen, "get_background_music", lambda sentiment: "bg.mp3")
+    monkeypatch.setattr(scheduler5_video_gen, "GCSClient",
+                        lambda: MagicMock(upload_file=lambda path, blob: f"https://storage/{blob}"))
+
+    def slow_render(**kwargs):
+        # Meanwhile the lease expired and another worker rendered and recorded the video
+        collection.docs[1].update({"lease_owner": "other-worker", "status": "VIDEO_GENERATED", "video_url": "theirs"})
+
+    monkeypatch.setattr(scheduler5_video_gen, "generate_video_with_overlay_and_caption", slow_render)
+    scheduler5_video_gen.generate_video_for_document(collection, {"_id": 1, "status": "SCRIPT_GENERATED"})
+    assert collection.docs[1]["video_url"] == "theirs"
+
+    def failing_render(**kwargs):
+        collection.docs[1].update({"status": "SCRIPT_GENERATED"})
+        raise RuntimeError("ffmpeg crashed")
+
+    monkeypatch.setattr(scheduler5_video_gen, "generate_video_with_overlay_and_caption", failing_render)
+    scheduler5_video_gen.generate_video_for_document(collection, {"_id": 1, "status": "SCRIPT_GENERATED"})
+    assert collection.docs[1]["status"] == "SCRIPT_GENERATED" and "attempts" not in collection.docs[1]
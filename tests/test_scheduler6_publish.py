@@ -0,0 +1,16 @@
+from unittest.mock import MagicMock
+from app.pipelines import scheduler6_publish
+
+
+def test_publish_document_skips_preview_renders(monkeypatch):
+    """
+    Test that a reel with only a preview render is left alone, while a final render is posted.
+    """
+    posted = []
+    monkeypatch.setattr(scheduler6_publish, "post_reel_to_instagram", lambda url, caption: posted.append(url) or "ig-1")
+    collection = MagicMock()
+    scheduler6_publish.publish_document(collection, {"_id": 1, "video_url": "https://v/preview.mp4", "rendered_profile": "preview"})
+    assert posted == [] and not collection.update_one.called
+    scheduler6_publish.publish_document(collection, {"_id": 2, "video_url": "https://v/final.mp4", "rendered_profile": "final"})
+    assert posted == ["https://v/final.mp4"]
+    assert collection.update_one.call_args.args[1]["$set"]["status"] == "POSTED"
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+from app.utils import article_extractor
+
+ARTICLE_HTML = b"""
+<html><body>
+  <nav><p>Home | World | Sports | Tech | Entertainment | Business</p></nav>
+  <div class="cookie-banner"><p>We use cookies to improve your experience, please accept all cookies.</p></div>
+  <div class="story-body">
+    <p>The government announced a new policy on Monday, drawing reactions from across the country.</p>
+    <p>Officials said the changes, which take effect next month, will affect millions of commuters.</p>
+    <p>Opposition leaders criticised the timing, calling for a debate in parliament before rollout.</p>
+  </div>
+  <div class="related-links"><p><a href="/a">Read more: another story that is trending right now</a></p></div>
+  <footer><p>Copyright 2026 Example News. All rights reserved worldwide.</p></footer>
+</body></html>
+"""
+
+
+def test_extract_main_text_keeps_only_article_block():
+    """
+    Test that the highest-scoring block is returned without nav, cookie banner, related links or footer text.
+    """
+    text = article_extractor.extract_main_text(ARTICLE_HTML)
+    lines = text.split("\n")
+    assert len(lines) == 3
+    assert lines[0].startswith("The government announced")
+    assert "cookies" not in text and "Copyright" not in text and "Read more" not in text
+
+
+class StreamingResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def test_fetch_html_stops_at_byte_cap():
+    """
+    Test that the body stops streaming once the byte cap is reached.
+    """
+    response = StreamingResponse([b"a" * 10] * 100)
+    with patch.object(article_extractor, "http_get", return_value=response):
+        body = article_extractor.fetch_html("https://example.com/a", max_bytes=25)
+    assert body == b"a" * 25
+    assert response.read == 3
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import patch
+from app.errors.exceptions import CircuitOpenError
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_breaker_opens_after_threshold_and_rejects_calls():
+    """
+    Test that consecutive failures open the circuit and further calls are rejected without running.
+    """
+    breaker = CircuitBreaker("svc", failure_threshold=2, recovery_seconds=30, persist=False)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_allows_one_probe_then_closes_or_reopens():
+    """
+    Test that after recovery_seconds a single probe is let through, closing the circuit on success
+    and re-opening it on failure.
+    """
+    breaker = CircuitBreaker("svc", failure_threshold=1, recovery_seconds=30, persist=False)
+    with patch.object(circuit_breaker.time, "monotonic", return_value=100.0):
+        breaker.record_failure()
+    with patch.object(circuit_breaker.time, "monotonic", return_value=131.0):
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+    with patch.object(circuit_breaker.time, "monotonic", return_value=162.0):
+        breaker.before_call()
+        breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+
+def test_breaker_persists_transitions():
+    """
+    Test that state transitions are written to the service_health collection.
+    """
+    breaker = CircuitBreaker("svc", failure_threshold=1, recovery_seconds=30)
+    with patch.object(circuit_breaker, "save_breaker_state") as save_state:
+        breaker.record_failure()
+    assert save_state.call_args.args[0]["state"] == OPEN
+
+
+def test_breaker_persists_failure_counts_and_their_reset():
+    """
+    Test that every failure is persisted with its count, a success that resets the count is persisted,
+    and further successes are not.
+    """
+    breaker = CircuitBreaker("svc", failure_threshold=3, recovery_seconds=30)
+    with patch.object(circuit_breaker, "save_breaker_state") as save_state:
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_success()
+    snapshots = [call.args[0] for call in save_state.call_args_list]
+    assert [(s["state"], s["failures"]) for s in snapshots] == [(CLOSED, 1), (CLOSED, 2), (CLOSED, 0)]
+    with patch.object(circuit_breaker, "save_breaker_state") as save_state:
+        for _ in range(3):
+            breaker.record_failure()
+    assert save_state.call_args.args[0]["state"] == OPEN
+    assert save_state.call_args.args[0]["opened_at"] is not None
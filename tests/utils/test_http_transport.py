@@ -0,0 +1,29 @@
+from unittest.mock import patch
+import requests
+from app.utils.http_transport import DEFAULT_TIMEOUT, HttpTransport
+
+
+def make_response(status_code: int, content: bytes, body: bytes = b"") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.request = requests.Request("POST", "https://api.example.com/x", data=body).prepare()
+    return response
+
+
+def test_transport_reuses_session_per_host_and_records_stats():
+    """
+    Test that requests to one host share a session, get the default timeout and are counted per host.
+    """
+    transport = HttpTransport()
+    responses = [make_response(200, b"12345", b"abc"), make_response(503, b"")]
+    with patch.object(requests.Session, "request", side_effect=responses) as request:
+        transport.post("https://api.example.com/x", data=b"abc")
+        transport.get("https://API.example.com/y")
+    assert request.call_args_list[0].kwargs["timeout"] == DEFAULT_TIMEOUT
+    assert len(transport._sessions) == 1
+    stats = transport.stats()["api.example.com"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["bytes_sent"] == 3
+    assert stats["bytes_received"] == 5
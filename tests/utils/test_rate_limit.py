@@ -0,0 +1,20 @@
+from app.utils.rate_limit import TokenBucket
+
+
+def test_token_bucket_reports_wait_once_empty():
+    """
+    Test that the bucket allows a burst up to capacity and then reports the refill wait.
+    """
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    wait = bucket.try_take()
+    assert 0 < wait <= 1.0
+
+
+def test_token_bucket_clamps_oversized_requests():
+    """
+    Test that a request larger than capacity is clamped instead of waiting forever.
+    """
+    bucket = TokenBucket(rate_per_minute=600, capacity=10)
+    assert bucket.try_take(1000) == 0
@@ -0,0 +1,43 @@
+from unittest.mock import patch
+from app.utils import rss_utils
+
+FEED_XML = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>Old story</title><link>https://example.com/old</link><guid>guid-old</guid></item>
+<item><title>New story</title><link>https://example.com/new</link><guid>guid-new</guid></item>
+</channel></rss>"""
+
+
+class MockResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+def test_fetch_rss_articles_sends_validators_and_short_circuits_on_304():
+    """
+    Test that stored validators are sent as conditional GET headers and a 304 returns no articles and no state.
+    """
+    state = {"etag": '"abc"', "last_modified": "Sat, 18 Oct 2026 10:00:00 GMT", "seen_guids": []}
+    with patch.object(rss_utils, "load_feed_state", return_value=state), \
+            patch.object(rss_utils, "http_get", return_value=MockResponse(304)) as get:
+        articles, feed_state = rss_utils.fetch_rss_articles("https://example.com/rss")
+    headers = get.call_args.kwargs["headers"]
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == state["last_modified"]
+    assert articles == []
+    assert feed_state is None
+
+
+def test_fetch_rss_articles_skips_seen_guids():
+    """
+    Test that entries whose GUID was already seen are skipped and new GUIDs are returned with the new validators.
+    """
+    state = {"seen_guids": ["guid-old"]}
+    response = MockResponse(200, FEED_XML, {"ETag": '"v2"'})
+    with patch.object(rss_utils, "load_feed_state", return_value=state), \
+            patch.object(rss_utils, "http_get", return_value=response):
+        articles, feed_state = rss_utils.fetch_rss_articles("https://example.com/rss")
+    assert [a["title"] for a in articles] == ["New story"]
+    assert feed_state == {"etag": '"v2"', "last_modified": None, "new_guids": ["guid-new"]}
@@ -0,0 +1,42 @@
+from datetime import datetime
+from app.database.models import UnifiedNewsDoc
+from app.database.near_duplicates import NearDuplicateIndex
+from app.utils.simhash import band_keys, hamming_distance, simhash
+
+STORY = (
+    "India clinched the test series 2-1 after a five wicket win at the Oval on Sunday. "
+    "The captain praised the bowlers, who took all twenty wickets in the final match, "
+    "and said the team would now focus on the upcoming one day series against Australia."
+)
+
+
+def make_doc(headline: str, article: str) -> UnifiedNewsDoc:
+    return UnifiedNewsDoc(headline=headline, article=article, domain="sports", source="Example",
+                          created_at=datetime.utcnow(), status="FETCHED")
+
+
+def test_simhash_near_duplicates_are_close_and_share_a_band():
+    """
+    Test that a lightly edited copy of a story is within a few bits and shares at least one band key.
+    """
+    a = simhash("India clinch test series 2-1\n" + STORY)
+    b = simhash("India clinches test series 2-1\n" + STORY)
+    unrelated = simhash("Markets rally as the central bank holds rates steady for a third meeting in a row.")
+    assert hamming_distance(a, b) <= 3
+    assert set(band_keys(a)) & set(band_keys(b))
+    assert hamming_distance(a, unrelated) > 10
+
+
+def test_near_duplicate_index_clusters_within_a_batch():
+    """
+    Test that the second copy of a story joins the first one's cluster and is marked DUPLICATE_ARTICLE.
+    """
+    index = NearDuplicateIndex(None)
+    first = make_doc("India clinch test series 2-1", STORY)
+    copy = make_doc("India clinches test series 2-1", STORY)
+    other = make_doc("Markets rally", "Markets rally as the central bank holds rates steady for a third meeting.")
+    assert index.assign(first) is False
+    assert index.assign(copy) is True
+    assert index.assign(other) is False
+    assert copy.cluster_id == first.cluster_id and copy.status == "DUPLICATE_ARTICLE"
+    assert other.cluster_id != first.cluster_id and other.status == "FETCHED"
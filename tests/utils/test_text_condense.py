@@ -0,0 +1,25 @@
+from app.utils.text_condense import condense_article, estimate_tokens
+
+LEAD = "The finance minister presented the union budget on Saturday, announcing new tax slabs for salaried earners."
+FILLER = "Analysts in the studio discussed the weather and a cricket match that had nothing to do with it."
+KEY = "The new tax slabs mean salaried earners below twelve lakh will pay no income tax under the budget."
+
+
+def test_short_article_is_unchanged():
+    """
+    Test that an article already within budget is returned as is.
+    """
+    assert condense_article(LEAD, token_budget=500) == LEAD
+
+
+def test_condense_keeps_lead_and_relevant_sentences_within_budget():
+    """
+    Test that condensation keeps the lead paragraph, prefers on-topic sentences and respects the budget.
+    """
+    article = "\n".join([LEAD] + [" ".join([FILLER] * 3 + [KEY] + [FILLER] * 3)] * 5)
+    budget = estimate_tokens(LEAD) + estimate_tokens(KEY) * 2 + 10
+    condensed = condense_article(article, budget, headline="Budget brings new tax slabs for salaried earners")
+    assert condensed.startswith(LEAD)
+    assert KEY in condensed
+    assert FILLER not in condensed
+    assert estimate_tokens(condensed) <= budget
@@ -0,0 +1,17 @@
+from app.utils.url_utils import normalize_url
+
+
+def test_normalize_url_strips_tracking_and_canonicalizes_host():
+    """
+    Test that tracking params, fragments, www prefix, default port and trailing slash are normalized away.
+    """
+    url = "http://WWW.Example.com:443/news/story-1/?utm_source=rss&id=7&fbclid=x&a=1#comments"
+    assert normalize_url(url) == "https://example.com/news/story-1?a=1&id=7"
+
+
+def test_normalize_url_keeps_distinct_articles_distinct():
+    """
+    Test that content-bearing query params and paths still distinguish articles.
+    """
+    assert normalize_url("https://example.com/article?id=1") != normalize_url("https://example.com/article?id=2")
+    assert normalize_url("") == ""